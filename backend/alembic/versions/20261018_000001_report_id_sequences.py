@@ -0,0 +1,56 @@
+"""report_id_sequences
+
+Revision ID: 20261018_000001
+Revises: 6057ec94bd51
+Create Date: 2026-10-18 09:00:00.000000
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000001"
+down_revision = "6057ec94bd51"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One sequence per year, seeded past the highest RPT-YYYY-XXXXXX already issued.
+    # Years without reports get their sequence lazily from app.services.report_id.
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            r record;
+        BEGIN
+            FOR r IN
+                SELECT substring(report_id FROM 5 FOR 4) AS year,
+                       max(substring(report_id FROM 10)::bigint) AS last_value
+                FROM reports
+                WHERE report_id ~ '^RPT-[0-9]{4}-[0-9]+$'
+                GROUP BY 1
+            LOOP
+                EXECUTE format('CREATE SEQUENCE IF NOT EXISTS %I', 'report_id_seq_' || r.year);
+                PERFORM setval('report_id_seq_' || r.year, r.last_value);
+            END LOOP;
+        END $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            s record;
+        BEGIN
+            FOR s IN
+                SELECT sequence_name FROM information_schema.sequences
+                WHERE sequence_name LIKE 'report\\_id\\_seq\\_%'
+            LOOP
+                EXECUTE format('DROP SEQUENCE IF EXISTS %I', s.sequence_name);
+            END LOOP;
+        END $$;
+        """
+    )
@@ -0,0 +1,37 @@
+"""report_search_index
+
+Revision ID: 20261018_000002
+Revises: 20261018_000001
+Create Date: 2026-10-18 10:00:00.000000
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000002"
+down_revision = "20261018_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Generated column keeps the search document in sync with summary/details on every write
+    op.execute(
+        """
+        ALTER TABLE reports
+        ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('english', coalesce(summary, '') || ' ' || coalesce(details, ''))
+        ) STORED
+        """
+    )
+    op.execute("CREATE INDEX ix_reports_search_vector ON reports USING gin (search_vector)")
+    # Trigram index backs fuzzy (typo-tolerant) matching on the summary
+    op.execute("CREATE INDEX ix_reports_summary_trgm ON reports USING gin (summary gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_reports_summary_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_reports_search_vector")
+    op.execute("ALTER TABLE reports DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,61 @@
+"""challenge_geohash
+
+Revision ID: 20261018_000003
+Revises: 20261018_000002
+Create Date: 2026-10-18 11:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.geohash import encode
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000003"
+down_revision = "20261018_000002"
+branch_labels = None
+depends_on = "001_add_community_challenges"
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column("community_challenges", sa.Column("geohash", sa.String(length=12), nullable=True))
+
+    # Backfill existing rows in batches
+    conn = op.get_bind()
+    challenges = sa.table(
+        "community_challenges",
+        sa.column("id"),
+        sa.column("latitude"),
+        sa.column("longitude"),
+        sa.column("geohash"),
+    )
+    while True:
+        rows = conn.execute(
+            sa.select(challenges.c.id, challenges.c.latitude, challenges.c.longitude)
+            .where(challenges.c.geohash.is_(None))
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            challenges.update()
+            .where(challenges.c.id == sa.bindparam("row_id"))
+            .values(geohash=sa.bindparam("row_geohash")),
+            [
+                {"row_id": row.id, "row_geohash": encode(float(row.latitude), float(row.longitude))}
+                for row in rows
+            ],
+        )
+
+    # varchar_pattern_ops lets LIKE 'prefix%' use the index under any collation
+    op.execute(
+        "CREATE INDEX ix_community_challenges_geohash "
+        "ON community_challenges (geohash varchar_pattern_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_community_challenges_geohash", table_name="community_challenges")
+    op.drop_column("community_challenges", "geohash")
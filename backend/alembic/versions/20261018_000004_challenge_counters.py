@@ -0,0 +1,65 @@
+"""challenge_counters
+
+Revision ID: 20261018_000004
+Revises: 20261018_000003
+Create Date: 2026-10-18 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000004"
+down_revision = "20261018_000003"
+branch_labels = None
+depends_on = None
+
+COUNTERS = (
+    "participants_count",
+    "volunteers_count",
+    "donors_count",
+    "supports_count",
+    "high_priority_supports_count",
+)
+
+
+def upgrade() -> None:
+    for name in COUNTERS:
+        op.add_column(
+            "community_challenges",
+            sa.Column(name, sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    # Backfill from the source tables
+    op.execute(
+        """
+        UPDATE community_challenges c SET
+            participants_count = coalesce(p.participants, 0),
+            volunteers_count = coalesce(p.volunteers, 0),
+            donors_count = coalesce(p.donors, 0),
+            supports_count = coalesce(s.supports, 0),
+            high_priority_supports_count = coalesce(s.high_priority, 0)
+        FROM community_challenges c2
+        LEFT JOIN (
+            SELECT challenge_id,
+                   count(*) AS participants,
+                   count(*) FILTER (WHERE role = 'VOLUNTEER') AS volunteers,
+                   count(*) FILTER (WHERE role = 'DONOR') AS donors
+            FROM challenge_participations
+            GROUP BY challenge_id
+        ) p ON p.challenge_id = c2.id
+        LEFT JOIN (
+            SELECT challenge_id,
+                   count(*) AS supports,
+                   count(*) FILTER (WHERE is_high_priority) AS high_priority
+            FROM stakeholder_supports
+            GROUP BY challenge_id
+        ) s ON s.challenge_id = c2.id
+        WHERE c.id = c2.id
+        """
+    )
+
+
+def downgrade() -> None:
+    for name in reversed(COUNTERS):
+        op.drop_column("community_challenges", name)
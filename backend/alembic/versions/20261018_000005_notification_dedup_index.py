@@ -0,0 +1,39 @@
+"""notification_dedup_index
+
+Revision ID: 20261018_000005
+Revises: 20261018_000004
+Create Date: 2026-10-18 13:00:00.000000
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000005"
+down_revision = "20261018_000004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the oldest attestation request per (user, report) before enforcing uniqueness
+    op.execute(
+        """
+        DELETE FROM notifications n
+        USING notifications older
+        WHERE n.report_id IS NOT NULL
+          AND n.notification_type = 'attestation_request'
+          AND older.notification_type = 'attestation_request'
+          AND n.user_id = older.user_id
+          AND n.report_id = older.report_id
+          AND (older.created_at, older.id) < (n.created_at, n.id)
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX uq_notifications_user_report "
+        "ON notifications (user_id, report_id) "
+        "WHERE report_id IS NOT NULL AND notification_type = 'attestation_request'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_notifications_user_report")
@@ -0,0 +1,115 @@
+"""user_location
+
+Revision ID: 20261018_000007
+Revises: 20261018_000006
+Create Date: 2026-10-18 15:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.geohash import encode
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000007"
+down_revision = "20261018_000006"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def backfill_user_locations(conn) -> None:
+    """Give every user the location of their latest non-anonymous report."""
+    users = sa.table(
+        "users",
+        sa.column("id"),
+        sa.column("county"),
+        sa.column("latitude"),
+        sa.column("longitude"),
+        sa.column("geohash"),
+    )
+    reports = sa.table(
+        "reports",
+        sa.column("user_id"),
+        sa.column("location_id"),
+        sa.column("anonymous"),
+        sa.column("created_at"),
+    )
+    locations = sa.table("locations", sa.column("id"), sa.column("county"), sa.column("latitude"), sa.column("longitude"))
+    latest_location = (
+        sa.select(reports.c.location_id)
+        .where(
+            reports.c.user_id == users.c.id,
+            reports.c.anonymous.is_(False),
+            reports.c.location_id.isnot(None),
+        )
+        .order_by(reports.c.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    last_id = None
+    while True:
+        query = (
+            sa.select(users.c.id, locations.c.county, locations.c.latitude, locations.c.longitude)
+            .select_from(users.join(locations, locations.c.id == latest_location))
+            .where(users.c.latitude.is_(None), locations.c.latitude.isnot(None), locations.c.longitude.isnot(None))
+            .order_by(users.c.id)
+            .limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            query = query.where(users.c.id > last_id)
+        rows = conn.execute(query).all()
+        if not rows:
+            break
+        conn.execute(
+            users.update()
+            .where(users.c.id == sa.bindparam("row_id"))
+            .values(
+                county=sa.bindparam("row_county"),
+                latitude=sa.bindparam("row_latitude"),
+                longitude=sa.bindparam("row_longitude"),
+                geohash=sa.bindparam("row_geohash"),
+            ),
+            [
+                {
+                    "row_id": row.id,
+                    "row_county": row.county,
+                    "row_latitude": float(row.latitude),
+                    "row_longitude": float(row.longitude),
+                    "row_geohash": encode(float(row.latitude), float(row.longitude)),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("county", sa.String(length=100), nullable=True))
+    op.add_column("users", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("users", sa.Column("longitude", sa.Float(), nullable=True))
+    op.add_column("users", sa.Column("geohash", sa.String(length=12), nullable=True))
+    # Reporters' positions are otherwise only learned from their next report,
+    # and nearby-user fan-outs would skip everyone until then
+    backfill_user_locations(op.get_bind())
+    op.create_index("ix_users_county", "users", ["county"])
+    # varchar_pattern_ops lets LIKE 'prefix%' use the index under any collation
+    op.execute("CREATE INDEX ix_users_geohash ON users (geohash varchar_pattern_ops)")
+
+    op.create_index(
+        "ix_notifications_challenge_user",
+        "notifications",
+        ["challenge_id", "notification_type", "user_id"],
+        postgresql_where=sa.text("challenge_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_challenge_user", table_name="notifications")
+    op.drop_index("ix_users_geohash", table_name="users")
+    op.drop_index("ix_users_county", table_name="users")
+    op.drop_column("users", "geohash")
+    op.drop_column("users", "longitude")
+    op.drop_column("users", "latitude")
+    op.drop_column("users", "county")
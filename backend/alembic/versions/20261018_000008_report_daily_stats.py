@@ -0,0 +1,60 @@
+"""report_daily_stats
+
+Revision ID: 20261018_000008
+Revises: 20261018_000007
+Create Date: 2026-10-18 16:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000008"
+down_revision = "20261018_000007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_daily_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("county", sa.String(length=100), nullable=False),
+        sa.Column("category", sa.String(length=64), nullable=False),
+        sa.Column("severity", sa.String(length=16), nullable=False),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("report_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("ai_score_sum", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("ai_score_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("response_seconds_sum", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("day", "county", "category", "severity", "status"),
+    )
+
+    # Backfill; same aggregate as services/report_rollups.rebuild_report_rollups
+    op.execute(
+        """
+        INSERT INTO report_daily_stats (
+            day, county, category, severity, status,
+            report_count, ai_score_sum, ai_score_count, response_seconds_sum, updated_at
+        )
+        SELECT
+            CAST(reports.created_at AS DATE),
+            coalesce(locations.county, ''),
+            reports.category,
+            reports.severity,
+            reports.status,
+            count(reports.id),
+            coalesce(sum(reports.ai_severity_score), 0),
+            count(reports.ai_severity_score),
+            coalesce(sum(CASE WHEN reports.status = 'verified'
+                THEN extract(epoch FROM reports.updated_at - reports.created_at) ELSE 0 END), 0),
+            now()
+        FROM reports LEFT OUTER JOIN locations ON reports.location_id = locations.id
+        GROUP BY 1, 2, 3, 4, 5
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("report_daily_stats")
@@ -0,0 +1,58 @@
+"""location_geohash
+
+Revision ID: 20261018_000009
+Revises: 20261018_000008
+Create Date: 2026-10-18 17:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.geohash import encode
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000009"
+down_revision = "20261018_000008"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column("locations", sa.Column("geohash", sa.String(length=12), nullable=True))
+
+    # Backfill existing rows in batches
+    conn = op.get_bind()
+    locations = sa.table(
+        "locations",
+        sa.column("id"),
+        sa.column("latitude"),
+        sa.column("longitude"),
+        sa.column("geohash"),
+    )
+    while True:
+        rows = conn.execute(
+            sa.select(locations.c.id, locations.c.latitude, locations.c.longitude)
+            .where(locations.c.geohash.is_(None))
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            locations.update()
+            .where(locations.c.id == sa.bindparam("row_id"))
+            .values(geohash=sa.bindparam("row_geohash")),
+            [
+                {"row_id": row.id, "row_geohash": encode(float(row.latitude), float(row.longitude))}
+                for row in rows
+            ],
+        )
+
+    # varchar_pattern_ops lets LIKE 'prefix%' use the index under any collation
+    op.execute("CREATE INDEX ix_locations_geohash ON locations (geohash varchar_pattern_ops)")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_locations_geohash", table_name="locations")
+    op.drop_column("locations", "geohash")
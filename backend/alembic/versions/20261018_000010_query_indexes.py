@@ -0,0 +1,74 @@
+"""query_indexes
+
+Composite indexes for the hot report, notification and attestation queries.
+Built CONCURRENTLY so writes continue during the migration; each index is
+created outside the migration transaction.
+
+Revision ID: 20261018_000010
+Revises: 20261018_000009
+Create Date: 2026-10-18 18:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000010"
+down_revision = "20261018_000009"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns); mirrors the Index definitions in app/models
+INDEXES = [
+    # search_reports: default and priority sorts, filters combined with the default sort
+    ("ix_reports_created_at_id", "reports", ["created_at DESC NULLS LAST", "id DESC"]),
+    ("ix_reports_priority_id", "reports", ["priority_score DESC NULLS LAST", "id DESC"]),
+    ("ix_reports_category_created_at", "reports", ["category", "created_at DESC NULLS LAST", "id DESC"]),
+    ("ix_reports_severity_created_at", "reports", ["severity", "created_at DESC NULLS LAST", "id DESC"]),
+    ("ix_reports_status_created_at", "reports", ["status", "created_at DESC NULLS LAST", "id DESC"]),
+    # sync_offline_reports
+    ("ix_reports_user_created_at", "reports", ["user_id", "created_at DESC"]),
+    # Joins from locations (county filter, heatmap tiles)
+    ("ix_reports_location_id", "reports", ["location_id"]),
+    # Per-report children: selectinload and verification/priority aggregates
+    ("ix_report_media_report_id", "report_media", ["report_id"]),
+    ("ix_comments_report_id", "comments", ["report_id", "created_at"]),
+    ("ix_verifications_report_action", "verifications", ["report_id", "action"]),
+    ("ix_attestations_report_action", "attestations", ["report_id", "action"]),
+    # Notification inbox and unread count
+    ("ix_notifications_user_read_created_at", "notifications", ["user_id", "read", "created_at DESC"]),
+]
+
+
+def _drop_if_invalid(name: str) -> None:
+    """Drop an index left INVALID by an interrupted concurrent build, so it is rebuilt."""
+    if op.get_context().as_sql:
+        return
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+            "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            _drop_if_invalid(name)
+            op.create_index(
+                name,
+                table,
+                [sa.text(column) for column in columns],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -1,6 +1,7 @@
 """API endpoints for community attestation."""
 from __future__ import annotations
 
+from datetime import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -8,7 +9,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.core import Location, Report
 from ..schemas.attestation import AttestationRequest, AttestationResponse
+from ..services.analytics_cache import invalidate_analytics
 from ..services.community_notifications import create_attestation
+from ..services.report_rollups import record_report_changes, report_facts
 from .deps import get_current_user, get_db_session
 
 router = APIRouter(prefix="/attestations", tags=["attestations"])
@@ -83,6 +86,7 @@ async def attest_to_report(
         report.witness_count = (report.witness_count or 0) + 1
     
     # Recalculate verification outcome and priority
+    before = report_facts(report)
     try:
         from ..services.verification import compute_outcome
         from ..services.priority_scoring import update_report_priority
@@ -97,7 +101,9 @@ async def attest_to_report(
         # Don't fail if calculation fails
         pass
     
+    await record_report_changes(session, [(before, report_facts(report, verified_at=datetime.utcnow()))])
     await session.commit()
+    await invalidate_analytics()
     
     return AttestationResponse(
         id=str(attestation.id),
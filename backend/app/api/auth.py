@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from jose import jwt
@@ -20,6 +20,8 @@ from ..schemas.auth import (
     RegisterRequest,
     ResetPasswordRequest,
 )
+from ..services.auth_cache import invalidate_user
+from ..services.password_hashing import PasswordHasherBusy, get_password_hasher
 from .deps import get_db_session, get_settings_dep
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -30,6 +32,22 @@ def _hash_password(password: str) -> str:
     return password_context.hash(password)
 
 
+async def _run_password_op(fn, *args):
+    """Run a bcrypt call off the event loop; 503 when the hashing pool is saturated."""
+    try:
+        return await get_password_hasher().run(fn, *args)
+    except PasswordHasherBusy as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry",
+            headers={"Retry-After": "1"},
+        ) from exc
+
+
+def _verify_password(password: str, password_hash: str) -> bool:
+    return password_context.verify(password, password_hash)
+
+
 def _create_tokens(user_id: str, roles: list[str], settings: Settings) -> AuthTokens:
     now = datetime.utcnow()
     access_payload = {"sub": user_id, "roles": roles, "exp": now + timedelta(minutes=settings.access_token_expire_minutes)}
@@ -52,7 +70,7 @@ async def register_user(
         full_name=body.full_name,
         phone=body.phone,
         email=body.email,
-        password_hash=_hash_password(body.password),
+        password_hash=await _run_password_op(_hash_password, body.password),
         language=body.language,
     )
     session.add(user)
@@ -73,7 +91,7 @@ async def login_user(
 ) -> AuthTokens:
     result = await session.execute(select(User).where(User.phone == body.phone))
     user = result.scalar_one_or_none()
-    if not user or not password_context.verify(body.password, user.password_hash):
+    if not user or not await _run_password_op(_verify_password, body.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     return _create_tokens(str(user.id), [user.role], settings)
 
@@ -190,8 +208,9 @@ async def reset_password(
             )
 
         # Update password
-        user.password_hash = _hash_password(body.new_password)
+        user.password_hash = await _run_password_op(_hash_password, body.new_password)
         await session.commit()
+        await invalidate_user(user.id)
 
         return {"message": "Password reset successfully"}
 
@@ -31,13 +31,11 @@ from ..schemas.challenge import (
     StakeholderSupportRequest,
     StakeholderSupportResponse,
 )
-from ..services.geo_clustering import get_challenges_in_radius, get_challenges_count_in_radius
-from ..services.challenge_notifications import (
-    notify_challenge_created,
-    notify_challenge_progress,
-    notify_volunteer_request,
-    notify_stakeholder_support,
-)
+from ..services import geohash
+from ..services.challenge_stats import increment_participation_counters, increment_support_counters
+from ..services.geo_clustering import search_challenges_in_radius
+from ..services.job_tasks import NOTIFICATIONS_QUEUE, NOTIFY_CHALLENGE_CREATED, NOTIFY_STAKEHOLDER_SUPPORT
+from ..services.jobs import enqueue_job
 from .deps import get_current_user, get_db_session
 
 router = APIRouter(prefix="/challenges", tags=["challenges"])
@@ -62,6 +60,7 @@ async def create_challenge(
         category=body.category,
         latitude=body.latitude,
         longitude=body.longitude,
+        geohash=geohash.encode(body.latitude, body.longitude),
         county=body.county,
         district=body.district,
         needed_resources=body.needed_resources,
@@ -70,6 +69,7 @@ async def create_challenge(
         expected_impact=body.expected_impact,
         media_urls=body.media_urls,
         expires_at=expires_at,
+        participants_count=1,  # The organizer participation below
     )
     
     session.add(challenge)
@@ -83,16 +83,16 @@ async def create_challenge(
         contribution_details={},
     )
     session.add(participation)
+    # Notify nearby users about new challenge (worker job, committed with the challenge)
+    await enqueue_job(
+        session,
+        NOTIFY_CHALLENGE_CREATED,
+        {"challenge_id": str(challenge.id), "radius_km": 5.0},
+        queue=NOTIFICATIONS_QUEUE,
+    )
     await session.commit()
     await session.refresh(challenge)
     
-    # Notify nearby users about new challenge
-    try:
-        await notify_challenge_created(session, challenge, radius_km=5.0)
-    except Exception as e:
-        import logging
-        logging.warning(f"Failed to send challenge creation notifications: {e}")
-    
     return ChallengeResponse(
         id=challenge.id,
         creator_id=challenge.creator_id,
@@ -114,9 +114,10 @@ async def create_challenge(
         updated_at=challenge.updated_at,
         expires_at=challenge.expires_at,
         creator_name=user.full_name,
-        participants_count=1,
-        volunteers_count=0,
-        donors_count=0,
+        participants_count=challenge.participants_count,
+        volunteers_count=challenge.volunteers_count,
+        donors_count=challenge.donors_count,
+        supports_count=challenge.supports_count,
     )
 
 
@@ -131,44 +132,32 @@ async def list_challenges(
     status: Optional[str] = Query("active", description="Filter by status"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous page; replaces page"),
 ) -> ChallengeListResponse:
-    """Get list of challenges within radius, with geo-clustering."""
+    """Get list of challenges within radius, nearest first."""
     offset = (page - 1) * page_size
     
-    challenges = await get_challenges_in_radius(
-        session=session,
-        latitude=latitude,
-        longitude=longitude,
-        radius_km=radius_km,
-        category=category,
-        status=status,
-        limit=page_size,
-        offset=offset,
-    )
-    
-    total = await get_challenges_count_in_radius(
-        session=session,
-        latitude=latitude,
-        longitude=longitude,
-        radius_km=radius_km,
-        category=category,
-        status=status,
-    )
+    try:
+        radius_result = await search_challenges_in_radius(
+            session=session,
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km,
+            category=category,
+            status=status,
+            limit=page_size,
+            offset=offset,
+            cursor=cursor,
+            options=(selectinload(CommunityChallenge.creator),),
+        )
+    except ValueError as exc:
+        # `status` is shadowed by the query parameter here
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    challenges = radius_result.challenges
+    total = radius_result.total
     
-    # Load relationships and compute counts
     challenge_responses = []
-    for challenge in challenges:
-        # Get participation counts
-        participation_stmt = select(ChallengeParticipation).where(
-            ChallengeParticipation.challenge_id == challenge.id
-        )
-        participation_result = await session.execute(participation_stmt)
-        participations = participation_result.scalars().all()
-        
-        participants_count = len(participations)
-        volunteers_count = sum(1 for p in participations if p.role == ParticipationRole.VOLUNTEER)
-        donors_count = sum(1 for p in participations if p.role == ParticipationRole.DONOR)
-        
+    for challenge, distance_km in zip(challenges, radius_result.distances_km):
         challenge_responses.append(
             ChallengeResponse(
                 id=challenge.id,
@@ -191,9 +180,11 @@ async def list_challenges(
                 updated_at=challenge.updated_at,
                 expires_at=challenge.expires_at,
                 creator_name=challenge.creator.full_name if challenge.creator else None,
-                participants_count=participants_count,
-                volunteers_count=volunteers_count,
-                donors_count=donors_count,
+                participants_count=challenge.participants_count,
+                volunteers_count=challenge.volunteers_count,
+                donors_count=challenge.donors_count,
+                supports_count=challenge.supports_count,
+                distance_km=round(distance_km, 3),
             )
         )
     
@@ -203,6 +194,7 @@ async def list_challenges(
         page=page,
         page_size=page_size,
         total_pages=(total + page_size - 1) // page_size if total > 0 else 0,
+        next_cursor=radius_result.next_cursor,
     )
 
 
@@ -227,17 +219,6 @@ async def get_challenge(
             detail="Challenge not found",
         )
     
-    # Get participation counts
-    participation_stmt = select(ChallengeParticipation).where(
-        ChallengeParticipation.challenge_id == challenge.id
-    )
-    participation_result = await session.execute(participation_stmt)
-    participations = participation_result.scalars().all()
-    
-    participants_count = len(participations)
-    volunteers_count = sum(1 for p in participations if p.role == ParticipationRole.VOLUNTEER)
-    donors_count = sum(1 for p in participations if p.role == ParticipationRole.DONOR)
-    
     return ChallengeResponse(
         id=challenge.id,
         creator_id=challenge.creator_id,
@@ -259,9 +240,10 @@ async def get_challenge(
         updated_at=challenge.updated_at,
         expires_at=challenge.expires_at,
         creator_name=challenge.creator.full_name if challenge.creator else None,
-        participants_count=participants_count,
-        volunteers_count=volunteers_count,
-        donors_count=donors_count,
+        participants_count=challenge.participants_count,
+        volunteers_count=challenge.volunteers_count,
+        donors_count=challenge.donors_count,
+        supports_count=challenge.supports_count,
     )
 
 
@@ -309,6 +291,7 @@ async def join_challenge(
     )
     
     session.add(participation)
+    await increment_participation_counters(session, challenge_id, body.role)
     await session.commit()
     await session.refresh(participation)
     
@@ -420,21 +403,20 @@ async def provide_support(
     )
     
     session.add(support)
+    await increment_support_counters(session, challenge_id, body.is_high_priority)
+    # Notify participants about stakeholder support (worker job)
+    await enqueue_job(
+        session,
+        NOTIFY_STAKEHOLDER_SUPPORT,
+        {
+            "challenge_id": str(challenge_id),
+            "stakeholder_name": user.full_name,
+            "support_type": body.support_type.value,
+        },
+        queue=NOTIFICATIONS_QUEUE,
+    )
     await session.commit()
     await session.refresh(support)
-    await session.refresh(challenge)
-    
-    # Notify participants about stakeholder support
-    try:
-        await notify_stakeholder_support(
-            session,
-            challenge,
-            user.full_name,
-            body.support_type.value,
-        )
-    except Exception as e:
-        import logging
-        logging.warning(f"Failed to send stakeholder support notifications: {e}")
     
     return StakeholderSupportResponse(
         id=support.id,
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.analytics import (
@@ -11,35 +11,49 @@ from app.schemas.analytics import (
     CountyBreakdown,
     DashboardResponse,
     HeatmapPoint,
+    HeatmapTile,
+    HeatmapTilesResponse,
     KPIMetrics,
     TimeSeriesResponse,
 )
+from app.database import SessionFactory
 from app.services.analytics import (
     compute_category_insights,
     compute_category_trends,
     compute_county_breakdown,
     compute_geographic_heatmap,
+    compute_heatmap_tiles,
     compute_kpis,
     compute_time_series,
+    heatmap_tiles,
+    run_concurrently,
 )
+from app.services.analytics_cache import cached_analytics, cached_analytics_many
 
-from .deps import get_current_user, get_db_session
+from .deps import get_current_principal, get_db_session, get_session_factory
 
 router = APIRouter(prefix="/dashboards", tags=["dashboards"])
 
+# Viewports needing more tiles than this should be requested at a lower zoom
+MAX_HEATMAP_TILES = 64
+
 
 @router.get("/analytics", response_model=DashboardResponse)
 async def get_analytics_dashboard(
-    session: AsyncSession = Depends(get_db_session),
-    user=Depends(get_current_user),
+    sessions: SessionFactory = Depends(get_session_factory),
+    user=Depends(get_current_principal),
 ) -> DashboardResponse:
     """Get analytics dashboard data (NGO/Gov/Admin only)."""
     if user.role not in {"ngo", "government", "admin", "superadmin"}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
 
-    kpi_data = await compute_kpis(session)
-    county_data = await compute_county_breakdown(session)
-    trend_data = await compute_category_trends(session)
+    # Independent queries run concurrently on separate pooled sessions
+    kpi_data, county_data, trend_data = await run_concurrently(
+        sessions,
+        lambda session: cached_analytics("kpis", lambda: compute_kpis(session)),
+        lambda session: cached_analytics("county_breakdown", lambda: compute_county_breakdown(session)),
+        lambda session: cached_analytics("category_trends", lambda: compute_category_trends(session)),
+    )
 
     return DashboardResponse(
         kpis=KPIMetrics(**kpi_data),
@@ -52,34 +66,77 @@ async def get_analytics_dashboard(
 @router.get("/heatmap", response_model=list[HeatmapPoint])
 async def get_geographic_heatmap(
     session: AsyncSession = Depends(get_db_session),
-    user=Depends(get_current_user),
+    user=Depends(get_current_principal),
     days: int = 30,
 ) -> list[HeatmapPoint]:
     """Get geographic heatmap data for reports."""
     if user.role not in {"ngo", "government", "admin", "superadmin"}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
     
-    heatmap_data = await compute_geographic_heatmap(session, days=days)
+    heatmap_data = await cached_analytics(
+        "heatmap", lambda: compute_geographic_heatmap(session, days=days), days=days
+    )
     return [HeatmapPoint(**point) for point in heatmap_data]
 
 
+@router.get("/heatmap/tiles", response_model=HeatmapTilesResponse)
+async def get_heatmap_tiles(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22),
+    days: int = Query(30, ge=1, le=3650),
+    session: AsyncSession = Depends(get_db_session),
+    user=Depends(get_current_principal),
+) -> HeatmapTilesResponse:
+    """Heatmap cells for a map viewport, aggregated server-side to suit ``zoom``.
+
+    The viewport is split into geohash tiles that are cached independently,
+    so panning only computes the newly visible tiles, in a single query.
+    """
+    if user.role not in {"ngo", "government", "admin", "superadmin"}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
+
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid bounding box")
+    precision, tiles = heatmap_tiles((min_lat, min_lon, max_lat, max_lon), zoom, max_tiles=MAX_HEATMAP_TILES)
+    if tiles is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bounding box too large for this zoom level",
+        )
+
+    # Cached per tile; the uncached ones are computed together in one query
+    tile_data = await cached_analytics_many(
+        "heatmap_tile",
+        lambda missing: compute_heatmap_tiles(session, missing, precision, days=days),
+        "tile",
+        tiles,
+        precision=precision,
+        days=days,
+    )
+    results = [HeatmapTile(**tile_data[tile]) for tile in tiles if tile_data[tile]["cells"]]
+    return HeatmapTilesResponse(zoom=zoom, precision=precision, days=days, tiles=results)
+
+
 @router.get("/category-insights", response_model=CategoryInsightsResponse)
 async def get_category_insights(
     session: AsyncSession = Depends(get_db_session),
-    user=Depends(get_current_user),
+    user=Depends(get_current_principal),
 ) -> CategoryInsightsResponse:
     """Get detailed insights by category."""
     if user.role not in {"ngo", "government", "admin", "superadmin"}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
     
-    insights = await compute_category_insights(session)
+    insights = await cached_analytics("category_insights", lambda: compute_category_insights(session))
     return CategoryInsightsResponse(**insights)
 
 
 @router.get("/time-series", response_model=TimeSeriesResponse)
 async def get_time_series(
     session: AsyncSession = Depends(get_db_session),
-    user=Depends(get_current_user),
+    user=Depends(get_current_principal),
     days: int = 30,
     group_by: str = "day",
 ) -> TimeSeriesResponse:
@@ -93,5 +150,10 @@ async def get_time_series(
             detail="group_by must be 'day', 'week', or 'month'",
         )
     
-    time_series_data = await compute_time_series(session, days=days, group_by=group_by)
+    time_series_data = await cached_analytics(
+        "time_series",
+        lambda: compute_time_series(session, days=days, group_by=group_by),
+        days=days,
+        group_by=group_by,
+    )
     return TimeSeriesResponse(data=time_series_data, group_by=group_by)
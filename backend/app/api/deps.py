@@ -5,12 +5,15 @@ from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
+from jose import JWTError
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from ..config import Settings, get_settings
-from ..database import get_session
+from ..database import SessionFactory, SessionLocal, get_session
 from ..models.core import User
+from ..services.auth_cache import Principal, get_auth_cache
 
 security_scheme = HTTPBearer(auto_error=False)
 
@@ -24,23 +27,57 @@ async def get_db_session() -> AsyncSession:
         yield session
 
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security_scheme)],
-    settings: Annotated[Settings, Depends(get_settings_dep)],
-    db: Annotated[AsyncSession, Depends(get_db_session)],
-) -> User:
+def get_session_factory() -> SessionFactory:
+    """Session factory for endpoints that run independent queries concurrently."""
+    return SessionLocal
+
+
+def _token_user_id(credentials: HTTPAuthorizationCredentials | None) -> UUID:
     if not credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token")
     try:
-        payload = jwt.decode(credentials.credentials, settings.secret_key, algorithms=["HS256"])
-        user_id = payload.get("sub")
-    except JWTError as exc:
+        payload = get_auth_cache().decode_token(credentials.credentials)
+        return UUID(payload.get("sub"))
+    except (JWTError, TypeError, ValueError) as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
 
-    from sqlalchemy import select
 
-    result = await db.execute(select(User).where(User.id == UUID(user_id)))
+async def _load_user(db: AsyncSession, user_id: UUID) -> User:
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    await get_auth_cache().set_user(user)
     return user
+
+
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db_session)],
+) -> User:
+    """The caller's user row, attached to the request session.
+
+    A cached snapshot is attached without a SELECT; changes to it are flushed
+    as usual. The password hash is never cached, so endpoints needing it
+    must query the user themselves.
+    """
+    user_id = _token_user_id(credentials)
+    snapshot = await get_auth_cache().get_user(user_id)
+    if snapshot is None:
+        return await _load_user(db, user_id)
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+async def get_current_principal(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db_session)],
+) -> Principal:
+    """The caller's id and role; no database round trip while the user is cached."""
+    user_id = _token_user_id(credentials)
+    snapshot = await get_auth_cache().get_user(user_id)
+    if snapshot is None:
+        user = await _load_user(db, user_id)
+        return Principal(id=user.id, role=user.role)
+    return Principal(id=snapshot["id"], role=snapshot["role"])
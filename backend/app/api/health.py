@@ -8,7 +8,8 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import Settings, get_settings
-from ..database import get_session
+from ..database import engine, get_session
+from ..services.db_pool import pool_status
 
 router = APIRouter(tags=["health"])
 
@@ -39,6 +40,7 @@ async def health_db(
             "status": "healthy",
             "database": "connected",
             "version": db_version.split(",")[0] if db_version else "unknown",
+            "pool": pool_status(engine.pool),
         }
     except Exception as e:
         raise HTTPException(
@@ -47,6 +49,12 @@ async def health_db(
         ) from e
 
 
+@router.get("/health/db/pool")
+async def health_db_pool() -> Dict[str, Any]:
+    """Connection pool usage and checkout waits, without touching the database."""
+    return pool_status(engine.pool)
+
+
 @router.get("/health/redis")
 async def health_redis(settings: Settings = Depends(get_settings)) -> Dict[str, Any]:
     """Redis health check."""
@@ -0,0 +1,33 @@
+"""Prometheus scrape endpoint.
+
+Route and statement labels describe the API's internals, so /metrics is for
+the monitoring network only: block it at the public ingress, and set
+``METRICS_TOKEN`` to require ``Authorization: Bearer <token>`` as well.
+"""
+from __future__ import annotations
+
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+
+from ..config import Settings, get_settings
+from ..services.metrics import get_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(
+    settings: Settings = Depends(get_settings),
+    authorization: str | None = Header(default=None),
+) -> Response:
+    """Metrics in the Prometheus text format (see services/metrics.py)."""
+    if settings.metrics_token and not hmac.compare_digest(
+        (authorization or "").encode(), f"Bearer {settings.metrics_token}".encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    registry = get_metrics()
+    if registry is None:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="prometheus-client is not installed")
+    body, content_type = registry.render()
+    return Response(content=body, media_type=content_type)
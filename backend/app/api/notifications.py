@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.core import Report
 from ..models.notifications import Notification
 from ..schemas.attestation import NotificationResponse
-from .deps import get_current_user, get_db_session
+from .deps import get_current_principal, get_db_session
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/notifications", tags=["notifications"])
 @router.get("", response_model=list[NotificationResponse])
 async def get_notifications(
     session: AsyncSession = Depends(get_db_session),
-    user=Depends(get_current_user),
+    user=Depends(get_current_principal),
     unread_only: bool = Query(default=False, description="Only return unread notifications"),
     limit: int = Query(default=50, ge=1, le=100),
 ) -> list[NotificationResponse]:
@@ -118,7 +118,7 @@ async def get_notifications(
 async def mark_notification_read(
     notification_id: str,
     session: AsyncSession = Depends(get_db_session),
-    user=Depends(get_current_user),
+    user=Depends(get_current_principal),
 ) -> dict[str, str]:
     """Mark a notification as read."""
     from uuid import UUID
@@ -144,7 +144,7 @@ async def mark_notification_read(
 @router.get("/unread/count")
 async def get_unread_count(
     session: AsyncSession = Depends(get_db_session),
-    user=Depends(get_current_user),
+    user=Depends(get_current_principal),
 ) -> dict[str, int]:
     """Get count of unread notifications."""
     from sqlalchemy import func
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -11,6 +12,9 @@ from ..models.core import Comment, Location, Report, ReportMedia, Verification
 from ..schemas.common import Location as LocationSchema
 from ..schemas.common import MediaRef, ReportSummary
 from ..schemas.report import (
+    BulkReportCreateRequest,
+    BulkReportCreateResponse,
+    BulkReportResult,
     CommentRequest,
     ReportCreateRequest,
     ReportResponse,
@@ -20,8 +24,23 @@ from ..schemas.report import (
     ReportStatusUpdateRequest,
 )
 from ..schemas.sync import SyncRequest, SyncResponse
+from ..services import geohash
+from ..services.analytics_cache import invalidate_analytics
 from ..services.verification import compute_outcome
 from ..services.report_id import generate_report_id
+from ..services.report_ingest import bulk_create_reports
+from ..services.report_rollups import record_report_changes, report_facts
+from ..services.search import get_report_search
+from ..services.job_tasks import NOTIFICATIONS_QUEUE, NOTIFY_COMMUNITY
+from ..services.jobs import enqueue_job
+from ..services.pagination import (
+    CountCache,
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+    keyset_condition,
+    parse_cursor_value,
+)
 from .deps import get_current_user, get_db_session
 
 router = APIRouter(prefix="/reports", tags=["reports"])
@@ -48,6 +67,17 @@ ALLOWED_STATUSES = {
     "resolved",
 }
 
+# Sortable columns for /search with the Python type of their cursor value
+SEARCH_SORT_COLUMNS = {
+    "created_at": (Report.created_at, datetime),
+    "severity": (Report.severity, str),
+    "priority_score": (Report.priority_score, float),
+    "updated_at": (Report.updated_at, datetime),
+}
+
+# Exact totals are reused across pages of the same search for a few seconds
+_search_count_cache = CountCache(ttl_seconds=30.0)
+
 
 def _validate_value(value: str | None, allowed: set[str], field: str) -> None:
     if value is None:
@@ -84,6 +114,24 @@ def _to_media_schema(media: list[ReportMedia]) -> list[MediaRef]:
     ]
 
 
+async def _enqueue_community_notifications(session: AsyncSession, report_ids: list[UUID]) -> None:
+    """Queue community attestation requests; the job commits with the reports."""
+    await enqueue_job(
+        session,
+        NOTIFY_COMMUNITY,
+        {"report_ids": [str(report_id) for report_id in report_ids], "radius_km": 10.0},
+        queue=NOTIFICATIONS_QUEUE,
+    )
+
+
+def _remember_user_location(user, location: LocationSchema) -> None:
+    """Store the reporter's last known location for nearby-notification targeting."""
+    user.county = location.county
+    user.latitude = location.latitude
+    user.longitude = location.longitude
+    user.geohash = geohash.encode(location.latitude, location.longitude)
+
+
 @router.post("/create", response_model=ReportResponse, status_code=status.HTTP_201_CREATED)
 async def create_report(
     body: ReportCreateRequest,
@@ -99,8 +147,11 @@ async def create_report(
         county=body.location.county,
         district=body.location.district,
         description=body.location.description,
+        geohash=geohash.encode(body.location.latitude, body.location.longitude),
     )
     session.add(location)
+    if not body.anonymous:
+        _remember_user_location(user, body.location)
     await session.flush()
 
     # Generate unique report ID
@@ -119,6 +170,7 @@ async def create_report(
     )
     session.add(report)
     await session.flush()
+    await record_report_changes(session, [(None, report_facts(report, county=body.location.county or ""))])
 
     for media in body.media:
         session.add(
@@ -140,26 +192,12 @@ async def create_report(
         # Don't fail if priority calculation fails
         pass
     
+    # Notify community members for attestation (worker job, committed with the report)
+    await _enqueue_community_notifications(session, [report.id])
     await session.commit()
+    await invalidate_analytics()
     await session.refresh(report, attribute_names=["media", "location"])
-
-    # Notify community members for attestation (in background, don't block response)
-    # Note: In production, use a proper background task queue (Celery, RQ, etc.)
-    try:
-        from ..services.community_notifications import notify_community_for_attestation
-        # Create a new session for background task to avoid session conflicts
-        from ..database import SessionLocal
-        async def _notify_background():
-            async with SessionLocal() as bg_session:
-                await notify_community_for_attestation(bg_session, report, location, radius_km=10.0)
-        
-        # Schedule background notification (simplified - in production use proper task queue)
-        import asyncio
-        asyncio.create_task(_notify_background())
-    except Exception as e:
-        # Don't fail report creation if notification fails
-        import logging
-        logging.error(f"Failed to send community notifications: {e}")
+    get_report_search().index_report(report)
 
     return ReportResponse(
         id=report.id,
@@ -179,6 +217,44 @@ async def create_report(
     )
 
 
+@router.post("/bulk", response_model=BulkReportCreateResponse, status_code=status.HTTP_201_CREATED)
+async def bulk_create_reports_endpoint(
+    body: BulkReportCreateRequest,
+    session: AsyncSession = Depends(get_db_session),
+    user=Depends(get_current_user),
+) -> BulkReportCreateResponse:
+    """Create up to 500 queued reports (offline sync, SMS gateways) in one transaction."""
+    for index, item in enumerate(body.reports):
+        try:
+            _validate_value(item.category, ALLOWED_CATEGORIES, "category")
+            _validate_value(item.severity, ALLOWED_SEVERITIES, "severity")
+        except HTTPException as exc:
+            raise HTTPException(status_code=exc.status_code, detail=f"reports[{index}]: {exc.detail}") from exc
+
+    ingested = await bulk_create_reports(session, body.reports, user_id=user.id)
+    located = [item for item in body.reports if not item.anonymous]
+    if located:
+        _remember_user_location(user, located[-1].location)
+    # Notify community members for attestation (worker job, committed with the reports)
+    await _enqueue_community_notifications(session, [row.id for row in ingested])
+    await session.commit()
+    await invalidate_analytics()
+
+    return BulkReportCreateResponse(
+        created=[
+            BulkReportResult(
+                id=row.id,
+                report_id=row.report_id,
+                status=row.status,
+                created_at=row.created_at,
+                priority_score=row.priority_score,
+            )
+            for row in ingested
+        ],
+        count=len(ingested),
+    )
+
+
 @router.get("/search", response_model=SearchResponse)
 async def search_reports(
     session: AsyncSession = Depends(get_db_session),
@@ -191,132 +267,164 @@ async def search_reports(
     min_priority: float | None = Query(default=None, ge=0.0, le=1.0),
     date_from: str | None = Query(default=None, description="ISO date string"),
     date_to: str | None = Query(default=None, description="ISO date string"),
-    sort_by: str = Query(default="created_at", description="Sort field: created_at, severity, priority_score"),
+    fuzzy: bool = Query(default=False, description="Also match near-miss spellings of text"),
+    sort_by: str = Query(
+        default="created_at",
+        description="Sort field: created_at, severity, priority_score, updated_at, or relevance (requires text)",
+    ),
     sort_order: str = Query(default="desc", description="Sort order: asc or desc"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None, description="Opaque cursor from a previous next_cursor; replaces page"),
+    total_mode: str = Query(default="exact", description="Total count: exact (cached briefly), estimate, or none"),
     user=Depends(get_current_user),
 ) -> SearchResponse:
     _validate_value(category, ALLOWED_CATEGORIES, "category")
     _validate_value(severity, ALLOWED_SEVERITIES, "severity")
     _validate_value(status_filter, ALLOWED_STATUSES, "status")
     
-    if sort_by not in {"created_at", "severity", "priority_score", "updated_at"}:
+    if sort_by not in SEARCH_SORT_COLUMNS and sort_by != "relevance":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid sort_by: '{sort_by}'. Allowed: created_at, severity, priority_score, updated_at",
+            detail=f"Invalid sort_by: '{sort_by}'. Allowed: created_at, severity, priority_score, updated_at, relevance",
+        )
+    if sort_by == "relevance" and not text:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sort_by=relevance requires a text query",
+        )
+    if sort_by == "relevance" and cursor:
+        # Ranks are computed per query, so relevance results page by offset only
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor paging is not available with sort_by=relevance; use page",
         )
     if sort_order not in {"asc", "desc"}:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid sort_order: '{sort_order}'. Allowed: asc, desc",
         )
+    if total_mode not in {"exact", "estimate", "none"}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid total_mode: '{total_mode}'. Allowed: exact, estimate, none",
+        )
 
-    stmt = select(Report).options(selectinload(Report.location))
+    # Filters are built once and shared by the page query and the count query
+    conditions = []
     if county:
-        stmt = stmt.join(Location).where(Location.county == county)
+        conditions.append(Location.county == county)
     if category:
-        stmt = stmt.where(Report.category == category)
+        conditions.append(Report.category == category)
     if severity:
-        stmt = stmt.where(Report.severity == severity)
+        conditions.append(Report.severity == severity)
     if status_filter:
-        stmt = stmt.where(Report.status == status_filter)
+        conditions.append(Report.status == status_filter)
     if assigned_agency:
-        stmt = stmt.where(Report.recommended_agency.ilike(f"%{assigned_agency}%"))
+        conditions.append(Report.recommended_agency.ilike(f"%{assigned_agency}%"))
     if min_priority is not None:
-        stmt = stmt.where(Report.priority_score >= min_priority)
+        conditions.append(Report.priority_score >= min_priority)
+    search = get_report_search()
     if text:
-        # Full-text search across summary and details
-        stmt = stmt.where(
-            (Report.summary.ilike(f"%{text}%")) | (Report.details.ilike(f"%{text}%"))
-        )
+        # Full-text search across summary and details (tsvector/GIN, optional trigram fuzziness)
+        conditions.append(search.condition(text, fuzzy=fuzzy))
     if date_from:
-        from datetime import datetime
         try:
             date_from_dt = datetime.fromisoformat(date_from.replace("Z", "+00:00"))
-            stmt = stmt.where(Report.created_at >= date_from_dt)
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid date_from format. Use ISO 8601 format.",
             )
+        conditions.append(Report.created_at >= date_from_dt)
     if date_to:
-        from datetime import datetime
         try:
             date_to_dt = datetime.fromisoformat(date_to.replace("Z", "+00:00"))
-            stmt = stmt.where(Report.created_at <= date_to_dt)
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid date_to format. Use ISO 8601 format.",
             )
+        conditions.append(Report.created_at <= date_to_dt)
 
-    # Get total count (before pagination) - reuse same filters
-    try:
-        count_stmt = select(func.count(Report.id))
-        # Apply same filters as main query
+    if sort_by == "relevance":
+        sort_column, sort_type = search.rank(text, fuzzy=fuzzy), float
+    else:
+        sort_column, sort_type = SEARCH_SORT_COLUMNS[sort_by]
+    descending = sort_order == "desc"
+
+    # Cursor mode: seek past the last row of the previous page instead of OFFSET
+    seek_condition = None
+    if cursor:
+        try:
+            payload = decode_cursor(cursor)
+            if payload.get("s") != sort_by or payload.get("o") != sort_order:
+                raise ValueError("Cursor does not match sort_by/sort_order")
+            seek_condition = keyset_condition(
+                sort_column,
+                Report.id,
+                parse_cursor_value(payload.get("v"), sort_type),
+                UUID(payload["id"]),
+                descending,
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid cursor: {exc}",
+            ) from exc
+
+    def _filtered(stmt):
         if county:
-            count_stmt = count_stmt.join(Location).where(Location.county == county)
-        if category:
-            count_stmt = count_stmt.where(Report.category == category)
-        if severity:
-            count_stmt = count_stmt.where(Report.severity == severity)
-        if status_filter:
-            count_stmt = count_stmt.where(Report.status == status_filter)
-        if assigned_agency:
-            count_stmt = count_stmt.where(Report.recommended_agency.ilike(f"%{assigned_agency}%"))
-        if min_priority is not None:
-            count_stmt = count_stmt.where(Report.priority_score >= min_priority)
-        if text:
-            count_stmt = count_stmt.where(
-                (Report.summary.ilike(f"%{text}%")) | (Report.details.ilike(f"%{text}%"))
+            stmt = stmt.join(Location)
+        return stmt.where(*conditions) if conditions else stmt
+
+    if text:
+        await search.prepare(session, fuzzy=fuzzy)
+
+    total: int | None = None
+    total_is_estimate = False
+    try:
+        count_stmt = _filtered(select(func.count(Report.id)))
+        if total_mode == "exact":
+            cache_key = (
+                county, category, severity, status_filter, assigned_agency,
+                min_priority, text, fuzzy, date_from, date_to,
             )
-        if date_from:
-            from datetime import datetime
-            try:
-                date_from_dt = datetime.fromisoformat(date_from.replace("Z", "+00:00"))
-                count_stmt = count_stmt.where(Report.created_at >= date_from_dt)
-            except ValueError:
-                pass  # Skip invalid date
-        if date_to:
-            from datetime import datetime
-            try:
-                date_to_dt = datetime.fromisoformat(date_to.replace("Z", "+00:00"))
-                count_stmt = count_stmt.where(Report.created_at <= date_to_dt)
-            except ValueError:
-                pass  # Skip invalid date
-        
-        total_result = await session.execute(count_stmt)
-        total = total_result.scalar() or 0
+            total = _search_count_cache.get(cache_key)
+            if total is None:
+                total_result = await session.execute(count_stmt)
+                total = total_result.scalar() or 0
+                _search_count_cache.set(cache_key, total)
+        elif total_mode == "estimate":
+            total = await estimate_count(session, _filtered(select(Report.id)))
+            total_is_estimate = total is not None
     except Exception as e:
         import logging
         logging.error(f"Error counting reports: {e}", exc_info=True)
-        total = 0
-
-    # Apply sorting
-    sort_column = {
-        "created_at": Report.created_at,
-        "severity": Report.severity,
-        "priority_score": Report.priority_score,
-        "updated_at": Report.updated_at,
-    }.get(sort_by, Report.created_at)
-    
-    if sort_order == "desc":
-        order_by = sort_column.desc()
+        total = 0 if total_mode == "exact" else None
+
+    # Apply sorting (id breaks ties so every row has a unique position)
+    if descending:
+        order_by = (sort_column.desc().nulls_last(), Report.id.desc())
     else:
-        order_by = sort_column.asc()
+        order_by = (sort_column.asc().nulls_last(), Report.id.asc())
 
     # Apply pagination
-    offset = (page - 1) * page_size
+    stmt = _filtered(select(Report).options(selectinload(Report.location)))
+    if seek_condition is not None:
+        stmt = stmt.where(seek_condition)
+    else:
+        stmt = stmt.offset((page - 1) * page_size)
     try:
         # Ensure we have a valid query before executing
         if not stmt.is_select:
             raise ValueError("Invalid query statement")
         
-        result = await session.execute(
-            stmt.order_by(order_by).limit(page_size).offset(offset)
-        )
+        # One extra row tells us whether another page exists
+        result = await session.execute(stmt.order_by(*order_by).limit(page_size + 1))
         reports = result.scalars().unique().all()
+        has_more = len(reports) > page_size
+        reports = reports[:page_size]
         
         summaries = []
         for r in reports:
@@ -336,12 +444,27 @@ async def search_reports(
                 logging.warning(f"Error processing report {r.id}: {e}")
                 continue  # Skip problematic reports
         
+        next_cursor = None
+        if has_more and reports and sort_by != "relevance":
+            last = reports[-1]
+            last_value = getattr(last, sort_by)
+            next_cursor = encode_cursor(
+                {
+                    "s": sort_by,
+                    "o": sort_order,
+                    "v": last_value.isoformat() if isinstance(last_value, datetime) else last_value,
+                    "id": str(last.id),
+                }
+            )
+        
         return SearchResponse(
             results=summaries,
-            total=total,
+            total=total if total is not None else 0,
             page=page,
             page_size=page_size,
-            total_pages=(total + page_size - 1) // page_size if total > 0 else 0,
+            total_pages=(total + page_size - 1) // page_size if total else 0,
+            next_cursor=next_cursor,
+            total_is_estimate=total_is_estimate,
         )
     except Exception as e:
         import logging
@@ -396,10 +519,12 @@ async def verify_report(
     session: AsyncSession = Depends(get_db_session),
     user=Depends(get_current_user),
 ) -> dict[str, str]:
-    report = await session.get(Report, report_id)
+    # Row lock, so the rollup snapshot below can't race a concurrent change to this report
+    report = await session.get(Report, report_id, with_for_update=True)
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
 
+    before = report_facts(report)
     verification = Verification(report_id=report.id, user_id=user.id, action=body.action, notes=body.comment)
     session.add(verification)
 
@@ -421,7 +546,9 @@ async def verify_report(
     except Exception:
         pass
 
+    await record_report_changes(session, [(before, report_facts(report, verified_at=datetime.utcnow()))])
     await session.commit()
+    await invalidate_analytics()
     return {"status": report.status, "verification_score": str(report.ai_severity_score or 0)}
 
 
@@ -433,13 +560,15 @@ async def assign_report(
     user=Depends(get_current_user),
 ) -> dict[str, str | None]:
     """Assign a report to an agency/NGO and optionally set status."""
-    report = await session.get(Report, report_id)
+    # Row lock, so the rollup snapshot below can't race a concurrent change to this report
+    report = await session.get(Report, report_id, with_for_update=True)
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
 
     if user.role not in {"admin", "superadmin", "ngo"}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to assign reports")
 
+    before = report_facts(report)
     if body.status:
         _validate_value(body.status, ALLOWED_STATUSES, "status")
         report.status = body.status
@@ -447,7 +576,9 @@ async def assign_report(
         report.status = "assigned"
 
     report.recommended_agency = body.agency
+    await record_report_changes(session, [(before, report_facts(report, verified_at=datetime.utcnow()))])
     await session.commit()
+    await invalidate_analytics()
     return {
         "report_id": str(report.id),
         "status": report.status,
@@ -464,7 +595,8 @@ async def update_report_status(
     user=Depends(get_current_user),
 ) -> dict[str, str]:
     """Update report status with basic validation."""
-    report = await session.get(Report, report_id)
+    # Row lock, so the rollup snapshot below can't race a concurrent change to this report
+    report = await session.get(Report, report_id, with_for_update=True)
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
 
@@ -472,8 +604,11 @@ async def update_report_status(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update status")
 
     _validate_value(body.status, ALLOWED_STATUSES, "status")
+    before = report_facts(report)
     report.status = body.status
+    await record_report_changes(session, [(before, report_facts(report, verified_at=datetime.utcnow()))])
     await session.commit()
+    await invalidate_analytics()
     return {"report_id": str(report.id), "status": report.status, "note": body.note or ""}
 
 
@@ -525,7 +660,8 @@ async def delete_report(
     user=Depends(get_current_user),
 ) -> None:
     """Delete a report. Users can only delete their own reports."""
-    report = await session.get(Report, report_id)
+    # Row lock, so the rollup snapshot below can't race a concurrent change to this report
+    report = await session.get(Report, report_id, with_for_update=True)
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
 
@@ -536,8 +672,11 @@ async def delete_report(
             detail="You can only delete your own reports",
         )
 
+    await record_report_changes(session, [(report_facts(report), None)])
     await session.delete(report)
     await session.commit()
+    await invalidate_analytics()
+    get_report_search().remove_report(report_id)
 
 
 @router.delete("/", status_code=status.HTTP_200_OK)
@@ -546,15 +685,20 @@ async def delete_all_user_reports(
     user=Depends(get_current_user),
 ) -> dict[str, int]:
     """Delete all reports belonging to the current user."""
-    stmt = select(Report).where(Report.user_id == user.id)
+    stmt = select(Report).where(Report.user_id == user.id).with_for_update()
     result = await session.execute(stmt)
     reports = result.scalars().all()
     count = len(reports)
 
+    await record_report_changes(session, [(report_facts(report), None) for report in reports])
     for report in reports:
         await session.delete(report)
 
     await session.commit()
+    await invalidate_analytics()
+    search = get_report_search()
+    for report in reports:
+        search.remove_report(report.id)
     return {"deleted_count": count, "message": f"Deleted {count} report(s)"}
 
 
@@ -8,6 +8,8 @@ from app.models.core import Location, Report
 from app.schemas.report import ReportCreateRequest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..services.analytics_cache import invalidate_analytics
+from ..services.report_rollups import record_report_changes, report_facts
 from .deps import get_db_session
 from .reports import create_report
 
@@ -60,5 +62,8 @@ async def ingest_sms_report(
         anonymous=True,
     )
     session.add(report)
+    await session.flush()
+    await record_report_changes(session, [(None, report_facts(report, county=county))])
     await session.commit()
+    await invalidate_analytics()
     return {"status": "queued", "report_id": str(report.id), "message": "SMS report ingested"}
@@ -38,6 +38,17 @@ class Settings(BaseSettings):
         
         raise ValueError("Either DATABASE_URL or POSTGRES_DSN must be set")
     
+    # Database pool (database.py): connections kept open, burst headroom, and wait before failing
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 10.0
+    # Reconnect before Neon/Railway drop idle connections (5 minutes); ping on checkout
+    db_pool_recycle_seconds: int = 280
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100  # asyncpg prepared statements kept per connection
+    # Behind PgBouncer in transaction mode: no prepared statement caching, no local pool
+    db_pgbouncer: bool = False
+
     redis_url: str
     s3_endpoint: str | None = None
     s3_access_key: str | None = None
@@ -49,7 +60,14 @@ class Settings(BaseSettings):
     sms_gateway_token: str | None = None
 
     admin_contact_email: str = "security@talkamliberia.org"
-    
+
+    # Report IDs leased per sequence round trip (unused values become gaps on restart)
+    report_id_block_size: int = 10
+
+    # Report text search: "postgres" (tsvector + pg_trgm) or "memory" (in-process index)
+    search_backend: str = "postgres"
+    search_fuzzy_threshold: float = 0.3
+
     # Sentry configuration
     sentry_dsn: str | None = None
     sentry_environment: str = "development"
@@ -59,11 +77,78 @@ class Settings(BaseSettings):
     # Push notification configuration
     fcm_server_key: str | None = None
     fcm_project_id: str | None = None
+    fcm_credentials_path: str | None = None  # Service account JSON for the FCM HTTP v1 API
     apns_key_path: str | None = None
     apns_key_id: str | None = None
     apns_team_id: str | None = None
     apns_bundle_id: str | None = None
     apns_use_sandbox: bool = True
+    # Push gateway (services/push_gateway.py): pooled connections and in-flight sends
+    push_max_connections: int = 20
+    push_concurrency: int = 200
+    push_timeout_seconds: float = 10.0
+    fcm_base_url: str = "https://fcm.googleapis.com"
+    apns_base_url: str | None = None  # Defaults to Apple's production or sandbox host
+
+    # Background push sender: recipients per batch and max wait to fill a batch
+    push_batch_size: int = 500
+    push_flush_interval_seconds: float = 0.25
+
+    # Dashboard analytics cache (services/analytics_cache.py): Redis TTL, in-process LRU tier
+    analytics_cache_redis: bool = True
+    analytics_cache_ttl_seconds: float = 60.0
+    analytics_cache_local_ttl_seconds: float = 5.0
+    analytics_cache_local_max_entries: int = 256
+
+    # Auth fast path (services/auth_cache.py): decoded tokens, user rows in-process and in Redis
+    auth_cache_redis: bool = True
+    auth_token_cache_max_entries: int = 10000
+    auth_user_cache_ttl_seconds: float = 60.0
+    auth_user_cache_local_ttl_seconds: float = 5.0
+
+    # Password hashing pool (services/password_hashing.py): bcrypt threads and max running + queued calls
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+
+    # Rate limiting (services/rate_limiter.py): sliding window per caller and route template
+    # Client addresses come from uvicorn, which trusts X-Forwarded-For only from FORWARDED_ALLOW_IPS
+    rate_limit_enabled: bool = True
+    rate_limit_redis: bool = True
+    rate_limit_window_seconds: int = 60
+    rate_limit_default: int = 100  # Unauthenticated callers (per client address) and unlisted roles
+    rate_limit_role_limits: dict[str, int] = {"ngo": 300, "government": 300, "admin": 600, "superadmin": 600}
+    rate_limit_local_max_keys: int = 10000  # In-process fallback while Redis is unreachable
+
+    # Prometheus metrics at /metrics (services/metrics.py, needs prometheus-client). Keep
+    # /metrics and the worker's metrics port off the public ingress; with a token set,
+    # scrapes must also send "Authorization: Bearer <token>"
+    metrics_enabled: bool = True
+    metrics_token: str | None = None
+    metrics_max_statement_fingerprints: int = 500  # Further statement shapes are reported as "other"
+    # app.worker delivers jobs and pushes, so it serves its own metrics on this port (0 disables).
+    # That server has no auth, so it listens on loopback; set WORKER_METRICS_ADDR=0.0.0.0 only
+    # where the port is reachable from Prometheus alone (e.g. a private container network)
+    worker_metrics_port: int = 9101
+    worker_metrics_addr: str = "127.0.0.1"
+
+    # Per-request statement stats (services/query_stats.py): slow log, N+1 warnings, debug headers
+    db_slow_query_ms: float = 200.0
+    db_n_plus_one_threshold: int = 5  # Identical statement shapes in one request before warning
+    db_query_debug_headers: bool = False  # X-DB-Query-Count and X-DB-Query-Time-Ms on responses
+
+    # Challenge notification fan-out: recipients inserted (and committed) per batch
+    notification_fanout_batch_size: int = 5000
+
+    # Background jobs: "postgres" (jobs table, SKIP LOCKED, run by app.worker) or "memory"
+    # (in-process, run by a worker in the API lifespan; jobs are lost on restart, tests/dev only)
+    job_backend: str = "postgres"
+    job_max_attempts: int = 5
+    job_worker_concurrency: int = 8
+    job_poll_interval_seconds: float = 1.0
+    job_backoff_base_seconds: float = 5.0
+    job_backoff_max_seconds: float = 600.0
+    # Running jobs not finished within this window are assumed orphaned and requeued
+    job_visibility_timeout_seconds: float = 900.0
 
     class Config:
         env_file = ".env"
@@ -1,30 +1,55 @@
 import ssl
+from typing import Any, AsyncContextManager, Callable
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import NullPool
 
-from .config import get_settings
+from .config import Settings, get_settings
+from .services.db_pool import InstrumentedAsyncPool
 
 settings = get_settings()
 
 # Get effective DSN (supports both DATABASE_URL and POSTGRES_DSN)
 postgres_dsn = settings.effective_postgres_dsn
 
-# Configure SSL for Neon/remote databases
-connect_args = {}
-if "neon.tech" in postgres_dsn or "sslmode=require" in postgres_dsn or "ssl=require" in postgres_dsn or "railway.app" in postgres_dsn:
-    # Create SSL context for secure connections
-    ssl_context = ssl.create_default_context()
-    connect_args["ssl"] = ssl_context
-
-# Create engine with SSL support if needed
-engine = create_async_engine(
-    postgres_dsn,
-    echo=False,
-    future=True,
-    connect_args=connect_args if connect_args else {},
-)
+
+def engine_options(settings: Settings, dsn: str) -> dict[str, Any]:
+    """Pool and driver keyword arguments for ``create_async_engine``."""
+    connect_args: dict[str, Any] = {}
+    # Configure SSL for Neon/remote databases
+    if "neon.tech" in dsn or "sslmode=require" in dsn or "ssl=require" in dsn or "railway.app" in dsn:
+        connect_args["ssl"] = ssl.create_default_context()
+
+    if settings.db_pgbouncer:
+        # Transaction pooling hands each transaction a different server connection, so
+        # prepared statements must not be cached or reused by name. PgBouncer pools.
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+        return {"poolclass": NullPool, "connect_args": connect_args}
+
+    connect_args["statement_cache_size"] = settings.db_statement_cache_size
+    return {
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
+engine = create_async_engine(postgres_dsn, echo=False, **engine_options(settings, postgres_dsn))
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+# Opens a new session; SessionLocal in production, a fake in tests
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
 
 class Base(DeclarativeBase):
     pass
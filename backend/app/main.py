@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request, status
@@ -5,10 +6,13 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from .api import admin, alerts, attestations, auth, challenges, dashboards, device_tokens, health, media, ngos, notifications, reports, sms
+from .api import admin, alerts, attestations, auth, challenges, dashboards, device_tokens, health, media, metrics, ngos, notifications, reports, sms
 from .config import get_settings
-from .middleware import RateLimitMiddleware, SecurityHeadersMiddleware
+from .database import engine
+from .middleware import MetricsMiddleware, QueryStatsMiddleware, RateLimitMiddleware, SecurityHeadersMiddleware
 from .sentry_config import init_sentry
+from .services import query_stats
+from .services.metrics import get_metrics
 
 settings = get_settings()
 
@@ -25,14 +29,29 @@ if settings.enable_sentry and settings.sentry_dsn:
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
-    # Rate limiting middleware will initialize on first request
-    # No startup needed here
+    from .services.push_dispatcher import get_push_dispatcher
+    push_dispatcher = get_push_dispatcher()
+    push_dispatcher.start()
+    # The in-memory job queue lives in this process, so nothing else can drain it
+    job_worker_stop = asyncio.Event()
+    job_worker_task = None
+    if settings.job_backend == "memory":
+        from .worker import build_worker
+        job_worker_task = asyncio.create_task(build_worker().run(job_worker_stop))
     
     yield
     
     # Shutdown
-    # Cleanup if needed
-    pass
+    # Finish running jobs first; they may queue pushes
+    if job_worker_task is not None:
+        job_worker_stop.set()
+        await job_worker_task
+    # Send queued pushes before exiting
+    await push_dispatcher.stop(drain=True)
+    from .services.push_gateway import get_push_gateway
+    await get_push_gateway().aclose()
+    from .services.password_hashing import get_password_hasher
+    get_password_hasher().shutdown()
 
 
 app = FastAPI(
@@ -51,6 +70,7 @@ async def http_exception_handler(_: Request, exc: HTTPException) -> JSONResponse
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": {"code": exc.status_code, "message": exc.detail}},
+        headers=exc.headers,
     )
 
 
@@ -67,6 +87,11 @@ async def validation_exception_handler(_: Request, exc: RequestValidationError)
         },
 )
 
+# Rate limiting middleware (Redis-backed, per-process fallback while Redis is down);
+# added before CORS and security headers so they wrap it and 429s carry their headers
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 # In production, replace with specific domains:
 # allow_origins=["https://admin.talkamliberia.org", "https://app.talkamliberia.org"]
@@ -89,14 +114,23 @@ app.add_middleware(
 # Security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
 
-# Rate limiting middleware (optional, requires Redis)
-if settings.redis_url:
-    app.add_middleware(
-        RateLimitMiddleware,
-        redis_url=settings.redis_url,
-        default_limit=100,  # requests per window
-        window=60,  # seconds
-    )
+# Prometheus metrics (optional, requires prometheus-client)
+app_metrics = get_metrics() if settings.metrics_enabled else None
+
+# Statement counts per request: slow statement log, N+1 warnings, optional debug headers.
+# The same cursor listeners time statements for the metrics.
+query_stats.instrument_engine(engine, metrics=app_metrics)
+app.add_middleware(
+    QueryStatsMiddleware,
+    n_plus_one_threshold=settings.db_n_plus_one_threshold,
+    debug_headers=settings.db_query_debug_headers,
+)
+
+# Metrics middleware is outermost so 429s are counted too
+if app_metrics is not None:
+    app_metrics.track_engine(engine)
+    app.add_middleware(MetricsMiddleware, metrics=app_metrics)
+    app.include_router(metrics.router)
 
 # Health check routes (no prefix)
 app.include_router(health.router)
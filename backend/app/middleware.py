@@ -1,132 +1,234 @@
 """Middleware for rate limiting, CORS, and security headers."""
 from __future__ import annotations
 
+import math
 import time
-from typing import Callable
+from typing import Pattern
 
-from fastapi import Request, Response, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+from jose import JWTError
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
 from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .services.auth_cache import get_auth_cache
+from .services.metrics import Metrics, get_metrics
+from .services.query_stats import report_request, track_queries
+from .services.rate_limiter import RateLimiter, get_rate_limiter
+
+# Never rate limited
+EXEMPT_PATHS = {"/", "/health", "/health/db", "/health/db/pool", "/health/redis", "/metrics"}
+
+
+def route_templates(app) -> list[tuple[Pattern[str], set[str] | None, str]]:
+    """(path regex, methods, path template) for every route of ``app``, prefixes included."""
+    try:
+        from fastapi.routing import iter_route_contexts  # FastAPI releases that include routers lazily
+        routes = iter_route_contexts(app.routes)
+    except ImportError:
+        routes = app.routes
+    index = []
+    for route in routes:
+        if getattr(route, "path", None) is None:
+            continue
+        regex, _, _ = compile_path(route.path)
+        index.append((regex, getattr(route, "methods", None), route.path))
+    return index
+
+
+def route_template(index: list[tuple[Pattern[str], set[str] | None, str]], method: str, path: str) -> str:
+    """The template of the route a request will hit, e.g. ``/v1/reports/{report_id}``.
+
+    Routing runs after middleware, so this matches the path itself. Unknown
+    paths share a single bucket.
+    """
+    partial = None
+    for regex, methods, template in index:
+        if regex.match(path):
+            if methods is None or method in methods:
+                return template
+            partial = partial or template
+    return partial or "<unmatched>"
+
+
+class RouteTemplates:
+    """Route template lookup for middleware, indexed on the first request.
+
+    The outermost middleware to ask resolves the template and stores it in
+    ``scope["route_template"]``; middleware further in reads it from there.
+    """
+
+    def __init__(self) -> None:
+        self._index: list[tuple[Pattern[str], set[str] | None, str]] | None = None
+
+    def __call__(self, scope: Scope) -> str:
+        template = scope.get("route_template")
+        if template is None:
+            if self._index is None:  # Routes are complete by the first request
+                self._index = route_templates(scope["app"])
+            template = scope["route_template"] = route_template(self._index, scope["method"], scope["path"])
+        return template
+
+
+def caller_identity(request: HTTPConnection) -> tuple[str, list[str]]:
+    """Rate limit identity and roles: the JWT subject when the token is valid, else the client address.
+
+    The client address is the ASGI peer. Behind a load balancer, uvicorn
+    rewrites it from ``X-Forwarded-For`` only for proxies listed in
+    ``--forwarded-allow-ips`` (or ``FORWARDED_ALLOW_IPS``); the header itself is
+    never read here, since any client can send one.
+    """
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        try:
+            claims = get_auth_cache().decode_token(auth_header[len("Bearer "):])
+        except JWTError:
+            claims = {}
+        if claims.get("sub"):
+            return f"user:{claims['sub']}", list(claims.get("roles") or [])
+
+    return f"ip:{request.client.host if request.client else 'unknown'}", []
+
+
+class RateLimitMiddleware:
+    """Per-caller, per-route sliding-window rate limiting (see services/rate_limiter.py).
+
+    Pure ASGI: the limit is checked before the app runs, and the headers are
+    added to the ``http.response.start`` message, so streaming responses pass
+    through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter | None = None) -> None:
+        self.app = app
+        self._limiter = limiter
+        self.route_template = RouteTemplates()
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter or get_rate_limiter()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # CORS preflights are answered by CORSMiddleware and never count against the caller
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        identity, roles = caller_identity(HTTPConnection(scope))
+        route = self.route_template(scope)
+        result = await self.limiter.hit(identity, route, roles)
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+            "X-RateLimit-Reset": str(int(time.time() + result.reset_after)),
+        }
+        if not result.allowed:
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={
+                    "error": "Rate limit exceeded",
+                    "message": f"Too many requests. Limit: {result.limit} per {self.limiter.window}s",
+                },
+                headers={**headers, "Retry-After": str(math.ceil(result.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
 
-try:
-    import redis.asyncio as redis
-except ImportError:
-    redis = None
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
 
+        await self.app(scope, receive, send_with_headers)
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware using Redis."""
 
-    def __init__(self, app, redis_url: str | None = None, default_limit: int = 100, window: int = 60):
-        super().__init__(app)
-        self.redis_url = redis_url
-        self.default_limit = default_limit
-        self.window = window
-        self.redis_client: redis.Redis | None = None
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+}
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip rate limiting for health checks
-        if request.url.path in ["/", "/health", "/health/db", "/health/redis"]:
-            return await call_next(request)
 
-        # Get client identifier
-        client_id = self._get_client_id(request)
+class SecurityHeadersMiddleware:
+    """Add security headers to responses."""
 
-        # Check rate limit
-        if await self._is_rate_limited(client_id, request.url.path):
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "error": "Rate limit exceeded",
-                    "message": f"Too many requests. Limit: {self.default_limit} per {self.window}s",
-                },
-            )
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        response = await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Add rate limit headers
-        remaining = await self._get_remaining(client_id, request.url.path)
-        response.headers["X-RateLimit-Limit"] = str(self.default_limit)
-        response.headers["X-RateLimit-Remaining"] = str(max(0, remaining))
-        response.headers["X-RateLimit-Reset"] = str(int(time.time()) + self.window)
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(SECURITY_HEADERS)
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
 
-    def _get_client_id(self, request: Request) -> str:
-        """Get client identifier for rate limiting."""
-        # Try to get user ID from token if available
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            # In production, decode JWT to get user ID
-            # For now, use IP + path
-            return f"{request.client.host}:{request.url.path}"
 
-        # Fallback to IP address
-        forwarded = request.headers.get("X-Forwarded-For")
-        if forwarded:
-            return forwarded.split(",")[0].strip()
-        return request.client.host if request.client else "unknown"
+class MetricsMiddleware:
+    """Request count, latency and in-flight metrics by route template (see services/metrics.py)."""
 
-    async def _is_rate_limited(self, client_id: str, path: str) -> bool:
-        """Check if client has exceeded rate limit."""
-        if not self.redis_client or not self.redis_url:
-            return False  # No rate limiting if Redis unavailable
+    def __init__(self, app: ASGIApp, metrics: Metrics | None = None) -> None:
+        self.app = app
+        self.metrics = metrics or get_metrics()
+        self.route_template = RouteTemplates()
 
-        try:
-            key = f"rate_limit:{client_id}:{path}"
-            current = await self.redis_client.get(key)
-            if current and int(current) >= self.default_limit:
-                return True
-
-            # Increment counter
-            pipe = self.redis_client.pipeline()
-            pipe.incr(key)
-            pipe.expire(key, self.window)
-            await pipe.execute()
-            return False
-        except Exception:
-            # If Redis fails, allow request (fail open)
-            return False
-
-    async def _get_remaining(self, client_id: str, path: str) -> int:
-        """Get remaining requests for client."""
-        if not self.redis_client:
-            return self.default_limit
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.metrics is None:
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], self.route_template(scope)
+        status_code = 500  # If the app raises before responding
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
+        in_flight = self.metrics.http_in_flight.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
         try:
-            key = f"rate_limit:{client_id}:{path}"
-            current = await self.redis_client.get(key)
-            if current:
-                return max(0, self.default_limit - int(current))
-            return self.default_limit
-        except Exception:
-            return self.default_limit
-
-    async def startup(self):
-        """Initialize Redis connection."""
-        if self.redis_url and redis:
-            try:
-                self.redis_client = await redis.from_url(self.redis_url, decode_responses=True)
-            except Exception:
-                pass  # Fail gracefully if Redis unavailable
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            self.metrics.observe_request(method, route, status_code, time.perf_counter() - started)
 
-    async def shutdown(self):
-        """Close Redis connection."""
-        if self.redis_client:
-            await self.redis_client.aclose()
 
+class QueryStatsMiddleware:
+    """Per-request statement counting and N+1 warnings (see services/query_stats.py)."""
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to responses."""
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 5, debug_headers: bool = False) -> None:
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.debug_headers = debug_headers
+        self.route_template = RouteTemplates()
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        with track_queries() as stats:
 
-        return response
+            async def send_with_stats(message: Message) -> None:
+                if self.debug_headers and message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).update({
+                        "X-DB-Query-Count": str(stats.count),
+                        "X-DB-Query-Time-Ms": f"{stats.seconds * 1000:.1f}",
+                    })
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                label = f"{scope['method']} {self.route_template(scope)}"
+                report_request(label, stats, self.n_plus_one_threshold)
@@ -9,7 +9,9 @@ from .core import (
     User,
     Verification,
 )
+from .analytics import ReportDailyStat
 from .device_tokens import DeviceToken
+from .jobs import Job
 from .notifications import Attestation, Notification
 from .challenges import (
     ChallengeCategory,
@@ -33,11 +35,13 @@ __all__ = [
     "Comment",
     "DeviceToken",
     "Flag",
+    "Job",
     "Location",
     "NGO",
     "Notification",
     "ParticipationRole",
     "Report",
+    "ReportDailyStat",
     "ReportMedia",
     "StakeholderSupport",
     "SupportType",
@@ -0,0 +1,30 @@
+"""Analytics rollup models."""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Float, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class ReportDailyStat(Base):
+    """Report counts and measure sums per day, county, category, severity and status.
+
+    Maintained incrementally by services/report_rollups.py; dashboards read
+    these rows instead of scanning ``reports``.
+    """
+    __tablename__ = "report_daily_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    county: Mapped[str] = mapped_column(String(100), primary_key=True)  # '' when the report has no location
+    category: Mapped[str] = mapped_column(String(64), primary_key=True)
+    severity: Mapped[str] = mapped_column(String(16), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), primary_key=True)
+    report_count: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    ai_score_sum: Mapped[float] = mapped_column(Float, default=0.0, server_default=text("0"))
+    ai_score_count: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    # Seconds from creation to verification, summed over verified reports
+    response_seconds_sum: Mapped[float] = mapped_column(Float, default=0.0, server_default=text("0"))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -6,7 +6,7 @@ from enum import Enum
 from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Numeric, String, Text, Enum as SQLEnum
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, Numeric, String, Text, Enum as SQLEnum
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -57,6 +57,10 @@ class SupportType(str, Enum):
 class CommunityChallenge(Base):
     """Community Challenge model."""
     __tablename__ = "community_challenges"
+    __table_args__ = (
+        # varchar_pattern_ops lets geohash LIKE 'prefix%' use the index under any collation
+        Index("ix_community_challenges_geohash", "geohash", postgresql_ops={"geohash": "varchar_pattern_ops"}),
+    )
 
     id: Mapped[uuid4] = mapped_column(UUID(as_uuid=True), primary_key=True, default=default_uuid)
     creator_id: Mapped[uuid4] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -67,6 +71,7 @@ class CommunityChallenge(Base):
     # Geo-location
     latitude: Mapped[float] = mapped_column(Numeric(10, 7), nullable=False)
     longitude: Mapped[float] = mapped_column(Numeric(10, 7), nullable=False)
+    geohash: Mapped[Optional[str]] = mapped_column(String(12))  # See services/geohash.py
     county: Mapped[Optional[str]] = mapped_column(String(100))
     district: Mapped[Optional[str]] = mapped_column(String(100))
     
@@ -80,6 +85,13 @@ class CommunityChallenge(Base):
     status: Mapped[ChallengeStatus] = mapped_column(SQLEnum(ChallengeStatus), default=ChallengeStatus.ACTIVE)
     progress_percentage: Mapped[float] = mapped_column(Numeric(5, 2), default=0.0)
     
+    # Denormalized counters, maintained on write (see services/challenge_stats.py)
+    participants_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    volunteers_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    donors_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    supports_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    high_priority_supports_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    
     # Media
     media_urls: Mapped[list[str]] = mapped_column(JSONB, default=list)
     
@@ -4,8 +4,8 @@ from datetime import datetime
 from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Numeric, String, Text
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy import Boolean, Computed, DateTime, ForeignKey, Index, Integer, Numeric, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..database import Base
@@ -17,6 +17,10 @@ def default_uuid():
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Nearby-user lookups match geohash prefixes with LIKE (same index as the migration)
+        Index("ix_users_geohash", "geohash", postgresql_ops={"geohash": "varchar_pattern_ops"}),
+    )
 
     id: Mapped[uuid4] = mapped_column(UUID(as_uuid=True), primary_key=True, default=default_uuid)
     full_name: Mapped[str] = mapped_column(String(255))
@@ -26,6 +30,11 @@ class User(Base):
     role: Mapped[str] = mapped_column(String(32), default="citizen")
     verified: Mapped[bool] = mapped_column(Boolean, default=False)
     language: Mapped[str] = mapped_column(String(8), default="en-LR")
+    # Last known location, used to target nearby notifications (services/challenge_notifications.py)
+    county: Mapped[Optional[str]] = mapped_column(String(100), index=True)
+    latitude: Mapped[Optional[float]]
+    longitude: Mapped[Optional[float]]
+    geohash: Mapped[Optional[str]] = mapped_column(String(12))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     reports: Mapped[list["Report"]] = relationship(back_populates="user")
@@ -55,6 +64,9 @@ class AnonymousToken(Base):
 
 class Location(Base):
     __tablename__ = "locations"
+    __table_args__ = (
+        Index("ix_locations_geohash", "geohash", postgresql_ops={"geohash": "varchar_pattern_ops"}),
+    )
 
     id: Mapped[uuid4] = mapped_column(UUID(as_uuid=True), primary_key=True, default=default_uuid)
     latitude: Mapped[float]
@@ -62,6 +74,7 @@ class Location(Base):
     county: Mapped[str]
     district: Mapped[Optional[str]]
     description: Mapped[Optional[str]]
+    geohash: Mapped[Optional[str]] = mapped_column(String(12))  # See services/geohash.py
 
     reports: Mapped[list["Report"]] = relationship(back_populates="location")
 
@@ -92,6 +105,13 @@ class Report(Base):
     fake_confidence: Mapped[Optional[float]] = mapped_column(Numeric(3, 2), nullable=True)
     legal_advice_snapshot: Mapped[Optional[str]] = mapped_column(Text(), nullable=True)
     hash_anchored_on_chain: Mapped[Optional[str]] = mapped_column(Text(), nullable=True)
+    # Full-text search document, maintained by PostgreSQL (GIN-indexed)
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(summary, '') || ' ' || coalesce(details, ''))", persisted=True),
+        nullable=True,
+        deferred=True,
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -106,6 +126,17 @@ class Report(Base):
     attestations: Mapped[list["Attestation"]] = relationship(back_populates="report", cascade="all, delete-orphan")
 
 
+# Hot query shapes (created CONCURRENTLY by alembic 20261018_000010). Search sorts
+# DESC NULLS LAST with id as tie-breaker, so the indexes store that order.
+Index("ix_reports_created_at_id", Report.created_at.desc().nulls_last(), Report.id.desc())
+Index("ix_reports_priority_id", Report.priority_score.desc().nulls_last(), Report.id.desc())
+Index("ix_reports_category_created_at", Report.category, Report.created_at.desc().nulls_last(), Report.id.desc())
+Index("ix_reports_severity_created_at", Report.severity, Report.created_at.desc().nulls_last(), Report.id.desc())
+Index("ix_reports_status_created_at", Report.status, Report.created_at.desc().nulls_last(), Report.id.desc())
+Index("ix_reports_user_created_at", Report.user_id, Report.created_at.desc())
+Index("ix_reports_location_id", Report.location_id)
+
+
 class ReportMedia(Base):
     __tablename__ = "report_media"
 
@@ -126,6 +157,9 @@ class ReportMedia(Base):
     report: Mapped[Report] = relationship(back_populates="media")
 
 
+Index("ix_report_media_report_id", ReportMedia.report_id)
+
+
 class Verification(Base):
     __tablename__ = "verifications"
 
@@ -142,6 +176,9 @@ class Verification(Base):
     report: Mapped[Report] = relationship(back_populates="verifications")
 
 
+Index("ix_verifications_report_action", Verification.report_id, Verification.action)
+
+
 class Comment(Base):
     __tablename__ = "comments"
 
@@ -158,6 +195,9 @@ class Comment(Base):
     user: Mapped[Optional[User]] = relationship(back_populates="comments")
 
 
+Index("ix_comments_report_id", Comment.report_id, Comment.created_at)
+
+
 class Flag(Base):
     __tablename__ = "flags"
 
@@ -0,0 +1,39 @@
+"""Background job queue model."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+def default_uuid():
+    return uuid4()
+
+
+class Job(Base):
+    """Unit of background work, claimed by workers with FOR UPDATE SKIP LOCKED."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers poll for due jobs per queue
+        Index("ix_jobs_claim", "queue", "run_at", postgresql_where=text("status = 'queued'")),
+    )
+
+    id: Mapped[uuid4] = mapped_column(UUID(as_uuid=True), primary_key=True, default=default_uuid)
+    queue: Mapped[str] = mapped_column(String(64), default="default")
+    task: Mapped[str] = mapped_column(String(128))
+    payload: Mapped[dict] = mapped_column(JSONB, default=dict)
+    status: Mapped[str] = mapped_column(String(16), default="queued")  # queued, running, done, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5)
+    run_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text(), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
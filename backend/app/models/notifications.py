@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Numeric, String, Text
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Numeric, String, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -19,6 +19,27 @@ def default_uuid():
 class Notification(Base):
     """Notification sent to community members for report attestation."""
     __tablename__ = "notifications"
+    __table_args__ = (
+        # One attestation request per user and report; fan-outs insert with ON CONFLICT DO NOTHING.
+        # Other per-report notification types are not limited.
+        Index(
+            "uq_notifications_user_report",
+            "user_id",
+            "report_id",
+            unique=True,
+            postgresql_where=text("report_id IS NOT NULL AND notification_type = 'attestation_request'"),
+        ),
+        # Lets challenge fan-outs skip users who already have the notification
+        Index(
+            "ix_notifications_challenge_user",
+            "challenge_id",
+            "notification_type",
+            "user_id",
+            postgresql_where=text("challenge_id IS NOT NULL"),
+        ),
+        # A user's inbox, optionally unread only, newest first
+        Index("ix_notifications_user_read_created_at", "user_id", "read", text("created_at DESC")),
+    )
 
     id: Mapped[uuid4] = mapped_column(UUID(as_uuid=True), primary_key=True, default=default_uuid)
     user_id: Mapped[Optional[uuid4]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
@@ -63,3 +84,7 @@ class Attestation(Base):
     # Relationships
     report: Mapped["Report"] = relationship(back_populates="attestations")
     user: Mapped[Optional["User"]] = relationship(back_populates="attestations")
+
+
+# Verification and priority scoring count a report's attestations by action
+Index("ix_attestations_report_action", Attestation.report_id, Attestation.action)
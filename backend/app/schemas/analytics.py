@@ -44,6 +44,23 @@ class HeatmapPoint(BaseModel):
     intensity: float
 
 
+class HeatmapTile(BaseModel):
+    tile: str  # Geohash prefix shared by every cell in the tile
+    # Parallel arrays, one entry per non-empty cell
+    cells: list[str]
+    latitude: list[float]
+    longitude: list[float]
+    report_count: list[int]
+    avg_severity: list[float]
+
+
+class HeatmapTilesResponse(BaseModel):
+    zoom: int
+    precision: int
+    days: int
+    tiles: list[HeatmapTile]
+
+
 class CategoryInsight(BaseModel):
     category: str
     total_reports: int
@@ -53,6 +53,8 @@ class ChallengeResponse(BaseModel):
     participants_count: int = 0
     volunteers_count: int = 0
     donors_count: int = 0
+    supports_count: int = 0
+    distance_km: Optional[float] = None  # Set by radius queries
     
     class Config:
         from_attributes = True
@@ -65,6 +67,7 @@ class ChallengeListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = None  # Pass as cursor to fetch the next page
 
 
 class ParticipationRequest(BaseModel):
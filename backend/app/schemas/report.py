@@ -21,6 +21,23 @@ class ReportCreateRequest(BaseModel):
     sms_reference: str | None = None
 
 
+class BulkReportCreateRequest(BaseModel):
+    reports: list[ReportCreateRequest] = Field(..., min_length=1, max_length=500)
+
+
+class BulkReportResult(BaseModel):
+    id: UUID
+    report_id: str
+    status: str
+    created_at: datetime
+    priority_score: float | None = None
+
+
+class BulkReportCreateResponse(BaseModel):
+    created: list[BulkReportResult]
+    count: int
+
+
 class ReportResponse(BaseModel):
     id: UUID
     report_id: str | None = None  # Public report ID (RPT-YYYY-XXXXXX)
@@ -55,6 +72,8 @@ class SearchResponse(BaseModel):
     page: int = 1
     page_size: int = 50
     total_pages: int = 0
+    next_cursor: str | None = None  # Pass back as ?cursor= for the next page
+    total_is_estimate: bool = False
 
 
 class ReportAssignmentRequest(BaseModel):
@@ -1,34 +1,74 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Any
+import asyncio
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Any, Awaitable, Callable, Optional
 
-from sqlalchemy import case, func, select
+from sqlalchemy import case, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import SessionFactory
+from app.models.analytics import ReportDailyStat
 from app.models.core import Location, Report
+from app.services import geohash
+
+# Dashboards read the daily rollups (services/report_rollups.py) rather than
+# scanning ``reports``; only the heatmap still needs per-location rows.
+
+SEVERITY_WEIGHTS = {"critical": 4, "high": 3, "medium": 2}  # anything else counts 1
+
+
+# Heatmap tiles are this many geohash characters coarser than their cells
+HEATMAP_TILE_LEVELS = 2
+
+
+def _severity_weight(severity: str) -> int:
+    return SEVERITY_WEIGHTS.get(severity, 1)
+
+
+def _severity_score():
+    return case(*((Report.severity == name, weight) for name, weight in SEVERITY_WEIGHTS.items()), else_=1)
+
+
+async def run_concurrently(
+    sessions: SessionFactory,
+    *queries: Callable[[AsyncSession], Awaitable[Any]],
+) -> list[Any]:
+    """Run independent dashboard queries at once, each on its own session.
+
+    A session executes one statement at a time, so each query gets its own
+    session (and pooled connection); the caller waits for the slowest query
+    rather than the sum of all of them. Results are returned in order.
+    """
+    async def run(query: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        async with sessions() as session:
+            return await query(session)
+
+    return list(await asyncio.gather(*(run(query) for query in queries)))
 
 
 async def compute_kpis(session: AsyncSession) -> dict[str, Any]:
     """Compute key performance indicators."""
-    total_stmt = select(func.count(Report.id))
-    total_result = await session.execute(total_stmt)
-    total_reports = total_result.scalar() or 0
+    stmt = select(
+        ReportDailyStat.status,
+        func.sum(ReportDailyStat.report_count).label("reports"),
+        func.sum(ReportDailyStat.response_seconds_sum).label("response_seconds"),
+    ).group_by(ReportDailyStat.status)
+    result = await session.execute(stmt)
 
-    verified_stmt = select(func.count(Report.id)).where(Report.status == "verified")
-    verified_result = await session.execute(verified_stmt)
-    verified_reports = verified_result.scalar() or 0
+    total_reports = verified_reports = 0
+    response_seconds = 0.0
+    for row in result.all():
+        total_reports += row.reports or 0
+        if row.status == "verified":
+            verified_reports = row.reports or 0
+            response_seconds = row.response_seconds or 0.0
 
     verification_rate = round((verified_reports / total_reports * 100) if total_reports > 0 else 0, 2)
 
     # Simplified response time (hours since creation for verified reports)
-    response_stmt = select(
-        func.avg(
-            func.extract("epoch", Report.updated_at - Report.created_at) / 3600
-        )
-    ).where(Report.status == "verified")
-    response_result = await session.execute(response_stmt)
-    avg_response_hours = round(response_result.scalar() or 0, 2)
+    avg_response_hours = round(response_seconds / verified_reports / 3600 if verified_reports else 0, 2)
 
     return {
         "total_reports": total_reports,
@@ -42,15 +82,19 @@ async def compute_kpis(session: AsyncSession) -> dict[str, Any]:
 
 async def compute_county_breakdown(session: AsyncSession) -> list[dict[str, Any]]:
     """Break down reports by county."""
+    report_count = func.sum(ReportDailyStat.report_count)
     stmt = (
         select(
-            Location.county,
-            func.count(Report.id).label("report_count"),
-            func.sum(case((Report.status == "verified", 1), else_=0)).label("verified_count"),
+            ReportDailyStat.county,
+            report_count.label("report_count"),
+            func.sum(
+                case((ReportDailyStat.status == "verified", ReportDailyStat.report_count), else_=0)
+            ).label("verified_count"),
         )
-        .join(Report, Report.location_id == Location.id)
-        .group_by(Location.county)
-        .order_by(func.count(Report.id).desc())
+        .where(ReportDailyStat.county != "")
+        .group_by(ReportDailyStat.county)
+        .having(report_count > 0)
+        .order_by(report_count.desc())
         .limit(15)
     )
     result = await session.execute(stmt)
@@ -62,37 +106,38 @@ async def compute_county_breakdown(session: AsyncSession) -> list[dict[str, Any]
 
 async def compute_category_trends(session: AsyncSession) -> list[dict[str, Any]]:
     """Compute category trends (simplified - compares last 7 days vs previous 7 days)."""
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    two_weeks_ago = datetime.utcnow() - timedelta(days=14)
+    today = datetime.utcnow().date()
+    week_ago = today - timedelta(days=7)
+    two_weeks_ago = today - timedelta(days=14)
 
-    recent_stmt = (
-        select(Report.category, func.count(Report.id).label("count"))
-        .where(Report.created_at >= week_ago)
-        .group_by(Report.category)
-    )
-    recent_result = await session.execute(recent_stmt)
-    recent_counts = {row.category: row.count for row in recent_result.all()}
-
-    previous_stmt = (
-        select(Report.category, func.count(Report.id).label("count"))
-        .where(Report.created_at >= two_weeks_ago, Report.created_at < week_ago)
-        .group_by(Report.category)
+    stmt = (
+        select(
+            ReportDailyStat.category,
+            func.sum(ReportDailyStat.report_count)
+            .filter(ReportDailyStat.day > week_ago)
+            .label("recent"),
+            func.sum(ReportDailyStat.report_count)
+            .filter(ReportDailyStat.day <= week_ago)
+            .label("previous"),
+        )
+        .where(ReportDailyStat.day > two_weeks_ago)
+        .group_by(ReportDailyStat.category)
     )
-    previous_result = await session.execute(previous_stmt)
-    previous_counts = {row.category: row.count for row in previous_result.all()}
+    result = await session.execute(stmt)
 
     trends = []
-    all_categories = set(recent_counts.keys()) | set(previous_counts.keys())
-    for cat in all_categories:
-        recent = recent_counts.get(cat, 0)
-        previous = previous_counts.get(cat, 0)
+    for row in result.all():
+        recent = row.recent or 0
+        previous = row.previous or 0
+        if not recent and not previous:
+            continue
         if recent > previous:
             trend = "up"
         elif recent < previous:
             trend = "down"
         else:
             trend = "stable"
-        trends.append({"category": cat, "count": recent, "trend": trend})
+        trends.append({"category": row.category, "count": recent, "trend": trend})
 
     return trends
 
@@ -110,14 +155,7 @@ async def compute_geographic_heatmap(
             Location.longitude,
             Location.county,
             func.count(Report.id).label("report_count"),
-            func.avg(
-                case(
-                    (Report.severity == "critical", 4),
-                    (Report.severity == "high", 3),
-                    (Report.severity == "medium", 2),
-                    else_=1,
-                )
-            ).label("avg_severity"),
+            func.avg(_severity_score()).label("avg_severity"),
         )
         .join(Report, Report.location_id == Location.id)
         .where(Report.created_at >= cutoff)
@@ -139,39 +177,112 @@ async def compute_geographic_heatmap(
     ]
 
 
-async def compute_category_insights(session: AsyncSession) -> dict[str, Any]:
-    """Compute detailed insights by category."""
+def heatmap_tiles(
+    box: tuple[float, float, float, float],
+    zoom: int,
+    max_tiles: Optional[int] = None,
+) -> tuple[int, Optional[list[str]]]:
+    """Cell precision for ``zoom`` and the geohash tiles covering ``box``.
+
+    Tiles are None when ``box`` needs more than ``max_tiles`` of them.
+    """
+    precision = geohash.precision_for_zoom(zoom)
+    return precision, geohash.cover_box(box, max(precision - HEATMAP_TILE_LEVELS, 0), max_cells=max_tiles)
+
+
+async def compute_heatmap_tiles(
+    session: AsyncSession,
+    tiles: list[str],
+    precision: int,
+    days: int = 30,
+) -> dict[str, dict[str, Any]]:
+    """Aggregate reports in the geohash ``tiles`` into cells of ``precision`` characters.
+
+    One query for all tiles: each tile is a prefix range scan on
+    ``locations.geohash``, and the result has one row per non-empty cell
+    however many reports it holds. Cells are split back into their tiles by
+    prefix; every tile gets an entry, empty or not.
+    """
+    # Whole days, so the tiles stay cacheable for the rest of the day
+    cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=days), time.min)
+    cell = func.substr(Location.geohash, 1, precision)
+
+    tile_data: dict[str, dict[str, Any]] = {
+        tile: {
+            "tile": tile,
+            "cells": [],
+            "latitude": [],
+            "longitude": [],
+            "report_count": [],
+            "avg_severity": [],
+        }
+        for tile in tiles
+    }
+    if not tiles:
+        return tile_data
+
     stmt = (
         select(
-            Report.category,
-            func.count(Report.id).label("total"),
-            func.sum(case((Report.status == "verified", 1), else_=0)).label("verified"),
-            func.avg(
-                case(
-                    (Report.severity == "critical", 4),
-                    (Report.severity == "high", 3),
-                    (Report.severity == "medium", 2),
-                    else_=1,
-                )
-            ).label("avg_severity"),
-            func.avg(Report.ai_severity_score).label("avg_ai_score"),
+            cell.label("cell"),
+            func.avg(Location.latitude).label("latitude"),
+            func.avg(Location.longitude).label("longitude"),
+            func.count(Report.id).label("report_count"),
+            func.avg(_severity_score()).label("avg_severity"),
         )
-        .group_by(Report.category)
+        .join(Report, Report.location_id == Location.id)
+        .where(or_(*(Location.geohash.like(f"{tile}%") for tile in tiles)), Report.created_at >= cutoff)
+        .group_by(cell)
+        .order_by(cell)
     )
-    
     result = await session.execute(stmt)
-    categories = []
-    
+
+    tile_length = len(tiles[0])  # Tiles of one cover share a precision
     for row in result.all():
-        total = row.total
-        verified = row.verified or 0
+        data = tile_data[row.cell[:tile_length]]
+        data["cells"].append(row.cell)
+        data["latitude"].append(round(float(row.latitude), 5))
+        data["longitude"].append(round(float(row.longitude), 5))
+        data["report_count"].append(row.report_count)
+        data["avg_severity"].append(round(float(row.avg_severity or 0), 2))
+    return tile_data
+
+
+async def compute_category_insights(session: AsyncSession) -> dict[str, Any]:
+    """Compute detailed insights by category."""
+    stmt = select(
+        ReportDailyStat.category,
+        ReportDailyStat.severity,
+        ReportDailyStat.status,
+        func.sum(ReportDailyStat.report_count).label("reports"),
+        func.sum(ReportDailyStat.ai_score_sum).label("ai_score_sum"),
+        func.sum(ReportDailyStat.ai_score_count).label("ai_score_count"),
+    ).group_by(ReportDailyStat.category, ReportDailyStat.severity, ReportDailyStat.status)
+    result = await session.execute(stmt)
+
+    # total, verified, severity weight sum, AI score sum, AI score count
+    totals: dict[str, list[float]] = defaultdict(lambda: [0, 0, 0, 0.0, 0])
+    for row in result.all():
+        reports = row.reports or 0
+        entry = totals[row.category]
+        entry[0] += reports
+        if row.status == "verified":
+            entry[1] += reports
+        entry[2] += reports * _severity_weight(row.severity)
+        entry[3] += row.ai_score_sum or 0.0
+        entry[4] += row.ai_score_count or 0
+
+    categories = []
+    for category, (total, verified, severity_sum, ai_sum, ai_count) in totals.items():
+        if total <= 0:
+            continue
+        avg_ai_score = ai_sum / ai_count if ai_count else None
         categories.append({
-            "category": row.category,
+            "category": category,
             "total_reports": total,
             "verified_reports": verified,
-            "verification_rate": round((verified / total * 100) if total > 0 else 0, 2),
-            "avg_severity": round(float(row.avg_severity or 0), 2),
-            "avg_ai_score": round(float(row.avg_ai_score or 0), 2) if row.avg_ai_score else None,
+            "verification_rate": round(verified / total * 100, 2),
+            "avg_severity": round(severity_sum / total, 2),
+            "avg_ai_score": round(avg_ai_score, 2) if avg_ai_score else None,
         })
     
     return {
@@ -187,23 +298,27 @@ async def compute_time_series(
     group_by: str = "day",  # 'day', 'week', 'month'
 ) -> list[dict[str, Any]]:
     """Compute time series data for reports."""
-    cutoff = datetime.utcnow() - timedelta(days=days)
+    cutoff = datetime.utcnow().date() - timedelta(days=days)
     
     if group_by == "day":
-        date_trunc = func.date_trunc("day", Report.created_at)
+        date_trunc = func.date_trunc("day", ReportDailyStat.day)
     elif group_by == "week":
-        date_trunc = func.date_trunc("week", Report.created_at)
+        date_trunc = func.date_trunc("week", ReportDailyStat.day)
     else:  # month
-        date_trunc = func.date_trunc("month", Report.created_at)
+        date_trunc = func.date_trunc("month", ReportDailyStat.day)
     
+    report_count = func.sum(ReportDailyStat.report_count)
     stmt = (
         select(
             date_trunc.label("period"),
-            func.count(Report.id).label("count"),
-            func.sum(case((Report.status == "verified", 1), else_=0)).label("verified"),
+            report_count.label("count"),
+            func.sum(
+                case((ReportDailyStat.status == "verified", ReportDailyStat.report_count), else_=0)
+            ).label("verified"),
         )
-        .where(Report.created_at >= cutoff)
+        .where(ReportDailyStat.day >= cutoff)
         .group_by(date_trunc)
+        .having(report_count > 0)
         .order_by(date_trunc)
     )
     
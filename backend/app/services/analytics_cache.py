@@ -0,0 +1,345 @@
+"""Two-tier cache for dashboard analytics.
+
+Results are cached in a small in-process LRU (seconds) in front of Redis
+(``analytics_cache_ttl_seconds``). Every entry is stamped with a generation
+number kept in Redis; report writes call ``invalidate_analytics``, which bumps
+the generation so all older entries are ignored at once without deleting
+keys. A local write also clears this process's LRU immediately; other
+processes notice within the local TTL.
+
+Concurrent misses for the same key are collapsed (single-flight): within a
+process callers share one computation, and across processes a short Redis
+lock lets one worker compute while the others wait for its result.
+
+Redis is optional. Without it, or while it is unreachable, the cache serves
+from the local tier only and never fails the request.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from ..config import get_settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analytics"
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+
+
+def cache_key(name: str, **params: Any) -> str:
+    """Stable key for a dashboard function and its arguments."""
+    if not params:
+        return name
+    return name + ":" + ",".join(f"{key}={params[key]}" for key in sorted(params))
+
+
+class AnalyticsCache:
+    """TTL cache with generation-based invalidation and single-flight fills."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        ttl: float = 60.0,
+        local_ttl: float = 5.0,
+        local_max_entries: int = 256,
+        lock_timeout: float = 10.0,
+        retry_after: float = 30.0,
+    ) -> None:
+        self.redis = redis_client
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_max_entries = local_max_entries
+        self.lock_timeout = lock_timeout
+        self.retry_after = retry_after
+        self.hits = 0
+        self.misses = 0
+        self._local: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._generation = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._redis_down_until = 0.0
+
+    # Redis helpers: any failure switches to local-only mode for ``retry_after`` seconds
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"Analytics cache Redis unavailable, using local tier only: {e}")
+        self._redis_down_until = time.monotonic() + self.retry_after
+
+    # Local LRU tier
+
+    def _local_get(self, key: str) -> tuple[bool, Any]:
+        entry = self._local.get(key)
+        if entry is None:
+            return False, None
+        expires_at, generation, value = entry
+        if expires_at < time.monotonic() or generation != self._generation:
+            del self._local[key]
+            return False, None
+        self._local.move_to_end(key)
+        return True, value
+
+    def _local_set(self, key: str, value: Any) -> None:
+        self._local[key] = (time.monotonic() + self.local_ttl, self._generation, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_max_entries:
+            self._local.popitem(last=False)
+
+    # Redis tier
+
+    async def _redis_get(self, key: str) -> tuple[bool, Any]:
+        """Look ``key`` up in Redis, syncing the generation in the same round trip."""
+        found = await self._redis_get_many([key])
+        if key not in found:
+            return False, None
+        return True, found[key]
+
+    async def _redis_get_many(self, keys: list[str]) -> dict[str, Any]:
+        """Current entries among ``keys``, fetched with the generation in one MGET."""
+        if not self._redis_available():
+            return {}
+        try:
+            generation, *raws = await self.redis.mget(GENERATION_KEY, *(f"{KEY_PREFIX}:{key}" for key in keys))
+        except Exception as e:
+            self._redis_failed(e)
+            return {}
+        generation = int(generation or 0)
+        if generation != self._generation:
+            # Another process invalidated; drop everything cached locally
+            self._generation = generation
+            self._local.clear()
+        found = {}
+        for key, raw in zip(keys, raws):
+            if raw is None:
+                continue
+            entry = json.loads(raw)
+            if entry.get("g") == generation:
+                found[key] = entry["v"]
+        return found
+
+    async def _redis_set(self, key: str, value: Any) -> None:
+        if not self._redis_available():
+            return
+        try:
+            await self.redis.set(
+                f"{KEY_PREFIX}:{key}",
+                json.dumps({"g": self._generation, "v": value}, default=str),
+                ex=max(int(self.ttl), 1),
+            )
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def _acquire_fill_lock(self, key: str) -> bool:
+        """Try to become the one process filling ``key``."""
+        if not self._redis_available():
+            return True
+        try:
+            return bool(
+                await self.redis.set(
+                    f"{KEY_PREFIX}:lock:{key}", "1", nx=True, px=int(self.lock_timeout * 1000)
+                )
+            )
+        except Exception as e:
+            self._redis_failed(e)
+            return True
+
+    async def _release_fill_lock(self, key: str) -> None:
+        if not self._redis_available():
+            return
+        try:
+            await self.redis.delete(f"{KEY_PREFIX}:lock:{key}")
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def _wait_for_fill(self, key: str) -> tuple[bool, Any]:
+        """Poll Redis while another process computes ``key``."""
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.02
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            found, value = await self._redis_get(key)
+            if found or not self._redis_available():
+                return found, value
+            delay = min(delay * 2, 0.25)
+        return False, None
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for ``key``, computing it at most once across concurrent callers."""
+        found, value = self._local_get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._fill(key, compute)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Only waiters re-raise it; avoid "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        found, value = await self._redis_get(key)
+        if found:
+            self.hits += 1
+            self._local_set(key, value)
+            return value
+
+        self.misses += 1
+        generation = self._generation
+        if not await self._acquire_fill_lock(key):
+            found, value = await self._wait_for_fill(key)
+            if found:
+                self._local_set(key, value)
+                return value
+            # The other filler died or is slow; compute ourselves
+        try:
+            value = await compute()
+        finally:
+            await self._release_fill_lock(key)
+        # Skip caching a result that raced with an invalidation
+        if generation == self._generation:
+            self._local_set(key, value)
+            await self._redis_set(key, value)
+        return value
+
+    async def get_or_compute_many(
+        self,
+        keys: list[str],
+        compute: Callable[[list[str]], Awaitable[dict[str, Any]]],
+    ) -> dict[str, Any]:
+        """Cached values for ``keys``, computing every miss with one ``compute(missing)`` call.
+
+        For results that are cheaper to compute together than one by one
+        (e.g. heatmap tiles in one grouped query). Misses are looked up in
+        Redis with one MGET; there is no single-flight here, so concurrent
+        callers missing the same keys may each compute them.
+        """
+        values: dict[str, Any] = {}
+        missing = []
+        for key in keys:
+            found, value = self._local_get(key)
+            if found:
+                values[key] = value
+            else:
+                missing.append(key)
+        if missing:
+            for key, value in (await self._redis_get_many(missing)).items():
+                self._local_set(key, value)
+                values[key] = value
+            missing = [key for key in missing if key not in values]
+        self.hits += len(keys) - len(missing)
+        if not missing:
+            return values
+
+        self.misses += len(missing)
+        generation = self._generation
+        computed = await compute(missing)
+        # Skip caching results that raced with an invalidation
+        if generation == self._generation:
+            for key in missing:
+                self._local_set(key, computed[key])
+            await asyncio.gather(*(self._redis_set(key, computed[key]) for key in missing))
+        values.update(computed)
+        return values
+
+    async def invalidate(self) -> None:
+        """Expire every cached result (report data changed)."""
+        self._generation += 1
+        self._local.clear()
+        if not self._redis_available():
+            return
+        try:
+            self._generation = int(await self.redis.incr(GENERATION_KEY))
+        except Exception as e:
+            self._redis_failed(e)
+
+
+_cache: Optional[AnalyticsCache] = None
+
+
+def get_analytics_cache() -> AnalyticsCache:
+    """Process-wide analytics cache configured from settings."""
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        client = None
+        if settings.analytics_cache_redis and settings.redis_url and redis is not None:
+            client = redis.from_url(settings.redis_url, decode_responses=True)
+        _cache = AnalyticsCache(
+            redis_client=client,
+            ttl=settings.analytics_cache_ttl_seconds,
+            local_ttl=settings.analytics_cache_local_ttl_seconds,
+            local_max_entries=settings.analytics_cache_local_max_entries,
+        )
+    return _cache
+
+
+def set_analytics_cache(cache: Optional[AnalyticsCache]) -> None:
+    """Swap the process-wide cache (tests); None rebuilds it from settings on next use."""
+    global _cache
+    _cache = cache
+
+
+async def cached_analytics(
+    name: str,
+    compute: Callable[[], Awaitable[Any]],
+    **params: Any,
+) -> Any:
+    """Run ``compute`` through the analytics cache under ``name`` and ``params``."""
+    return await get_analytics_cache().get_or_compute(cache_key(name, **params), compute)
+
+
+async def cached_analytics_many(
+    name: str,
+    compute: Callable[[list[Any]], Awaitable[dict[Any, Any]]],
+    param: str,
+    items: list[Any],
+    **params: Any,
+) -> dict[Any, Any]:
+    """Like ``cached_analytics``, one entry per item of ``items`` (passed as ``param``).
+
+    ``compute`` receives only the uncached items and returns a result for each.
+    """
+    keys = {cache_key(name, **{param: item}, **params): item for item in items}
+
+    async def compute_missing(missing: list[str]) -> dict[str, Any]:
+        results = await compute([keys[key] for key in missing])
+        return {key: results[keys[key]] for key in missing}
+
+    values = await get_analytics_cache().get_or_compute_many(list(keys), compute_missing)
+    return {item: values[key] for key, item in keys.items()}
+
+
+async def invalidate_analytics() -> None:
+    """Call after committing a report write. Never raises."""
+    try:
+        await get_analytics_cache().invalidate()
+    except Exception as e:
+        logger.warning(f"Failed to invalidate analytics cache: {e}")
@@ -0,0 +1,223 @@
+"""Caches for the authentication fast path.
+
+Every authenticated request decodes its bearer token and loads the user row.
+``AuthCache`` keeps both off the hot path:
+
+* decoded claims per token in a bounded in-process LRU, valid until the
+  token's own ``exp``;
+* a snapshot of each user row, in-process for a few seconds in front of
+  Redis (``auth_user_cache_ttl_seconds``).
+
+``invalidate_user`` must be called after changing a user's role or password.
+It clears this process and Redis at once; other processes may serve their
+local snapshot for at most ``auth_user_cache_local_ttl_seconds``.
+
+The cached snapshot never contains the password hash. Redis is optional, and
+while it is unreachable the cache serves from the local tier only.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from jose import jwt
+
+from ..config import get_settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "auth:user"
+# Never cached: a leaked cache entry must not expose credentials
+EXCLUDED_USER_FIELDS = {"password_hash"}
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, for endpoints that only need identity and role."""
+    id: UUID
+    role: str
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def user_snapshot(user: Any) -> dict[str, Any]:
+    """Column values of a user row, minus credentials."""
+    return {
+        column.key: getattr(user, column.key)
+        for column in user.__table__.columns
+        if column.key not in EXCLUDED_USER_FIELDS
+    }
+
+
+def _encode_snapshot(snapshot: dict[str, Any]) -> str:
+    return json.dumps(
+        {
+            key: value.isoformat() if isinstance(value, datetime) else str(value) if isinstance(value, UUID) else value
+            for key, value in snapshot.items()
+        }
+    )
+
+
+def _decode_snapshot(raw: str) -> dict[str, Any]:
+    snapshot = json.loads(raw)
+    snapshot["id"] = UUID(snapshot["id"])
+    if snapshot.get("created_at"):
+        snapshot["created_at"] = datetime.fromisoformat(snapshot["created_at"])
+    return snapshot
+
+
+class AuthCache:
+    """Decoded-token LRU and two-tier user snapshot cache."""
+
+    def __init__(
+        self,
+        secret_key: str,
+        redis_client: Any = None,
+        token_max_entries: int = 10000,
+        user_ttl: float = 60.0,
+        user_local_ttl: float = 5.0,
+        user_max_entries: int = 10000,
+        retry_after: float = 30.0,
+    ) -> None:
+        self.secret_key = secret_key
+        self.redis = redis_client
+        self.token_max_entries = token_max_entries
+        self.user_ttl = user_ttl
+        self.user_local_ttl = user_local_ttl
+        self.user_max_entries = user_max_entries
+        self.retry_after = retry_after
+        self._tokens: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._users: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._redis_down_until = 0.0
+
+    # Redis helpers: any failure switches to local-only mode for ``retry_after`` seconds
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"Auth cache Redis unavailable, using local tier only: {e}")
+        self._redis_down_until = time.monotonic() + self.retry_after
+
+    # Tokens
+
+    def decode_token(self, token: str) -> dict[str, Any]:
+        """Verified claims of ``token``; raises ``jose.JWTError`` like ``jwt.decode``."""
+        key = _token_key(token)
+        claims = self._tokens.get(key)
+        if claims is not None:
+            if claims.get("exp", 0) > time.time():
+                self._tokens.move_to_end(key)
+                return claims
+            del self._tokens[key]
+        claims = jwt.decode(token, self.secret_key, algorithms=["HS256"])
+        if "exp" in claims:  # Tokens without expiry are verified every time
+            self._tokens[key] = claims
+            while len(self._tokens) > self.token_max_entries:
+                self._tokens.popitem(last=False)
+        return claims
+
+    # Users
+
+    async def get_user(self, user_id: UUID) -> Optional[dict[str, Any]]:
+        """Cached snapshot of a user row, or None on a miss."""
+        key = str(user_id)
+        entry = self._users.get(key)
+        if entry is not None:
+            expires_at, snapshot = entry
+            if expires_at >= time.monotonic():
+                self._users.move_to_end(key)
+                return snapshot
+            del self._users[key]
+        if not self._redis_available():
+            return None
+        try:
+            raw = await self.redis.get(f"{KEY_PREFIX}:{key}")
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if raw is None:
+            return None
+        snapshot = _decode_snapshot(raw)
+        self._set_local(key, snapshot)
+        return snapshot
+
+    def _set_local(self, key: str, snapshot: dict[str, Any]) -> None:
+        self._users[key] = (time.monotonic() + self.user_local_ttl, snapshot)
+        self._users.move_to_end(key)
+        while len(self._users) > self.user_max_entries:
+            self._users.popitem(last=False)
+
+    async def set_user(self, user: Any) -> dict[str, Any]:
+        """Cache a freshly loaded user row; returns its snapshot."""
+        snapshot = user_snapshot(user)
+        key = str(snapshot["id"])
+        self._set_local(key, snapshot)
+        if self._redis_available():
+            try:
+                await self.redis.set(
+                    f"{KEY_PREFIX}:{key}", _encode_snapshot(snapshot), ex=max(int(self.user_ttl), 1)
+                )
+            except Exception as e:
+                self._redis_failed(e)
+        return snapshot
+
+    async def invalidate_user(self, user_id: UUID) -> None:
+        """Forget a user's cached row (role or password changed)."""
+        key = str(user_id)
+        self._users.pop(key, None)
+        if not self._redis_available():
+            return
+        try:
+            await self.redis.delete(f"{KEY_PREFIX}:{key}")
+        except Exception as e:
+            self._redis_failed(e)
+
+
+_cache: Optional[AuthCache] = None
+
+
+def get_auth_cache() -> AuthCache:
+    """Process-wide auth cache configured from settings."""
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        client = None
+        if settings.auth_cache_redis and settings.redis_url and redis is not None:
+            client = redis.from_url(settings.redis_url, decode_responses=True)
+        _cache = AuthCache(
+            secret_key=settings.secret_key,
+            redis_client=client,
+            token_max_entries=settings.auth_token_cache_max_entries,
+            user_ttl=settings.auth_user_cache_ttl_seconds,
+            user_local_ttl=settings.auth_user_cache_local_ttl_seconds,
+        )
+    return _cache
+
+
+def set_auth_cache(cache: Optional[AuthCache]) -> None:
+    """Swap the process-wide cache (tests); None rebuilds it from settings on next use."""
+    global _cache
+    _cache = cache
+
+
+async def invalidate_user(user_id: UUID) -> None:
+    """Call after committing a role or password change. Never raises."""
+    try:
+        await get_auth_cache().invalidate_user(user_id)
+    except Exception as e:
+        logger.warning(f"Failed to invalidate auth cache for user {user_id}: {e}")
@@ -1,61 +1,122 @@
-"""Notification service for Community Challenge events."""
+"""Notification service for Community Challenge events.
+
+Challenge-created and volunteer-request notifications fan out to every
+verified user near the challenge: users whose last known position is within
+``radius_km``, or, when their position is unknown, who are in the challenge's
+county. The fan-out is a keyset-paged ``INSERT ... SELECT`` committed every
+``notification_fanout_batch_size`` recipients, so no user rows are loaded
+into Python and each transaction stays small however large the user base is.
+Users who already have the notification are skipped, which makes a retried
+fan-out resume where it stopped.
+"""
 from __future__ import annotations
 
 import logging
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import exists, func, insert, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import get_settings
 from ..models.challenges import CommunityChallenge, ChallengeParticipation, ChallengeProgress
 from ..models.core import User
 from ..models.notifications import Notification
-from ..services.geo_clustering import get_challenges_in_radius, haversine_distance
+from ..services.geo_clustering import get_challenges_in_radius, haversine_distance, nearby_users_condition
 
 logger = logging.getLogger(__name__)
 
 
+async def _fan_out_to_nearby_users(
+    session: AsyncSession,
+    challenge: CommunityChallenge,
+    notification_type: str,
+    title: str,
+    message: str,
+    radius_km: float,
+    batch_size: Optional[int] = None,
+) -> int:
+    """Insert one notification per nearby user, committing per batch. Returns the count."""
+    batch_size = batch_size or get_settings().notification_fanout_batch_size
+    already_notified = exists().where(
+        Notification.challenge_id == challenge.id,
+        Notification.notification_type == notification_type,
+        Notification.user_id == User.id,
+    )
+    recipients = (
+        select(
+            func.gen_random_uuid(),
+            User.id,
+            literal(challenge.id, Notification.challenge_id.type),
+            literal(notification_type),
+            literal(title),
+            literal(message),
+            literal(False),
+            literal(False),
+            literal(datetime.utcnow()),
+        )
+        .where(
+            User.verified == True,  # noqa: E712
+            User.id != challenge.creator_id,
+            nearby_users_condition(
+                float(challenge.latitude), float(challenge.longitude), radius_km, challenge.county
+            ),
+            ~already_notified,
+        )
+        .order_by(User.id)
+        .limit(batch_size)
+    )
+    columns = [
+        "id",
+        "user_id",
+        "challenge_id",
+        "notification_type",
+        "title",
+        "message",
+        "read",
+        "action_taken",
+        "created_at",
+    ]
+
+    total = 0
+    last_user_id: Optional[UUID] = None
+    while True:
+        page = recipients if last_user_id is None else recipients.where(User.id > last_user_id)
+        result = await session.execute(
+            insert(Notification).from_select(columns, page).returning(Notification.user_id)
+        )
+        user_ids = result.scalars().all()
+        await session.commit()
+        total += len(user_ids)
+        if len(user_ids) < batch_size:
+            return total
+        last_user_id = max(user_ids)
+
+
 async def notify_challenge_created(
     session: AsyncSession,
     challenge: CommunityChallenge,
     radius_km: float = 5.0,
+    batch_size: Optional[int] = None,
 ) -> int:
     """
-    Notify all users within radius about a new challenge.
+    Notify verified users within radius (or in the county) about a new challenge.
     Returns count of notifications created.
+
+    Database errors propagate so the background job is retried.
     """
-    try:
-        # Get all users (we'll filter by location in the future if we store user locations)
-        # For now, notify all active users
-        stmt = select(User).where(User.verified == True)
-        result = await session.execute(stmt)
-        users = result.scalars().all()
-        
-        notifications_created = 0
-        for user in users:
-            # In a real implementation, we'd check user's location against challenge location
-            # For now, create notification for all verified users
-            notification = Notification(
-                user_id=user.id,
-                report_id=None,  # Challenge notifications don't have report_id
-                challenge_id=challenge.id,
-                notification_type="challenge_created",
-                title=f"New Challenge: {challenge.title}",
-                message=f"A new {challenge.category} challenge has been created in {challenge.county or 'your area'}. Join now!",
-                read=False,
-                action_taken=False,
-            )
-            session.add(notification)
-            notifications_created += 1
-        
-        await session.commit()
-        logger.info(f"Created {notifications_created} notifications for challenge {challenge.id}")
-        return notifications_created
-    except Exception as e:
-        logger.error(f"Error creating challenge notifications: {e}", exc_info=True)
-        await session.rollback()
-        return 0
+    created = await _fan_out_to_nearby_users(
+        session,
+        challenge,
+        notification_type="challenge_created",
+        title=f"New Challenge: {challenge.title}",
+        message=f"A new {challenge.category} challenge has been created in {challenge.county or 'your area'}. Join now!",
+        radius_km=radius_km,
+        batch_size=batch_size,
+    )
+    logger.info(f"Created {created} notifications for challenge {challenge.id}")
+    return created
 
 
 async def notify_challenge_progress(
@@ -107,38 +168,25 @@ async def notify_volunteer_request(
     session: AsyncSession,
     challenge: CommunityChallenge,
     radius_km: float = 5.0,
+    batch_size: Optional[int] = None,
 ) -> int:
     """
-    Notify users within radius about volunteer request.
+    Notify verified users within radius (or in the county) about a volunteer request.
     Returns count of notifications created.
+
+    Database errors propagate so the background job is retried.
     """
-    try:
-        # Get all verified users
-        stmt = select(User).where(User.verified == True)
-        result = await session.execute(stmt)
-        users = result.scalars().all()
-        
-        notifications_created = 0
-        for user in users:
-            notification = Notification(
-                user_id=user.id,
-                report_id=None,
-                notification_type="volunteer_request",
-                title=f"Volunteers Needed: {challenge.title}",
-                message=f"{challenge.title} needs volunteers in {challenge.county or 'your area'}. Can you help?",
-                read=False,
-                action_taken=False,
-            )
-            session.add(notification)
-            notifications_created += 1
-        
-        await session.commit()
-        logger.info(f"Created {notifications_created} volunteer request notifications for challenge {challenge.id}")
-        return notifications_created
-    except Exception as e:
-        logger.error(f"Error creating volunteer request notifications: {e}", exc_info=True)
-        await session.rollback()
-        return 0
+    created = await _fan_out_to_nearby_users(
+        session,
+        challenge,
+        notification_type="volunteer_request",
+        title=f"Volunteers Needed: {challenge.title}",
+        message=f"{challenge.title} needs volunteers in {challenge.county or 'your area'}. Can you help?",
+        radius_km=radius_km,
+        batch_size=batch_size,
+    )
+    logger.info(f"Created {created} volunteer request notifications for challenge {challenge.id}")
+    return created
 
 
 async def notify_stakeholder_support(
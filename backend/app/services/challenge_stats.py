@@ -0,0 +1,101 @@
+"""Denormalized participation and support counters for community challenges.
+
+``community_challenges`` carries per-role participation counts and support
+totals so reads never scan participation rows. Writers bump them with a
+single atomic ``UPDATE ... SET x = x + 1`` in the same transaction as the
+row they insert; ``reconcile_challenge_counters`` recomputes them from the
+source tables to repair any drift.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.challenges import (
+    ChallengeParticipation,
+    CommunityChallenge,
+    ParticipationRole,
+    StakeholderSupport,
+)
+
+
+async def increment_participation_counters(
+    session: AsyncSession,
+    challenge_id: UUID,
+    role: ParticipationRole,
+) -> None:
+    """Count one new participation of ``role``. The caller commits."""
+    await session.execute(
+        update(CommunityChallenge)
+        .where(CommunityChallenge.id == challenge_id)
+        .values(
+            participants_count=CommunityChallenge.participants_count + 1,
+            volunteers_count=CommunityChallenge.volunteers_count + int(role == ParticipationRole.VOLUNTEER),
+            donors_count=CommunityChallenge.donors_count + int(role == ParticipationRole.DONOR),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def increment_support_counters(
+    session: AsyncSession,
+    challenge_id: UUID,
+    is_high_priority: bool = False,
+) -> None:
+    """Count one new stakeholder support. The caller commits."""
+    await session.execute(
+        update(CommunityChallenge)
+        .where(CommunityChallenge.id == challenge_id)
+        .values(
+            supports_count=CommunityChallenge.supports_count + 1,
+            high_priority_supports_count=(
+                CommunityChallenge.high_priority_supports_count + int(bool(is_high_priority))
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _counter_truths() -> dict:
+    """Correlated subqueries giving the true value of every counter column."""
+    def _count(model, *conditions):
+        return (
+            select(func.count(model.id))
+            .where(model.challenge_id == CommunityChallenge.id, *conditions)
+            .scalar_subquery()
+        )
+
+    return {
+        "participants_count": _count(ChallengeParticipation),
+        "volunteers_count": _count(ChallengeParticipation, ChallengeParticipation.role == ParticipationRole.VOLUNTEER),
+        "donors_count": _count(ChallengeParticipation, ChallengeParticipation.role == ParticipationRole.DONOR),
+        "supports_count": _count(StakeholderSupport),
+        "high_priority_supports_count": _count(StakeholderSupport, StakeholderSupport.is_high_priority.is_(True)),
+    }
+
+
+async def reconcile_challenge_counters(
+    session: AsyncSession,
+    challenge_ids: Optional[Iterable[UUID]] = None,
+) -> int:
+    """
+    Recompute counters from participations and supports, fixing drifted rows.
+
+    Runs as one UPDATE so concurrent increments are not lost. Limited to
+    ``challenge_ids`` when given. Returns the number of rows repaired; the
+    caller commits.
+    """
+    truths = _counter_truths()
+    stmt = (
+        update(CommunityChallenge)
+        .values(**truths)
+        .where(or_(*(getattr(CommunityChallenge, name) != truth for name, truth in truths.items())))
+        .execution_options(synchronize_session=False)
+    )
+    if challenge_ids is not None:
+        stmt = stmt.where(CommunityChallenge.id.in_(list(challenge_ids)))
+    result = await session.execute(stmt)
+    return result.rowcount or 0
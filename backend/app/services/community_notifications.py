@@ -2,14 +2,21 @@
 from __future__ import annotations
 
 import math
-from typing import Optional
-from uuid import UUID
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID, uuid4
 
-from sqlalchemy import select, func
+from sqlalchemy import and_, literal, select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.core import Location, Report, User
 from ..models.notifications import Attestation, Notification
+from .geo_clustering import haversine_sql, nearby_users_condition
+
+# The only per-report notification deduplicated by uq_notifications_user_report
+ATTESTATION_REQUEST = "attestation_request"
 
 
 def calculate_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -30,6 +37,34 @@ def calculate_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) ->
     return R * c
 
 
+@dataclass
+class AttestationPush:
+    """Push for the users notified about one report; enqueue once their notifications commit."""
+    user_ids: list[UUID]
+    title: str
+    body: str
+    data: dict[str, Any]
+
+    def enqueue(self) -> int:
+        """Hand the push to the shared background dispatcher. Returns how many were queued."""
+        from .push_dispatcher import get_push_dispatcher
+        return get_push_dispatcher().enqueue(self.user_ids, title=self.title, body=self.body, data=self.data)
+
+
+def _nearby_users_stmt(stmt, report_location: Location, radius_km: float, max_users: int):
+    """Apply the nearby-user filter to ``stmt`` (select of User or its columns), nearest first."""
+    latitude, longitude = float(report_location.latitude), float(report_location.longitude)
+    return (
+        stmt.where(
+            User.role.in_(["citizen", "user"]),  # Only notify regular users, not admins/NGOs
+            nearby_users_condition(latitude, longitude, radius_km, report_location.county),
+        )
+        # Users placed only by county (no position) come last
+        .order_by(haversine_sql(latitude, longitude, User.latitude, User.longitude).asc().nulls_last(), User.id)
+        .limit(max_users)
+    )
+
+
 async def find_nearby_users(
     session: AsyncSession,
     report_location: Location,
@@ -37,30 +72,11 @@ async def find_nearby_users(
     max_users: int = 50,
 ) -> list[User]:
     """
-    Find users in the same county or within radius of report location.
-    
-    For now, we match by county since we don't track user locations.
-    In production, you'd want to:
-    1. Track user's last known location
-    2. Use geospatial queries (PostGIS)
-    3. Filter by distance using Haversine formula
+    Find users within ``radius_km`` of the report, by their last known
+    position, or in the report's county when their position is unknown.
     """
-    # Find users in the same county
-    # In a real implementation, you'd also check user's last known location
-    stmt = (
-        select(User)
-        .where(User.role.in_(["citizen", "user"]))  # Only notify regular users, not admins/NGOs
-        .limit(max_users)
-    )
-    
-    result = await session.execute(stmt)
-    users = result.scalars().all()
-    
-    # For now, return all users in the system (in production, filter by county/location)
-    # This is a simplified implementation - in production you'd:
-    # 1. Store user's county preference or last location
-    # 2. Filter by actual distance
-    return list(users)
+    result = await session.execute(_nearby_users_stmt(select(User), report_location, radius_km, max_users))
+    return list(result.scalars().all())
 
 
 async def notify_community_for_attestation(
@@ -69,65 +85,73 @@ async def notify_community_for_attestation(
     report_location: Location,
     radius_km: float = 10.0,
     send_push: bool = True,
-) -> int:
+    max_users: int = 50,
+) -> tuple[list[UUID], Optional[AttestationPush]]:
     """
     Notify community members about a new report for attestation.
     
-    Returns the number of notifications sent.
+    Notifications are written with one multi-row INSERT ... ON CONFLICT DO
+    NOTHING against the (user_id, report_id) unique index on attestation
+    requests, so users who were already asked are skipped by the database.
+    
+    Returns the newly notified user IDs and, if ``send_push``, the push for
+    them. The caller enqueues the push after committing, so no one is pushed
+    about a notification that rolled back.
     """
-    # Find nearby users
-    nearby_users = await find_nearby_users(session, report_location, radius_km)
+    # Find nearby users (IDs only)
+    result = await session.execute(_nearby_users_stmt(select(User.id), report_location, radius_km, max_users))
+    recipient_ids = {user_id for user_id in result.scalars().all() if user_id != report.user_id}
     
-    if not nearby_users:
-        return 0
+    if not recipient_ids:
+        return [], None
     
-    # Create notifications for each user
-    notifications_created = 0
-    for user in nearby_users:
-        # Skip if user is the reporter
-        if report.user_id and user.id == report.user_id:
-            continue
-        
-        # Check if notification already exists
-        existing = await session.execute(
-            select(Notification).where(
-                Notification.user_id == user.id,
-                Notification.report_id == report.id,
-            )
+    now = datetime.utcnow()
+    title = f"New Report in {report_location.county}"
+    message = f"A {report.severity} {report.category} issue was reported near you. Can you confirm or provide additional information?"
+    rows = [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "report_id": report.id,
+            "notification_type": ATTESTATION_REQUEST,
+            "title": title,
+            "message": message,
+            "read": False,
+            "action_taken": False,
+            "created_at": now,
+        }
+        for user_id in recipient_ids
+    ]
+    insert_stmt = (
+        pg_insert(Notification)
+        .on_conflict_do_nothing(
+            index_elements=[Notification.user_id, Notification.report_id],
+            index_where=and_(
+                Notification.report_id.isnot(None),
+                # Inlined so Postgres can match the partial index predicate
+                Notification.notification_type
+                == literal(ATTESTATION_REQUEST, literal_execute=True),
+            ),
         )
-        if existing.scalar_one_or_none():
-            continue  # Already notified
-        
-        notification = Notification(
-            user_id=user.id,
-            report_id=report.id,
-            notification_type="attestation_request",
-            title=f"New Report in {report_location.county}",
-            message=f"A {report.severity} {report.category} issue was reported near you. Can you confirm or provide additional information?",
-        )
-        session.add(notification)
-        notifications_created += 1
-        
-        # Send push notification if enabled
-        if send_push:
-            try:
-                from ..config import get_settings
-                from ..services.push_notifications import PushNotificationService
-                push_service = PushNotificationService(get_settings())
-                await push_service.send_attestation_request(
-                    session=session,
-                    user_id=str(user.id),
-                    report_id=str(report.id),
-                    report_summary=report.summary,
-                    county=report_location.county,
-                )
-            except Exception:
-                # Don't fail if push notification fails
-                import logging
-                logging.warning(f"Failed to send push notification to user {user.id}")
-    
+        .returning(Notification.user_id)
+    )
+    inserted = await session.execute(insert_stmt, rows)
+    notified_ids = [row.user_id for row in inserted.all()]
     await session.flush()
-    return notifications_created
+    
+    if not send_push or not notified_ids:
+        return notified_ids, None
+    push = AttestationPush(
+        user_ids=notified_ids,
+        title=title,
+        body=f"A report was made near you: {report.summary[:100]}... Can you confirm?",
+        data={
+            "type": ATTESTATION_REQUEST,
+            "report_id": str(report.id),
+            "action": "view_report",
+        },
+    )
+    return notified_ids, push
 
 
 async def create_attestation(
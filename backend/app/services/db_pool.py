@@ -0,0 +1,97 @@
+"""Connection pool instrumentation.
+
+``InstrumentedAsyncPool`` is SQLAlchemy's asyncio queue pool with timed
+checkouts: every wait for a connection is recorded in ``CHECKOUT_WAITS``,
+including waits that end in a pool timeout. ``pool_status`` snapshots the
+pool's size, in-use and overflow connections together with those waits, for
+the health endpoint and metrics.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class WaitStats:
+    """Cumulative histogram of connection checkout waits."""
+
+    def __init__(self, buckets: tuple[float, ...] = WAIT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.bucket_counts = [0] * len(self.buckets)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+            self.timeouts = 0
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+            if timed_out:
+                self.timeouts += 1
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum_seconds": round(self.sum, 6),
+                "max_seconds": round(self.max, 6),
+                "timeouts": self.timeouts,
+                "buckets": dict(zip(self.buckets, self.bucket_counts)),
+            }
+
+
+CHECKOUT_WAITS = WaitStats()
+
+
+class TimedCheckoutMixin:
+    """Records how long each pool checkout waits for a connection."""
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            CHECKOUT_WAITS.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        CHECKOUT_WAITS.observe(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedAsyncPool(TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """The default asyncio pool, with checkout waits recorded."""
+
+
+def pool_status(pool: Any) -> dict[str, Any]:
+    """Size, usage and checkout waits of ``pool``.
+
+    Pools without a fixed size (``NullPool`` behind PgBouncer) report only
+    the waits, which are then always empty.
+    """
+    status: dict[str, Any] = {"pool": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        status.update(
+            size=pool.size(),
+            in_use=pool.checkedout(),
+            idle=pool.checkedin(),
+            # Negative until the pool has opened ``size`` connections
+            overflow=max(pool.overflow(), 0),
+        )
+    status["checkout_wait"] = CHECKOUT_WAITS.snapshot()
+    return status
@@ -1,13 +1,27 @@
-"""Geo-location clustering service for community challenges."""
+"""Geo-location clustering service for community challenges.
+
+Radius queries narrow rows with the indexed geohash prefix cover plus a
+bounding box, then apply the exact great-circle distance in SQL. Pages are
+ordered by ``(distance, id)`` and sought past with a keyset cursor, and the
+total is a separate ``count()``, so no rows outside the page are loaded and
+totals are exact.
+"""
 from __future__ import annotations
 
 import math
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.challenges import CommunityChallenge
+from ..models.core import User
+from .geohash import bounding_box, cover_radius
+from .pagination import decode_cursor, encode_cursor, keyset_condition
+
+EARTH_RADIUS_KM = 6371.0
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -16,7 +30,7 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     Returns distance in kilometers.
     """
     # Radius of Earth in kilometers
-    R = 6371.0
+    R = EARTH_RADIUS_KM
     
     # Convert latitude and longitude from degrees to radians
     lat1_rad = math.radians(lat1)
@@ -39,68 +53,174 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
-async def get_challenges_in_radius(
+def haversine_sql(latitude: float, longitude: float, lat_column: Any = None, lon_column: Any = None):
+    """SQL expression for the distance in km from a point to each row.
+
+    Measures to the challenge coordinates unless other columns are given.
+    """
+    lat_column = CommunityChallenge.latitude if lat_column is None else lat_column
+    lon_column = CommunityChallenge.longitude if lon_column is None else lon_column
+    lat1 = math.radians(latitude)
+    lat2 = func.radians(lat_column)
+    dlat = lat2 - lat1
+    dlon = func.radians(lon_column) - math.radians(longitude)
+    a = func.power(func.sin(dlat / 2), 2) + math.cos(lat1) * func.cos(lat2) * func.power(func.sin(dlon / 2), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
+
+
+def nearby_users_condition(latitude: float, longitude: float, radius_km: float, county: Optional[str] = None):
+    """WHERE clause matching users whose last known position is within ``radius_km``.
+
+    Users with no known position match on ``county`` instead, when given.
+    """
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+    within_radius = [
+        User.latitude.between(min_lat, max_lat),
+        User.longitude.between(min_lon, max_lon),
+        haversine_sql(latitude, longitude, User.latitude, User.longitude) <= radius_km,
+    ]
+    cells = cover_radius(latitude, longitude, radius_km)
+    if cells != [""]:
+        within_radius.append(or_(*(User.geohash.like(f"{cell}%") for cell in cells)))
+    if not county:
+        return and_(*within_radius)
+    return or_(
+        and_(*within_radius),
+        # No known position: fall back to the county
+        and_(User.latitude.is_(None), User.county == county),
+    )
+
+
+@dataclass
+class RadiusSearchResult:
+    """One page of challenges ordered by distance from the search point."""
+    challenges: list[CommunityChallenge]
+    distances_km: list[float]
+    total: int
+    next_cursor: Optional[str] = None
+
+
+def _radius_conditions(
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+) -> list:
+    """Index-friendly WHERE clauses narrowing rows to the search circle's cover."""
+    min_lat, min_lon, max_lat, max_lon = bounding_box(latitude, longitude, radius_km)
+    conditions = [
+        CommunityChallenge.latitude.between(min_lat, max_lat),
+        CommunityChallenge.longitude.between(min_lon, max_lon),
+    ]
+    cells = cover_radius(latitude, longitude, radius_km)
+    if cells != [""]:
+        conditions.append(or_(*(CommunityChallenge.geohash.like(f"{cell}%") for cell in cells)))
+
+    if category:
+        from ..models.challenges import ChallengeCategory
+        conditions.append(CommunityChallenge.category == ChallengeCategory(category))
+
+    if status:
+        from ..models.challenges import ChallengeStatus
+        conditions.append(CommunityChallenge.status == ChallengeStatus(status))
+    return conditions
+
+
+async def count_challenges_in_radius(
     session: AsyncSession,
     latitude: float,
     longitude: float,
     radius_km: float = 5.0,
     category: Optional[str] = None,
     status: Optional[str] = None,
-    limit: int = 50,
-    offset: int = 0,
-) -> list[CommunityChallenge]:
+) -> int:
     """
-    Get challenges within a specified radius (in kilometers) from a point.
-    Uses a bounding box approximation for initial filtering, then calculates
-    exact distance for final results.
+    Exact number of challenges within ``radius_km`` of a point.
+
+    Counted in the database with the same index-backed cover as the radius
+    search plus the SQL haversine, so no rows are loaded.
     """
-    # Approximate bounding box (rough estimate: 1 degree ≈ 111 km)
-    # This is a quick filter before exact distance calculation
-    lat_delta = radius_km / 111.0
-    lon_delta = radius_km / (111.0 * math.cos(math.radians(latitude)))
-    
-    stmt = select(CommunityChallenge).where(
-        CommunityChallenge.latitude.between(latitude - lat_delta, latitude + lat_delta),
-        CommunityChallenge.longitude.between(longitude - lon_delta, longitude + lon_delta),
+    stmt = select(func.count(CommunityChallenge.id)).where(
+        *_radius_conditions(latitude, longitude, radius_km, category, status),
+        haversine_sql(latitude, longitude) <= radius_km,
     )
-    
-    if category:
-        from ..models.challenges import ChallengeCategory
-        stmt = stmt.where(CommunityChallenge.category == ChallengeCategory(category))
-    
-    if status:
-        from ..models.challenges import ChallengeStatus
-        stmt = stmt.where(CommunityChallenge.status == ChallengeStatus(status))
-    
-    stmt = stmt.limit(limit).offset(offset)
-    
     result = await session.execute(stmt)
-    challenges = result.scalars().all()
-    
-    # Filter by exact distance
-    filtered_challenges = []
-    for challenge in challenges:
-        distance = haversine_distance(
-            latitude, longitude,
-            float(challenge.latitude), float(challenge.longitude)
+    return result.scalar() or 0
+
+
+async def search_challenges_in_radius(
+    session: AsyncSession,
+    latitude: float,
+    longitude: float,
+    radius_km: float = 5.0,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    options: Sequence[Any] = (),
+) -> RadiusSearchResult:
+    """
+    Challenges within ``radius_km`` of a point, nearest first.
+
+    ``cursor`` (from a previous ``next_cursor``) takes precedence over
+    ``offset``. ``options`` (e.g. ``selectinload``) apply to the page load.
+    Raises ValueError for a malformed cursor.
+    """
+    distance = haversine_sql(latitude, longitude)
+    stmt = (
+        select(CommunityChallenge, distance.label("distance_km"))
+        .where(
+            *_radius_conditions(latitude, longitude, radius_km, category, status),
+            distance <= radius_km,
         )
-        if distance <= radius_km:
-            filtered_challenges.append(challenge)
-    
-    return filtered_challenges
+        # (distance, id) is a unique, total order, so pages never overlap
+        .order_by(distance, CommunityChallenge.id)
+        .limit(limit + 1)  # One extra row tells whether there is a next page
+        .options(*options)
+    )
+    if cursor:
+        payload = decode_cursor(cursor)
+        try:
+            last_distance, last_id = float(payload["d"]), UUID(payload["id"])
+        except (KeyError, TypeError) as exc:
+            raise ValueError("Malformed cursor") from exc
+        stmt = stmt.where(keyset_condition(distance, CommunityChallenge.id, last_distance, last_id, descending=False))
+    else:
+        stmt = stmt.offset(offset)
+    rows = (await session.execute(stmt)).all()
+    page = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor({"d": last.distance_km, "id": str(last.CommunityChallenge.id)})
+
+    return RadiusSearchResult(
+        challenges=[row.CommunityChallenge for row in page],
+        distances_km=[row.distance_km for row in page],
+        total=await count_challenges_in_radius(session, latitude, longitude, radius_km, category, status),
+        next_cursor=next_cursor,
+    )
 
 
-async def get_challenges_count_in_radius(
+async def get_challenges_in_radius(
     session: AsyncSession,
     latitude: float,
     longitude: float,
     radius_km: float = 5.0,
     category: Optional[str] = None,
     status: Optional[str] = None,
-) -> int:
-    """Get count of challenges within radius."""
-    challenges = await get_challenges_in_radius(
-        session, latitude, longitude, radius_km, category, status, limit=1000
+    limit: int = 50,
+    offset: int = 0,
+) -> list[CommunityChallenge]:
+    """
+    Get challenges within a specified radius (in kilometers) from a point,
+    nearest first.
+    """
+    result = await search_challenges_in_radius(
+        session, latitude, longitude, radius_km, category, status, limit=limit, offset=offset
     )
-    return len(challenges)
+    return result.challenges
 
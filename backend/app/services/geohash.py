@@ -0,0 +1,145 @@
+"""Geohash encoding and radius cell covers for indexed proximity queries.
+
+A geohash is a base32 string whose prefixes are nested rectangles, so a
+B-tree index on the column answers "everything in this cell" as a prefix
+range scan. ``cover_radius`` picks the finest precision whose cells still
+cover a search circle with a handful of prefixes.
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: index for index, char in enumerate(BASE32)}
+
+# Precision stored on rows; queries use prefixes of it
+STORED_PRECISION = 9
+
+
+def encode(latitude: float, longitude: float, precision: int = STORED_PRECISION) -> str:
+    """Geohash of a point, ``precision`` characters long."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coord = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def decode_bounds(geohash: str) -> tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """(height, width) in degrees of a cell at ``precision``."""
+    bits = precision * 5
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle of ``radius_km``."""
+    lat_delta = radius_km / 111.0
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lon_delta = min(radius_km / (111.0 * cos_lat), 180.0)
+    return (
+        max(latitude - lat_delta, -90.0),
+        max(longitude - lon_delta, -180.0),
+        min(latitude + lat_delta, 90.0),
+        min(longitude + lon_delta, 180.0),
+    )
+
+
+def _cells_for_box(box: tuple[float, float, float, float], precision: int) -> set[str]:
+    min_lat, min_lon, max_lat, max_lon = box
+    height, width = cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            cells.add(encode(lat, lon, precision))
+            if lon >= max_lon:
+                break
+            lon = min(lon + width, max_lon)
+        if lat >= max_lat:
+            break
+        lat = min(lat + height, max_lat)
+    return cells
+
+
+def cover_radius(latitude: float, longitude: float, radius_km: float, max_cells: int = 16) -> list[str]:
+    """Geohash prefixes whose cells together cover the search circle.
+
+    Uses the finest precision that needs at most ``max_cells`` prefixes.
+    """
+    box = bounding_box(latitude, longitude, radius_km)
+    best = [""]
+    for precision in range(1, STORED_PRECISION + 1):
+        height, width = cell_size(precision)
+        estimate = (math.ceil((box[2] - box[0]) / height) + 1) * (math.ceil((box[3] - box[1]) / width) + 1)
+        if estimate > max_cells * 4:
+            break
+        cells = _cells_for_box(box, precision)
+        if len(cells) > max_cells:
+            break
+        best = sorted(cells)
+    return best
+
+
+def precision_for_zoom(zoom: int) -> int:
+    """Finest precision with at most 32 cells across a web map tile at ``zoom``."""
+    # A zoom-z tile spans 360 / 2**z degrees; 5 * precision / 2 bits split longitude
+    return max(1, min(STORED_PRECISION - 1, 2 * (zoom + 5) // 5))
+
+
+def cover_box(
+    box: tuple[float, float, float, float],
+    precision: int,
+    max_cells: Optional[int] = None,
+) -> Optional[list[str]]:
+    """Geohash cells at ``precision`` covering ``(min_lat, min_lon, max_lat, max_lon)``.
+
+    Returns None, without enumerating them, when more than ``max_cells`` would be needed.
+    """
+    if max_cells is not None:
+        height, width = cell_size(precision)
+        estimate = (math.floor((box[2] - box[0]) / height) + 1) * (math.floor((box[3] - box[1]) / width) + 1)
+        if estimate > max_cells:
+            return None
+    cells = sorted(_cells_for_box(box, precision))
+    if max_cells is not None and len(cells) > max_cells:
+        return None
+    return cells
@@ -0,0 +1,73 @@
+"""Handlers for background jobs (see services/jobs.py).
+
+Payloads carry IDs only; handlers reload what they need in the worker's
+session, which the worker commits when the handler returns. Handlers with
+effects outside the database commit first and apply those effects after.
+"""
+from __future__ import annotations
+
+import logging
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..models.challenges import CommunityChallenge
+from ..models.core import Report
+from .jobs import job_handler
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_COMMUNITY = "reports.notify_community"
+NOTIFY_CHALLENGE_CREATED = "challenges.notify_created"
+NOTIFY_STAKEHOLDER_SUPPORT = "challenges.notify_stakeholder_support"
+
+# Queue names; workers can be dedicated to a subset with --queues
+NOTIFICATIONS_QUEUE = "notifications"
+
+
+@job_handler(NOTIFY_COMMUNITY)
+async def notify_community(session: AsyncSession, payload: dict) -> None:
+    """Ask the community to attest newly created reports."""
+    from .community_notifications import notify_community_for_attestation
+
+    report_ids = [UUID(report_id) for report_id in payload["report_ids"]]
+    result = await session.execute(
+        select(Report).where(Report.id.in_(report_ids)).options(selectinload(Report.location))
+    )
+    pushes = []
+    for report in result.scalars().all():
+        if report.location is not None:
+            _, push = await notify_community_for_attestation(
+                session, report, report.location, radius_km=payload.get("radius_km", 10.0)
+            )
+            if push is not None:
+                pushes.append(push)
+
+    # Push only once the notifications are committed; a retry skips users already notified
+    await session.commit()
+    for push in pushes:
+        try:
+            push.enqueue()
+        except Exception as e:
+            # Don't fail the job: the notifications are already in the inbox
+            logger.warning(f"Failed to queue push notifications for report {push.data['report_id']}: {e}")
+
+
+@job_handler(NOTIFY_CHALLENGE_CREATED)
+async def notify_challenge_created(session: AsyncSession, payload: dict) -> None:
+    from .challenge_notifications import notify_challenge_created as notify
+
+    challenge = await session.get(CommunityChallenge, UUID(payload["challenge_id"]))
+    if challenge is not None:
+        await notify(session, challenge, radius_km=payload.get("radius_km", 5.0))
+
+
+@job_handler(NOTIFY_STAKEHOLDER_SUPPORT)
+async def notify_stakeholder_support(session: AsyncSession, payload: dict) -> None:
+    from .challenge_notifications import notify_stakeholder_support as notify
+
+    challenge = await session.get(CommunityChallenge, UUID(payload["challenge_id"]))
+    if challenge is not None:
+        await notify(session, challenge, payload["stakeholder_name"], payload["support_type"])
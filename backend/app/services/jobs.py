@@ -0,0 +1,407 @@
+"""Durable background jobs.
+
+Work that must not run in the request path (notification fan-outs, pushes)
+is written to the ``jobs`` table in the same transaction as the data it
+concerns, so a job exists if and only if that transaction commits. Worker
+processes (``python -m app.worker``) claim due jobs with
+``FOR UPDATE SKIP LOCKED``, run them with bounded concurrency, and retry
+failures with exponential backoff until ``max_attempts`` is reached.
+
+``InMemoryJobQueue`` implements the same interface for tests and local runs
+without PostgreSQL (``JOB_BACKEND=memory``).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Iterable, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..models.jobs import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+_HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(task: str) -> Callable[[JobHandler], JobHandler]:
+    """Register ``func`` as the handler for ``task``."""
+    def decorator(func: JobHandler) -> JobHandler:
+        _HANDLERS[task] = func
+        return func
+    return decorator
+
+
+def get_job_handler(task: str) -> Optional[JobHandler]:
+    return _HANDLERS.get(task)
+
+
+def retry_delay(attempts: int, base: float, maximum: float) -> float:
+    """Exponential backoff with jitter for the retry after ``attempts`` tries."""
+    delay = min(maximum, base * (2 ** max(attempts - 1, 0)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+@dataclass
+class ClaimedJob:
+    """A job leased by a worker."""
+    id: UUID
+    queue: str
+    task: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+@dataclass
+class QueueMetrics:
+    started: int = 0
+    succeeded: int = 0
+    retried: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    runtime_seconds: float = 0.0
+
+
+class JobMetrics:
+    """Per-queue counters kept by a worker process."""
+
+    def __init__(self) -> None:
+        self.queues: dict[str, QueueMetrics] = defaultdict(QueueMetrics)
+
+    def __getitem__(self, queue: str) -> QueueMetrics:
+        return self.queues[queue]
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {queue: asdict(metrics) for queue, metrics in self.queues.items()}
+
+
+class PostgresJobQueue:
+    """Job storage in the ``jobs`` table."""
+
+    def __init__(self, session_factory: Optional[Callable[[], Any]] = None) -> None:
+        self._session_factory = session_factory
+
+    @property
+    def session_factory(self) -> Callable[[], Any]:
+        if self._session_factory is None:
+            from ..database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    async def enqueue(
+        self,
+        session: AsyncSession,
+        task: str,
+        payload: dict,
+        queue: str = "default",
+        run_at: Optional[datetime] = None,
+        max_attempts: int = 5,
+    ) -> UUID:
+        """Add a job to ``session``; it becomes visible when the caller commits."""
+        job = Job(
+            id=uuid4(),
+            queue=queue,
+            task=task,
+            payload=payload,
+            status="queued",
+            attempts=0,
+            max_attempts=max_attempts,
+            run_at=run_at or datetime.utcnow(),
+            created_at=datetime.utcnow(),
+        )
+        session.add(job)
+        return job.id
+
+    async def claim(self, queues: Iterable[str], limit: int, worker_id: str) -> list[ClaimedJob]:
+        """Lease up to ``limit`` due jobs; concurrent workers never get the same job."""
+        due = (
+            select(Job.id)
+            .where(Job.status == "queued", Job.queue.in_(list(queues)), Job.run_at <= datetime.utcnow())
+            .order_by(Job.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id.in_(due))
+            .values(status="running", attempts=Job.attempts + 1, locked_at=datetime.utcnow(), locked_by=worker_id)
+            .returning(Job.id, Job.queue, Job.task, Job.payload, Job.attempts, Job.max_attempts)
+        )
+        async with self.session_factory() as session:
+            result = await session.execute(stmt)
+            jobs = [ClaimedJob(*row) for row in result.all()]
+            await session.commit()
+        return jobs
+
+    async def _finish(self, job_id: UUID, **values: Any) -> None:
+        async with self.session_factory() as session:
+            await session.execute(update(Job).where(Job.id == job_id).values(locked_at=None, locked_by=None, **values))
+            await session.commit()
+
+    async def complete(self, job: ClaimedJob) -> None:
+        await self._finish(job.id, status="done", finished_at=datetime.utcnow(), last_error=None)
+
+    async def retry(self, job: ClaimedJob, error: str, delay: float) -> None:
+        run_at = datetime.utcnow() + timedelta(seconds=delay)
+        await self._finish(job.id, status="queued", run_at=run_at, last_error=error)
+
+    async def fail(self, job: ClaimedJob, error: str) -> None:
+        await self._finish(job.id, status="failed", finished_at=datetime.utcnow(), last_error=error)
+
+    async def requeue_stale(self, older_than: timedelta) -> int:
+        """Return jobs whose worker died mid-run to the queue."""
+        cutoff = datetime.utcnow() - older_than
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(Job)
+                .where(Job.status == "running", Job.locked_at < cutoff)
+                .values(status="queued", locked_at=None, locked_by=None, run_at=datetime.utcnow())
+            )
+            await session.commit()
+            return result.rowcount or 0
+
+    async def depths(self) -> dict[str, dict[str, int]]:
+        """Job counts by queue and status."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Job.queue, Job.status, func.count(Job.id)).group_by(Job.queue, Job.status)
+            )
+            depths: dict[str, dict[str, int]] = defaultdict(dict)
+            for queue, status, count in result.all():
+                depths[queue][status] = count
+            return dict(depths)
+
+
+class InMemoryJobQueue:
+    """Process-local job storage with the same semantics as ``PostgresJobQueue``."""
+
+    def __init__(self) -> None:
+        self.jobs: dict[UUID, dict[str, Any]] = {}
+
+    async def enqueue(
+        self,
+        session: Any,
+        task: str,
+        payload: dict,
+        queue: str = "default",
+        run_at: Optional[datetime] = None,
+        max_attempts: int = 5,
+    ) -> UUID:
+        job_id = uuid4()
+        self.jobs[job_id] = {
+            "id": job_id,
+            "queue": queue,
+            "task": task,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": run_at or datetime.utcnow(),
+            "last_error": None,
+        }
+        return job_id
+
+    async def claim(self, queues: Iterable[str], limit: int, worker_id: str) -> list[ClaimedJob]:
+        queues = set(queues)
+        now = datetime.utcnow()
+        due = sorted(
+            (job for job in self.jobs.values() if job["status"] == "queued" and job["queue"] in queues and job["run_at"] <= now),
+            key=lambda job: job["run_at"],
+        )[:limit]
+        claimed = []
+        for job in due:
+            job["status"] = "running"
+            job["attempts"] += 1
+            claimed.append(
+                ClaimedJob(job["id"], job["queue"], job["task"], job["payload"], job["attempts"], job["max_attempts"])
+            )
+        return claimed
+
+    async def complete(self, job: ClaimedJob) -> None:
+        self.jobs[job.id]["status"] = "done"
+
+    async def retry(self, job: ClaimedJob, error: str, delay: float) -> None:
+        self.jobs[job.id].update(
+            status="queued", last_error=error, run_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+
+    async def fail(self, job: ClaimedJob, error: str) -> None:
+        self.jobs[job.id].update(status="failed", last_error=error)
+
+    async def requeue_stale(self, older_than: timedelta) -> int:
+        return 0
+
+    async def depths(self) -> dict[str, dict[str, int]]:
+        depths: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for job in self.jobs.values():
+            depths[job["queue"]][job["status"]] += 1
+        return {queue: dict(counts) for queue, counts in depths.items()}
+
+
+class Worker:
+    """Claims jobs from ``queues`` and runs at most ``concurrency`` at a time."""
+
+    def __init__(
+        self,
+        backend: PostgresJobQueue | InMemoryJobQueue,
+        queues: Iterable[str] = ("default",),
+        concurrency: int = 8,
+        poll_interval: float = 1.0,
+        session_factory: Optional[Callable[[], Any]] = None,
+        backoff_base: float = 5.0,
+        backoff_max: float = 600.0,
+        visibility_timeout: float = 900.0,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self.backend = backend
+        self.queues = list(queues)
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._session_factory = session_factory
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.visibility_timeout = visibility_timeout
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.metrics = JobMetrics()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def session_factory(self) -> Callable[[], Any]:
+        if self._session_factory is None:
+            from ..database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def run_once(self) -> int:
+        """Claim as many jobs as there are free slots and start them. Returns the number claimed."""
+        free = self.concurrency - self.in_flight
+        if free <= 0:
+            return 0
+        jobs = await self.backend.claim(self.queues, free, self.worker_id)
+        for job in jobs:
+            await self._slots.acquire()
+            task = asyncio.create_task(self._execute(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(jobs)
+
+    async def drain(self) -> None:
+        """Wait for running jobs to finish."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Poll until ``stop`` is set, then finish in-flight jobs."""
+        stop = stop or asyncio.Event()
+        last_sweep = 0.0
+        while not stop.is_set():
+            if time.monotonic() - last_sweep > self.visibility_timeout / 3:
+                last_sweep = time.monotonic()
+                try:
+                    requeued = await self.backend.requeue_stale(timedelta(seconds=self.visibility_timeout))
+                    if requeued:
+                        logger.warning(f"Requeued {requeued} stale job(s)")
+                except Exception as e:
+                    logger.error(f"Stale job sweep failed: {e}")
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Job claim failed: {e}", exc_info=True)
+                claimed = 0
+            if not claimed:
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        await self.drain()
+
+    async def _execute(self, job: ClaimedJob) -> None:
+        metrics = self.metrics[job.queue]
+        metrics.started += 1
+        metrics.in_flight += 1
+        started = time.monotonic()
+        try:
+            handler = get_job_handler(job.task)
+            if handler is None:
+                raise LookupError(f"No handler registered for task '{job.task}'")
+            async with self.session_factory() as session:
+                try:
+                    await handler(session, job.payload)
+                    await session.commit()
+                except Exception:
+                    await session.rollback()
+                    raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts >= job.max_attempts:
+                logger.error(f"Job {job.id} ({job.task}) failed permanently: {error}")
+                metrics.failed += 1
+                await self.backend.fail(job, error)
+            else:
+                delay = retry_delay(job.attempts, self.backoff_base, self.backoff_max)
+                logger.warning(f"Job {job.id} ({job.task}) failed, retrying in {delay:.1f}s: {error}")
+                metrics.retried += 1
+                await self.backend.retry(job, error, delay)
+        else:
+            metrics.succeeded += 1
+            await self.backend.complete(job)
+        finally:
+            metrics.in_flight -= 1
+            metrics.runtime_seconds += time.monotonic() - started
+            self._slots.release()
+
+
+_backend: PostgresJobQueue | InMemoryJobQueue | None = None
+
+
+def get_job_queue() -> PostgresJobQueue | InMemoryJobQueue:
+    """Process-wide job backend selected by ``JOB_BACKEND``."""
+    global _backend
+    if _backend is None:
+        _backend = InMemoryJobQueue() if get_settings().job_backend == "memory" else PostgresJobQueue()
+    return _backend
+
+
+def set_job_queue(backend: PostgresJobQueue | InMemoryJobQueue | None) -> None:
+    """Swap the process-wide backend (tests); None re-reads settings on next use."""
+    global _backend
+    _backend = backend
+
+
+async def enqueue_job(
+    session: AsyncSession,
+    task: str,
+    payload: dict,
+    queue: str = "default",
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+) -> UUID:
+    """Enqueue ``task`` inside the caller's transaction."""
+    return await get_job_queue().enqueue(
+        session,
+        task,
+        payload,
+        queue=queue,
+        run_at=run_at,
+        max_attempts=max_attempts or get_settings().job_max_attempts,
+    )
@@ -0,0 +1,232 @@
+"""Prometheus metrics for the API process (requires prometheus-client).
+
+* HTTP: request counts and latency by method, route template and status, and
+  in-flight requests (recorded by ``MetricsMiddleware``).
+* Database: statement latency by fingerprint (SQLAlchemy cursor events, see
+  ``query_stats.instrument_engine``), plus connection pool usage and checkout waits.
+* Background work: asyncio tasks on the event loop, push dispatcher
+  deliveries and queue depth, and, in a job worker, jobs by queue and outcome.
+
+Pool, task and push figures are read when Prometheus scrapes, so they cost
+nothing between scrapes. Route templates and statement fingerprints keep the
+label sets bounded; statements beyond ``max_fingerprints`` are grouped as
+``other``. Metrics are per process: with several workers, scrape each one.
+Push delivery happens in ``app.worker``, which serves the same families on
+``worker_metrics_port`` (``serve``); the API's push figures stay at zero
+unless it runs jobs itself (``JOB_BACKEND=memory``).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+from typing import Any, Iterator, Optional
+
+from ..config import get_settings
+from .db_pool import pool_status
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        start_http_server,
+    )
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+except ImportError:
+    CollectorRegistry = None
+
+logger = logging.getLogger(__name__)
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+_PLACEHOLDERS = re.compile(r"\$\d+|%\(\w+\)s|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+\"?(\w+)", re.IGNORECASE)
+
+_normalized: dict[str, str] = {}
+
+
+def normalize_statement(statement: str) -> str:
+    """``statement`` with parameters, literals and IN-list lengths replaced by ``?``."""
+    normalized = _normalized.get(statement)
+    if normalized is None:
+        normalized = _WHITESPACE.sub(" ", _PLACEHOLDERS.sub("?", statement)).strip()
+        normalized = _LISTS.sub("(?, ...)", normalized)
+        if len(_normalized) >= 4096:  # SQLAlchemy's compiled cache keeps the set of statements small
+            _normalized.clear()
+        _normalized[statement] = normalized
+    return normalized
+
+
+def statement_fingerprint(statement: str) -> str:
+    """A short, stable label for a statement shape, e.g. ``SELECT reports 3fa2c1d0``."""
+    normalized = normalize_statement(statement)
+    operation = normalized.split(" ", 1)[0].upper()
+    table = _TABLE.search(normalized)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:8]
+    return f"{operation} {table.group(1) if table else '-'} {digest}"
+
+
+class Metrics:
+    """The API's metric families, in their own registry."""
+
+    def __init__(self, max_fingerprints: int = 500) -> None:
+        if CollectorRegistry is None:
+            raise RuntimeError("prometheus-client is not installed")
+        self.max_fingerprints = max_fingerprints
+        self._fingerprints: set[str] = set()
+        self.engine: Any = None
+        self.jobs: Any = None  # A worker's JobMetrics, see track_jobs()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.registry = CollectorRegistry()
+        self.http_requests = Counter(
+            "http_requests_total", "HTTP requests", ["method", "route", "status"], registry=self.registry
+        )
+        self.http_duration = Histogram(
+            "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"],
+            buckets=HTTP_BUCKETS, registry=self.registry,
+        )
+        self.http_in_flight = Gauge(
+            "http_requests_in_flight", "HTTP requests being served", ["method", "route"], registry=self.registry
+        )
+        self.db_duration = Histogram(
+            "db_statement_duration_seconds", "Database statement latency by statement fingerprint",
+            ["fingerprint"], buckets=DB_BUCKETS, registry=self.registry,
+        )
+        self.db_errors = Counter(
+            "db_statement_errors_total", "Database statements that raised", ["fingerprint"], registry=self.registry
+        )
+        self.registry.register(_RuntimeCollector(self))
+
+    def fingerprint_label(self, statement: str) -> str:
+        fingerprint = statement_fingerprint(statement)
+        if fingerprint not in self._fingerprints:
+            if len(self._fingerprints) >= self.max_fingerprints:
+                return "other"
+            self._fingerprints.add(fingerprint)
+            logger.debug(f"Statement fingerprint {fingerprint}: {normalize_statement(statement)}")
+        return fingerprint
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        self.http_requests.labels(method, route, status).inc()
+        self.http_duration.labels(method, route, status).observe(seconds)
+
+    def observe_statement(self, statement: str, seconds: float, failed: bool = False) -> None:
+        fingerprint = self.fingerprint_label(statement)
+        self.db_duration.labels(fingerprint).observe(seconds)
+        if failed:
+            self.db_errors.labels(fingerprint).inc()
+
+    def track_engine(self, engine: Any) -> None:
+        """Report ``engine``'s pool at scrape time.
+
+        Statement timings come from ``query_stats.instrument_engine(engine, metrics=...)``.
+        """
+        self.engine = engine
+
+    def render(self) -> tuple[bytes, str]:
+        """Exposition-format body and content type."""
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+    def track_jobs(self, job_metrics: Any) -> None:
+        """Report a worker's per-queue job counters at scrape time."""
+        self.jobs = job_metrics
+
+    def serve(self, port: int, addr: str = "127.0.0.1") -> None:
+        """Serve ``/metrics`` from a background thread (processes without an HTTP app).
+
+        The server does not check ``metrics_token``, so only bind ``addr``
+        beyond loopback on a network that Prometheus alone can reach. Call
+        from the event loop so task counts come from it rather than the
+        server thread.
+        """
+        self.loop = asyncio.get_running_loop()
+        start_http_server(port, addr=addr, registry=self.registry)
+
+
+class _RuntimeCollector:
+    """Pool, event loop and push dispatcher figures, read at scrape time."""
+
+    def __init__(self, metrics: Metrics) -> None:
+        self.metrics = metrics
+
+    def describe(self) -> list[Any]:
+        return []  # Nothing to check at registration; avoids a collect() at startup
+
+    def collect(self) -> Iterator[Any]:
+        if self.metrics.engine is not None:
+            yield from _pool_metrics(pool_status(self.metrics.engine.pool))
+
+        try:
+            tasks = len(asyncio.all_tasks(self.metrics.loop))
+        except RuntimeError:  # Scraped outside the event loop
+            tasks = 0
+        yield GaugeMetricFamily("asyncio_tasks", "Tasks on the event loop, including in-flight requests", value=tasks)
+
+        from .push_dispatcher import get_push_dispatcher
+        dispatcher = get_push_dispatcher()
+        deliveries = CounterMetricFamily("push_deliveries", "Push notifications by outcome", labels=["outcome"])
+        for outcome in ("sent", "failed", "dropped", "invalid_tokens"):
+            deliveries.add_metric([outcome], getattr(dispatcher.stats, outcome))
+        yield deliveries
+        yield CounterMetricFamily("push_batches", "Push batches handed to providers", value=dispatcher.stats.batches)
+        yield GaugeMetricFamily("push_queue_depth", "Pushes waiting for the dispatcher", value=dispatcher.queue_depth)
+        yield GaugeMetricFamily("push_dispatcher_running", "1 while the push worker task runs",
+                                value=int(dispatcher.running))
+
+        if self.metrics.jobs is not None:
+            yield from _job_metrics(self.metrics.jobs.snapshot())
+
+
+def _job_metrics(queues: dict[str, dict[str, Any]]) -> Iterator[Any]:
+    jobs = CounterMetricFamily("jobs", "Background jobs finished, by queue and outcome", labels=["queue", "outcome"])
+    in_flight = GaugeMetricFamily("jobs_in_flight", "Background jobs running", labels=["queue"])
+    runtime = CounterMetricFamily("jobs_runtime_seconds", "Time spent running background jobs", labels=["queue"])
+    for queue, counts in queues.items():
+        for outcome in ("succeeded", "retried", "failed"):
+            jobs.add_metric([queue, outcome], counts[outcome])
+        in_flight.add_metric([queue], counts["in_flight"])
+        runtime.add_metric([queue], counts["runtime_seconds"])
+    yield from (jobs, in_flight, runtime)
+
+
+def _pool_metrics(status: dict[str, Any]) -> Iterator[Any]:
+    for key, help_text in (
+        ("size", "Connections the pool keeps open"),
+        ("in_use", "Connections checked out"),
+        ("idle", "Connections waiting in the pool"),
+        ("overflow", "Connections open beyond the pool size"),
+    ):
+        if key in status:
+            yield GaugeMetricFamily(f"db_pool_{key}", help_text, value=status[key])
+    waits = status["checkout_wait"]
+    yield HistogramMetricFamily(
+        "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+        buckets=[(str(bound), count) for bound, count in waits["buckets"].items()] + [("+Inf", waits["count"])],
+        sum_value=waits["sum_seconds"],
+    )
+    yield CounterMetricFamily("db_pool_checkout_timeouts", "Checkouts that hit the pool timeout", value=waits["timeouts"])
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Optional[Metrics]:
+    """Process-wide metrics, or None when prometheus-client is not installed."""
+    global _metrics
+    if _metrics is None and CollectorRegistry is not None:
+        _metrics = Metrics(max_fingerprints=get_settings().metrics_max_statement_fingerprints)
+    return _metrics
+
+
+def set_metrics(metrics: Optional[Metrics]) -> None:
+    """Swap the process-wide metrics (tests); None rebuilds them on next use."""
+    global _metrics
+    _metrics = metrics
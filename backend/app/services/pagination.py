@@ -0,0 +1,115 @@
+"""Keyset (cursor) pagination and count helpers for list endpoints.
+
+OFFSET paging makes the database walk and discard every skipped row, so deep
+pages get slower as tables grow. Keyset paging instead seeks past the last
+row the client saw, using ``(sort column, id)`` as a unique, index-friendly
+key. Cursors are opaque base64url-encoded JSON so their shape can change
+without breaking clients.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import and_, or_, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, Select
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """Encode a cursor payload as an opaque URL-safe string."""
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Decode a cursor produced by ``encode_cursor``. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not isinstance(payload, dict):
+        raise ValueError("Malformed cursor")
+    return payload
+
+
+def parse_cursor_value(value: Any, python_type: type) -> Any:
+    """Turn a JSON cursor value back into the sort column's Python type."""
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def keyset_condition(
+    sort_column: ColumnElement,
+    id_column: ColumnElement,
+    last_value: Any,
+    last_id: Any,
+    descending: bool,
+) -> ColumnElement:
+    """Build the WHERE clause that seeks past ``(last_value, last_id)``.
+
+    Assumes the query orders by ``sort_column`` (NULLS LAST) then ``id_column``
+    in the same direction. A NULL ``last_value`` means the previous page ended
+    inside the NULL tail, where only the id decides.
+    """
+    if last_value is None:
+        id_cmp = id_column < last_id if descending else id_column > last_id
+        return and_(sort_column.is_(None), id_cmp)
+    if descending:
+        past = tuple_(sort_column, id_column) < tuple_(last_value, last_id)
+    else:
+        past = tuple_(sort_column, id_column) > tuple_(last_value, last_id)
+    return or_(past, sort_column.is_(None))
+
+
+class CountCache:
+    """Small TTL cache for expensive COUNT(*) results, keyed by filter tuple."""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 1024) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, tuple[float, int]] = {}
+
+    def get(self, key: Hashable) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: int) -> None:
+        if len(self._entries) >= self.max_entries:
+            # Drop the entry closest to expiry
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            self._entries.pop(oldest, None)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+async def estimate_count(session: AsyncSession, stmt: Select) -> Optional[int]:
+    """Row estimate for ``stmt`` from the PostgreSQL planner (no rows are read).
+
+    Returns None when the estimate is unavailable.
+    """
+    compiled = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar() if result is not None else None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (TypeError, KeyError, IndexError):
+        return None
@@ -0,0 +1,83 @@
+"""Bounded thread pool for password hashing.
+
+bcrypt deliberately takes tens to hundreds of milliseconds per call. Run on
+the event loop it stalls every other request on the worker, so the auth
+endpoints hand hashing and verification to a small thread pool instead
+(bcrypt releases the GIL while it works).
+
+The pool is bounded twice: ``password_hash_workers`` threads run at once, and
+at most ``password_hash_max_pending`` calls may be running or queued. Beyond
+that, callers get ``PasswordHasherBusy`` immediately rather than joining an
+ever-growing queue during a login storm; the API turns it into a 503 with
+``Retry-After``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password operations are already running or queued."""
+
+
+class PasswordHasher:
+    """Runs blocking password functions on a dedicated, bounded thread pool."""
+
+    def __init__(self, workers: int = 4, max_pending: int = 64) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` on the pool; raises ``PasswordHasherBusy`` when full."""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy(f"{self.pending} password operations pending")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop the threads once queued work finishes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Process-wide password hasher configured from settings."""
+    global _hasher
+    if _hasher is None:
+        settings = get_settings()
+        _hasher = PasswordHasher(
+            workers=settings.password_hash_workers,
+            max_pending=settings.password_hash_max_pending,
+        )
+    return _hasher
+
+
+def set_password_hasher(hasher: Optional[PasswordHasher]) -> None:
+    """Swap the process-wide hasher (tests); None rebuilds it from settings on next use."""
+    global _hasher
+    _hasher = hasher
@@ -7,20 +7,12 @@ from ..models.core import Report
 from ..models.notifications import Attestation
 
 
-async def calculate_priority_score(
-    session: AsyncSession,
-    report: Report,
-) -> float:
+def score_report(report: Report, confirm_count: int = 0) -> float:
     """
-    Calculate priority score (0.0-1.0) for a report.
+    Score a report (0.0-1.0) from its own fields and a known confirmation count.
     
-    Factors considered:
-    - Severity level
-    - Number of attestations (confirmations)
-    - Time since creation (urgency)
-    - Category importance
-    - AI severity score (if available)
-    - Witness count
+    Pure and synchronous, so batch paths can score reports in memory before
+    they are inserted (new reports have no attestations yet).
     """
     score = 0.0
     
@@ -35,14 +27,6 @@ async def calculate_priority_score(
     score += severity_score * 0.4
     
     # 2. Attestation count (20% of score)
-    from sqlalchemy import select, func
-    attestation_stmt = select(func.count(Attestation.id)).where(
-        Attestation.report_id == report.id,
-        Attestation.action == "confirm",
-    )
-    attestation_result = await session.execute(attestation_stmt)
-    confirm_count = attestation_result.scalar() or 0
-    
     # Normalize: 0 confirmations = 0, 5+ confirmations = 1.0
     attestation_score = min(confirm_count / 5.0, 1.0)
     score += attestation_score * 0.2
@@ -70,6 +54,32 @@ async def calculate_priority_score(
     return min(max(score, 0.0), 1.0)
 
 
+async def calculate_priority_score(
+    session: AsyncSession,
+    report: Report,
+) -> float:
+    """
+    Calculate priority score (0.0-1.0) for a report.
+    
+    Factors considered:
+    - Severity level
+    - Number of attestations (confirmations)
+    - Time since creation (urgency)
+    - Category importance
+    - AI severity score (if available)
+    - Witness count
+    """
+    from sqlalchemy import select, func
+    attestation_stmt = select(func.count(Attestation.id)).where(
+        Attestation.report_id == report.id,
+        Attestation.action == "confirm",
+    )
+    attestation_result = await session.execute(attestation_stmt)
+    confirm_count = attestation_result.scalar() or 0
+    
+    return score_report(report, confirm_count)
+
+
 async def update_report_priority(
     session: AsyncSession,
     report: Report,
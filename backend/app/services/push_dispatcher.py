@@ -0,0 +1,206 @@
+"""Long-lived, batched push notification sender.
+
+Request handlers and fan-outs call ``enqueue`` and return immediately. A
+single background worker drains the queue in batches: one device-token
+query per batch, then one provider call per (message, platform) through
+``PushNotificationService.send_to_rows`` on a shared service that
+initializes FCM/APNs once per process instead of once per recipient. Tokens the providers reject are
+deactivated with one UPDATE per batch.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+from uuid import UUID
+
+from ..config import get_settings
+from .push_notifications import (
+    PushNotificationService,
+    deactivate_tokens,
+    get_push_service,
+    get_tokens_for_users,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PushMessage:
+    """Payload shared by every recipient of one notification."""
+    title: str
+    body: str
+    data_json: str = "{}"
+
+    @property
+    def data(self) -> dict[str, Any]:
+        return json.loads(self.data_json)
+
+
+@dataclass
+class DispatchStats:
+    batches: int = 0
+    recipients: int = 0
+    sent: int = 0
+    failed: int = 0
+    skipped: int = 0  # Tokens for a platform without a configured provider
+    dropped: int = 0
+    invalid_tokens: int = 0
+
+
+class PushDispatcher:
+    """Queue plus background worker that sends pushes in batches."""
+
+    def __init__(
+        self,
+        service_factory: Callable[[], PushNotificationService] = get_push_service,
+        session_factory: Optional[Callable[[], Any]] = None,
+        batch_size: int = 500,
+        flush_interval: float = 0.25,
+        max_queue: int = 10_000,
+    ) -> None:
+        self.service_factory = service_factory
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.stats = DispatchStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Start the worker on the running event loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self.running and self._worker.get_loop() is loop:
+            return
+        # First start, or the previous worker's loop has gone away
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker = loop.create_task(self._run())
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the worker, sending whatever is still queued when ``drain``."""
+        if drain:
+            await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def flush(self) -> None:
+        """Wait until every queued push has been handed to a provider."""
+        if self._queue is not None and self.running:
+            await self._queue.join()
+
+    def enqueue(
+        self,
+        user_ids: Iterable[UUID | str],
+        title: str,
+        body: str,
+        data: Optional[dict[str, Any]] = None,
+    ) -> int:
+        """Queue one push per user without waiting. Returns how many were queued."""
+        self.start()
+        message = PushMessage(title, body, json.dumps(data or {}, sort_keys=True, default=str))
+        queued = dropped = 0
+        for user_id in user_ids:
+            try:
+                self._queue.put_nowait((str(user_id), message))
+                queued += 1
+            except asyncio.QueueFull:
+                dropped += 1
+        if dropped:
+            self.stats.dropped += dropped
+            logger.warning(f"Push queue full; dropped {dropped} notification(s)")
+        return queued
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                logger.error(f"Push batch of {len(batch)} failed: {e}", exc_info=True)
+                self.stats.failed += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _session(self) -> Any:
+        session_factory = self.session_factory
+        if session_factory is None:
+            from ..database import SessionLocal
+            session_factory = SessionLocal
+        return session_factory()
+
+    async def _load_tokens(self, user_ids: set[str]) -> list[Any]:
+        async with self._session() as session:
+            return await get_tokens_for_users(session, user_ids)
+
+    async def _deactivate_tokens(self, tokens: list[str]) -> None:
+        async with self._session() as session:
+            await deactivate_tokens(session, tokens)
+            await session.commit()
+
+    async def _send_batch(self, batch: list[tuple[str, PushMessage]]) -> None:
+        self.stats.batches += 1
+        self.stats.recipients += len(batch)
+        token_rows = await self._load_tokens({user_id for user_id, _ in batch})
+        rows_by_user: dict[str, list[Any]] = defaultdict(list)
+        for row in token_rows:
+            rows_by_user[str(row.user_id)].append(row)
+
+        # One send_to_rows per distinct message, i.e. one provider call per message and platform
+        rows_by_message: dict[PushMessage, list[Any]] = defaultdict(list)
+        for user_id, message in batch:
+            rows_by_message[message].extend(rows_by_user.get(user_id, ()))
+
+        service = self.service_factory()
+        invalid_tokens: list[str] = []
+        for message, rows in rows_by_message.items():
+            result = await service.send_to_rows(rows, message.title, message.body, message.data)
+            self.stats.sent += result["sent"]
+            self.stats.failed += result["failed"]
+            self.stats.skipped += result["skipped"]
+            invalid_tokens.extend(result["invalid_tokens"])
+        if invalid_tokens:
+            self.stats.invalid_tokens += len(invalid_tokens)
+            await self._deactivate_tokens(invalid_tokens)
+
+
+_dispatcher: Optional[PushDispatcher] = None
+
+
+def get_push_dispatcher() -> PushDispatcher:
+    """Process-wide dispatcher (started by the app lifespan or on first use)."""
+    global _dispatcher
+    if _dispatcher is None:
+        settings = get_settings()
+        _dispatcher = PushDispatcher(
+            batch_size=settings.push_batch_size,
+            flush_interval=settings.push_flush_interval_seconds,
+        )
+    return _dispatcher
@@ -0,0 +1,331 @@
+"""Pooled, concurrent delivery to FCM and APNs.
+
+One ``PushGateway`` per process holds a single ``httpx.AsyncClient`` whose
+keep-alive connections are reused for every send (multiplexed over HTTP/2
+when the ``h2`` package is installed; APNs only speaks HTTP/2, so it stays
+disabled without it). Tokens are sent in multicast-sized
+chunks of up to 500, with the requests in each chunk in flight at once,
+bounded by ``push_concurrency``. Both providers are called over their HTTP
+APIs (FCM HTTP v1, APNs provider API), so nothing blocks the event loop.
+
+Tokens the provider reports as unregistered come back in
+``DeliveryResult.invalid_tokens`` for the caller to deactivate in bulk.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+from ..config import get_settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FCM_MULTICAST_LIMIT = 500
+APNS_PRODUCTION_URL = "https://api.push.apple.com"
+APNS_SANDBOX_URL = "https://api.sandbox.push.apple.com"
+
+SENT = "sent"
+FAILED = "failed"
+INVALID = "invalid"
+
+# Provider errors meaning the token will never work again
+FCM_INVALID_TOKEN_ERRORS = {"UNREGISTERED"}
+APNS_INVALID_TOKEN_REASONS = {"BadDeviceToken", "DeviceTokenNotForTopic", "Unregistered"}
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of one ``PushGateway.send`` call."""
+    sent: int = 0
+    failed: int = 0
+    invalid_tokens: list[str] = field(default_factory=list)
+
+    def record(self, token: str, outcome: str) -> None:
+        if outcome == SENT:
+            self.sent += 1
+        else:
+            self.failed += 1
+            if outcome == INVALID:
+                self.invalid_tokens.append(token)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"sent": self.sent, "failed": self.failed, "invalid_tokens": self.invalid_tokens}
+
+
+class FCMAuth:
+    """OAuth2 access tokens for the FCM HTTP v1 API (requires google-auth)."""
+
+    SCOPES = ["https://www.googleapis.com/auth/firebase.messaging"]
+
+    def __init__(self, credentials_path: Optional[str] = None) -> None:
+        import google.auth
+        from google.oauth2 import service_account
+
+        if credentials_path:
+            self._credentials = service_account.Credentials.from_service_account_file(
+                credentials_path, scopes=self.SCOPES
+            )
+        else:
+            # Application default credentials (GCP environments)
+            self._credentials, _ = google.auth.default(scopes=self.SCOPES)
+
+    async def token(self) -> str:
+        if not self._credentials.valid:
+            from google.auth.transport.requests import Request
+            # Token refresh is a blocking HTTP call; keep it off the event loop
+            await asyncio.to_thread(self._credentials.refresh, Request())
+        return self._credentials.token
+
+
+class APNsAuth:
+    """ES256 provider tokens for APNs, re-signed before Apple's one-hour limit."""
+
+    REFRESH_SECONDS = 50 * 60
+
+    def __init__(self, key: str, key_id: str, team_id: str) -> None:
+        self.key = key
+        self.key_id = key_id
+        self.team_id = team_id
+        self._token: Optional[str] = None
+        self._issued_at = 0.0
+
+    @classmethod
+    def from_file(cls, key_path: str, key_id: str, team_id: str) -> "APNsAuth":
+        with open(key_path) as key_file:
+            return cls(key_file.read(), key_id, team_id)
+
+    def token(self) -> str:
+        now = time.time()
+        if self._token is None or now - self._issued_at > self.REFRESH_SECONDS:
+            from jose import jwt
+            self._token = jwt.encode(
+                {"iss": self.team_id, "iat": int(now)},
+                self.key,
+                algorithm="ES256",
+                headers={"kid": self.key_id},
+            )
+            self._issued_at = now
+        return self._token
+
+
+class PushGateway:
+    """Process-wide FCM/APNs sender over a shared connection pool."""
+
+    def __init__(
+        self,
+        fcm_project_id: Optional[str] = None,
+        fcm_auth: Optional[Any] = None,
+        apns_auth: Optional[Any] = None,
+        apns_topic: str = "com.talkam.liberia",
+        fcm_base_url: str = "https://fcm.googleapis.com",
+        apns_base_url: str = APNS_PRODUCTION_URL,
+        max_connections: int = 20,
+        concurrency: int = 200,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.fcm_project_id = fcm_project_id
+        self.fcm_auth = fcm_auth
+        self.apns_auth = apns_auth
+        self.apns_topic = apns_topic
+        self.fcm_base_url = fcm_base_url.rstrip("/")
+        self.apns_base_url = apns_base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def fcm_enabled(self) -> bool:
+        return bool(self.fcm_project_id) and self.fcm_auth is not None
+
+    @property
+    def apns_enabled(self) -> bool:
+        return self.apns_auth is not None
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # First use, or the previous client's loop has gone away
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE and self.transport is None,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+            self._client_loop = loop
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    async def send(
+        self,
+        tokens: list[str],
+        title: str,
+        body: str,
+        data: Optional[dict[str, Any]] = None,
+        platform: str = "android",
+    ) -> DeliveryResult:
+        """Send one notification to ``tokens`` (APNs for 'ios', FCM otherwise)."""
+        result = DeliveryResult()
+        if not tokens:
+            return result
+        client = self._ensure_client()
+        if platform == "ios":
+            send_one = self._apns_sender(client, title, body, data)
+        else:
+            send_one = await self._fcm_sender(client, title, body, data)
+
+        for start in range(0, len(tokens), FCM_MULTICAST_LIMIT):
+            chunk = tokens[start:start + FCM_MULTICAST_LIMIT]
+            outcomes = await asyncio.gather(*(self._bounded(send_one, token) for token in chunk))
+            for token, outcome in zip(chunk, outcomes):
+                result.record(token, outcome)
+        if result.failed:
+            logger.warning(
+                f"Push to {len(tokens)} {platform} token(s): {result.failed} failed, "
+                f"{len(result.invalid_tokens)} invalid"
+            )
+        return result
+
+    async def _bounded(self, send_one: Callable[[str], Awaitable[str]], token: str) -> str:
+        async with self._slots:
+            try:
+                return await send_one(token)
+            except httpx.HTTPError as e:
+                logger.debug(f"Push request failed for token {token[:20]}...: {e}")
+                return FAILED
+
+    async def _fcm_sender(
+        self,
+        client: httpx.AsyncClient,
+        title: str,
+        body: str,
+        data: Optional[dict[str, Any]],
+    ) -> Callable[[str], Awaitable[str]]:
+        url = f"{self.fcm_base_url}/v1/projects/{self.fcm_project_id}/messages:send"
+        headers = {"Authorization": f"Bearer {await self.fcm_auth.token()}"}
+        notification = {"title": title, "body": body}
+        payload_data = {str(k): str(v) for k, v in (data or {}).items()}
+
+        async def send_one(token: str) -> str:
+            response = await client.post(
+                url,
+                headers=headers,
+                json={"message": {"token": token, "notification": notification, "data": payload_data}},
+            )
+            if response.status_code == 200:
+                return SENT
+            try:
+                error = response.json().get("error", {})
+            except ValueError:
+                error = {}
+            codes = {error.get("status")} | {
+                detail.get("errorCode") for detail in error.get("details", []) if isinstance(detail, dict)
+            }
+            if response.status_code == 404 or codes & FCM_INVALID_TOKEN_ERRORS:
+                return INVALID
+            return FAILED
+
+        return send_one
+
+    def _apns_sender(
+        self,
+        client: httpx.AsyncClient,
+        title: str,
+        body: str,
+        data: Optional[dict[str, Any]],
+    ) -> Callable[[str], Awaitable[str]]:
+        headers = {
+            "authorization": f"bearer {self.apns_auth.token()}",
+            "apns-topic": self.apns_topic,
+            "apns-push-type": "alert",
+        }
+        payload = {"aps": {"alert": {"title": title, "body": body}, "badge": 1, "sound": "default"}, **(data or {})}
+
+        async def send_one(token: str) -> str:
+            response = await client.post(f"{self.apns_base_url}/3/device/{token}", headers=headers, json=payload)
+            if response.status_code == 200:
+                return SENT
+            if response.status_code == 410:
+                return INVALID
+            try:
+                reason = response.json().get("reason")
+            except ValueError:
+                reason = None
+            return INVALID if reason in APNS_INVALID_TOKEN_REASONS else FAILED
+
+        return send_one
+
+
+def _gateway_from_settings() -> PushGateway:
+    settings = get_settings()
+    fcm_auth = apns_auth = None
+    if settings.fcm_project_id:
+        try:
+            fcm_auth = FCMAuth(settings.fcm_credentials_path)
+            logger.info("FCM initialized successfully")
+        except ImportError:
+            logger.warning("google-auth not installed. Install with: pip install google-auth")
+        except Exception as e:
+            logger.warning(f"FCM initialization failed: {e}")
+    if settings.apns_key_path and not HTTP2_AVAILABLE:
+        logger.error("APNs is configured but h2 is not installed (pip install 'httpx[http2]'); iOS push disabled")
+    elif settings.apns_key_path:
+        try:
+            apns_auth = APNsAuth.from_file(
+                settings.apns_key_path, settings.apns_key_id or "", settings.apns_team_id or ""
+            )
+            logger.info("APNs initialized successfully")
+        except Exception as e:
+            logger.warning(f"APNs initialization failed: {e}")
+    return PushGateway(
+        fcm_project_id=settings.fcm_project_id,
+        fcm_auth=fcm_auth,
+        apns_auth=apns_auth,
+        apns_topic=settings.apns_bundle_id or "com.talkam.liberia",
+        fcm_base_url=settings.fcm_base_url,
+        apns_base_url=settings.apns_base_url or (APNS_SANDBOX_URL if settings.apns_use_sandbox else APNS_PRODUCTION_URL),
+        max_connections=settings.push_max_connections,
+        concurrency=settings.push_concurrency,
+        timeout=settings.push_timeout_seconds,
+    )
+
+
+_gateway: Optional[PushGateway] = None
+
+
+def get_push_gateway() -> PushGateway:
+    """Shared gateway, so provider credentials and connections are set up once per process."""
+    global _gateway
+    if _gateway is None:
+        _gateway = _gateway_from_settings()
+    return _gateway
+
+
+def set_push_gateway(gateway: Optional[PushGateway]) -> None:
+    """Swap the process-wide gateway (tests); None rebuilds it from settings on next use."""
+    global _gateway
+    _gateway = gateway
@@ -2,13 +2,18 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Iterable
+from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import Settings
 from app.models.device_tokens import DeviceToken
+from app.services.push_gateway import PushGateway, get_push_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -16,58 +21,12 @@ logger = logging.getLogger(__name__)
 class PushNotificationService:
     """Service for sending push notifications via FCM/APNs."""
     
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, gateway: PushGateway | None = None) -> None:
         self.settings = settings
-        self.fcm_initialized = False
-        self.apns_initialized = False
-        
-        # Initialize FCM if configured
-        if settings.fcm_server_key or settings.fcm_project_id:
-            try:
-                import firebase_admin
-                from firebase_admin import credentials, messaging
-                
-                # Try to initialize with credentials if available
-                if hasattr(settings, 'fcm_credentials_path') and settings.fcm_credentials_path:
-                    cred = credentials.Certificate(settings.fcm_credentials_path)
-                    firebase_admin.initialize_app(cred)
-                else:
-                    # Use default credentials (for GCP environments)
-                    try:
-                        firebase_admin.initialize_app()
-                    except ValueError:
-                        # Already initialized
-                        pass
-                
-                self.fcm_messaging = messaging
-                self.fcm_initialized = True
-                logger.info("FCM initialized successfully")
-            except ImportError:
-                logger.warning("firebase-admin not installed. Install with: pip install firebase-admin")
-            except Exception as e:
-                logger.warning(f"FCM initialization failed: {e}")
-        
-        # Initialize APNs if configured
-        if settings.apns_key_path:
-            try:
-                from apns2.client import APNsClient
-                from apns2.credentials import TokenCredentials
-                
-                cred = TokenCredentials(
-                    auth_key_path=settings.apns_key_path,
-                    auth_key_id=settings.apns_key_id or "",
-                    team_id=settings.apns_team_id or "",
-                )
-                self.apns_client = APNsClient(
-                    credentials=cred,
-                    use_sandbox=settings.apns_use_sandbox,
-                )
-                self.apns_initialized = True
-                logger.info("APNs initialized successfully")
-            except ImportError:
-                logger.warning("PyAPNs2 not installed. Install with: pip install PyAPNs2")
-            except Exception as e:
-                logger.warning(f"APNs initialization failed: {e}")
+        # Provider credentials and connections live in the process-wide gateway
+        self.gateway = gateway or get_push_gateway()
+        self.fcm_initialized = self.gateway.fcm_enabled
+        self.apns_initialized = self.gateway.apns_enabled
     
     async def _get_user_tokens(
         self,
@@ -98,7 +57,8 @@ class PushNotificationService:
         """
         Send push notification to a specific user.
         
-        Returns True if sent successfully, False otherwise.
+        Tokens the provider rejects are deactivated in ``session``; the
+        caller commits. Returns True if sent successfully, False otherwise.
         """
         tokens = await self._get_user_tokens(session, user_id, platform)
         
@@ -112,11 +72,13 @@ class PushNotificationService:
         web_tokens = [t.token for t in tokens if t.platform == "web"]
         
         success = False
+        invalid_tokens: list[str] = []
         
         # Send to Android (FCM)
         if android_tokens and self.fcm_initialized:
             try:
                 result = await self.send_to_tokens(android_tokens, title, body, data, "android")
+                invalid_tokens.extend(result.get("invalid_tokens", []))
                 if result.get("sent", 0) > 0:
                     success = True
             except Exception as e:
@@ -126,6 +88,7 @@ class PushNotificationService:
         if ios_tokens and self.apns_initialized:
             try:
                 result = await self.send_to_tokens(ios_tokens, title, body, data, "ios")
+                invalid_tokens.extend(result.get("invalid_tokens", []))
                 if result.get("sent", 0) > 0:
                     success = True
             except Exception as e:
@@ -135,11 +98,15 @@ class PushNotificationService:
         if web_tokens and self.fcm_initialized:
             try:
                 result = await self.send_to_tokens(web_tokens, title, body, data, "web")
+                invalid_tokens.extend(result.get("invalid_tokens", []))
                 if result.get("sent", 0) > 0:
                     success = True
             except Exception as e:
                 logger.error(f"Failed to send web push notification: {e}")
         
+        if invalid_tokens:
+            await deactivate_tokens(session, invalid_tokens)
+        
         # Fallback: log if no services initialized
         if not self.fcm_initialized and not self.apns_initialized:
             logger.info(f"Push notification to user {user_id}: {title} - {body} (no push services configured)")
@@ -147,6 +114,63 @@ class PushNotificationService:
         
         return success
     
+    async def send_to_users(
+        self,
+        session: AsyncSession,
+        user_ids: Iterable[UUID | str],
+        title: str,
+        body: str,
+        data: dict[str, Any] | None = None,
+        platform: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Send one notification to many users.
+        
+        Tokens for all users are resolved with a single query and sent per
+        platform in provider-sized batches. Rejected tokens are deactivated
+        in ``session``; the caller commits. Returns delivery statistics,
+        including how many users had at least one active token.
+        """
+        rows = await get_tokens_for_users(session, user_ids, platform)
+        stats = await self.send_to_rows(rows, title, body, data)
+        stats["recipients"] = len({row.user_id for row in rows})
+        
+        if stats["invalid_tokens"]:
+            await deactivate_tokens(session, stats["invalid_tokens"])
+        return stats
+    
+    async def send_to_rows(
+        self,
+        rows: Iterable[Any],
+        title: str,
+        body: str,
+        data: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Send one notification to already loaded ``(token, platform)`` rows.
+        
+        One provider call per platform; a platform that errors counts its
+        tokens as failed without stopping the others. Returns delivery
+        statistics; rejected tokens are reported, not deactivated.
+        """
+        tokens_by_platform: dict[str, list[str]] = defaultdict(list)
+        for row in rows:
+            tokens_by_platform[row.platform].append(row.token)
+        
+        stats: dict[str, Any] = {"sent": 0, "failed": 0, "skipped": 0, "invalid_tokens": []}
+        for token_platform, tokens in tokens_by_platform.items():
+            try:
+                result = await self.send_to_tokens(tokens, title, body, data, token_platform)
+            except Exception as e:
+                logger.error(f"Failed to send {token_platform} push notifications: {e}")
+                stats["failed"] += len(tokens)
+                continue
+            stats["sent"] += result.get("sent", 0)
+            stats["failed"] += result.get("failed", 0)
+            stats["skipped"] += result.get("skipped", 0)
+            stats["invalid_tokens"].extend(result.get("invalid_tokens", []))
+        return stats
+    
     async def send_to_tokens(
         self,
         tokens: list[str],
@@ -158,87 +182,35 @@ class PushNotificationService:
         """
         Send push notification to specific device tokens.
         
-        Returns delivery statistics.
+        Returns delivery statistics. Tokens for a platform whose provider is
+        not configured are counted as skipped; the logging stub only stands
+        in when no provider is configured at all.
         """
         if not tokens:
-            return {"sent": 0, "failed": 0, "invalid_tokens": []}
-        
-        sent = 0
-        failed = 0
-        invalid_tokens = []
+            return {"sent": 0, "failed": 0, "skipped": 0, "invalid_tokens": []}
         
         # FCM (Android and Web)
         if platform in ["android", "web", "all"] and self.fcm_initialized:
-            try:
-                messages = []
-                for token in tokens:
-                    message = self.fcm_messaging.Message(
-                        notification=self.fcm_messaging.Notification(
-                            title=title,
-                            body=body,
-                        ),
-                        data={str(k): str(v) for k, v in (data or {}).items()},
-                        token=token,
-                    )
-                    messages.append(message)
-                
-                # Send in batches (FCM supports up to 500 per batch)
-                batch_size = 500
-                for i in range(0, len(messages), batch_size):
-                    batch = messages[i:i + batch_size]
-                    try:
-                        response = self.fcm_messaging.send_all(batch)
-                        sent += response.success_count
-                        failed += response.failure_count
-                        
-                        # Track invalid tokens
-                        for idx, result in enumerate(response.responses):
-                            if not result.success:
-                                invalid_tokens.append(batch[idx].token)
-                    except Exception as e:
-                        logger.error(f"FCM batch send failed: {e}")
-                        failed += len(batch)
-            except Exception as e:
-                logger.error(f"FCM send failed: {e}")
-                failed += len(tokens)
+            result = await self.gateway.send(tokens, title, body, data, "android" if platform == "all" else platform)
+            return result.as_dict()
         
         # APNs (iOS)
-        elif platform in ["ios", "all"] and self.apns_initialized:
-            try:
-                from apns2.payload import Payload
-                
-                payload = Payload(
-                    alert=body,
-                    badge=1,
-                    sound="default",
-                    custom=data or {},
-                )
-                
-                for token in tokens:
-                    try:
-                        self.apns_client.send_notification(
-                            token_hex=token,
-                            notification=payload,
-                            topic=self.settings.apns_bundle_id or "com.talkam.liberia",
-                        )
-                        sent += 1
-                    except Exception as e:
-                        logger.error(f"APNs send failed for token {token[:20]}...: {e}")
-                        failed += 1
-                        invalid_tokens.append(token)
-            except Exception as e:
-                logger.error(f"APNs send failed: {e}")
-                failed += len(tokens)
+        if platform in ["ios", "all"] and self.apns_initialized:
+            result = await self.gateway.send(tokens, title, body, data, "ios")
+            return result.as_dict()
         
-        # Fallback: stub mode
-        else:
-            logger.info(f"Push notification (stub): {title} - {body} to {len(tokens)} tokens")
-            sent = len(tokens)
+        # Another provider is configured, so this platform is a gap, not stub mode
+        if self.fcm_initialized or self.apns_initialized:
+            logger.warning(f"No push provider configured for {platform}; skipped {len(tokens)} tokens")
+            return {"sent": 0, "failed": 0, "skipped": len(tokens), "invalid_tokens": []}
         
+        # Fallback: stub mode
+        logger.info(f"Push notification (stub): {title} - {body} to {len(tokens)} tokens")
         return {
-            "sent": sent,
-            "failed": failed,
-            "invalid_tokens": invalid_tokens,
+            "sent": len(tokens),
+            "failed": 0,
+            "skipped": 0,
+            "invalid_tokens": [],
         }
     
     async def send_attestation_request(
@@ -261,3 +233,48 @@ class PushNotificationService:
                 "action": "view_report",
             },
         )
+
+
+async def get_tokens_for_users(
+    session: AsyncSession,
+    user_ids: Iterable[UUID | str],
+    platform: str | None = None,
+) -> list[Any]:
+    """Active ``(user_id, token, platform)`` rows for many users in one query."""
+    ids = list({UUID(str(user_id)) for user_id in user_ids})
+    if not ids:
+        return []
+    # One array parameter (user_id = ANY(:ids)) however many users are passed
+    query = select(DeviceToken.user_id, DeviceToken.token, DeviceToken.platform).where(
+        DeviceToken.user_id == any_(bindparam("user_ids", ids, type_=ARRAY(PG_UUID(as_uuid=True)))),
+        DeviceToken.active == True,  # noqa: E712
+    )
+    if platform:
+        query = query.where(DeviceToken.platform == platform)
+    result = await session.execute(query)
+    return list(result.all())
+
+
+async def deactivate_tokens(session: AsyncSession, tokens: list[str]) -> int:
+    """Mark tokens the provider rejected as inactive in one UPDATE. The caller commits."""
+    if not tokens:
+        return 0
+    result = await session.execute(
+        update(DeviceToken)
+        .where(DeviceToken.token.in_(list(set(tokens))), DeviceToken.active == True)  # noqa: E712
+        .values(active=False, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount or 0
+
+
+_push_service: PushNotificationService | None = None
+
+
+def get_push_service() -> PushNotificationService:
+    """Shared service instance, so FCM/APNs clients are initialized once per process."""
+    global _push_service
+    if _push_service is None:
+        from app.config import get_settings
+        _push_service = PushNotificationService(get_settings())
+    return _push_service
@@ -0,0 +1,133 @@
+"""Per-request database statement counts, slow statement log and N+1 detection.
+
+``instrument_engine`` hooks SQLAlchemy's cursor events (and feeds the same
+timings to Prometheus metrics). Every statement is then recorded in the
+``QueryStats`` of the surrounding ``track_queries()`` block. ``QueryStatsMiddleware`` opens one such block per request. Statement
+shapes come from ``metrics.normalize_statement``, so lookups that differ only
+in their parameters count as the same shape.
+
+* Statements slower than ``db_slow_query_ms`` are logged when they finish.
+* After each request, any shape run ``db_n_plus_one_threshold`` times or more
+  is logged as a likely N+1: one query per row where one query would do.
+* With ``db_query_debug_headers``, responses carry ``X-DB-Query-Count`` and
+  ``X-DB-Query-Time-Ms``.
+
+Tests can bound an endpoint's statements with ``max_queries(n)``. Blocks
+nest: a statement counts towards every enclosing block.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from ..config import get_settings
+from .metrics import Metrics, normalize_statement
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """Statements run inside one ``track_queries()`` block."""
+    count: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    parent: Optional[QueryStats] = field(default=None, repr=False)
+
+    def record(self, shape: str, seconds: float) -> None:
+        stats: Optional[QueryStats] = self
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats.shapes[shape] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Shapes run at least ``threshold`` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def summary(self) -> str:
+        return "\n".join(f"  {n}x {shape}" for shape, n in self.shapes.most_common())
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements run until the block exits, including in tasks it starts."""
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    """The innermost active ``track_queries()`` block, if any."""
+    return _current.get()
+
+
+def record_statement(statement: str, seconds: float = 0.0) -> None:
+    """Attribute one executed statement to the current block and log it if slow."""
+    stats = _current.get()
+    threshold_ms = get_settings().db_slow_query_ms
+    if stats is None and seconds * 1000 < threshold_ms:
+        return
+    shape = normalize_statement(statement)
+    if stats is not None:
+        stats.record(shape, seconds)
+    if seconds * 1000 >= threshold_ms:
+        logger.warning(f"Slow statement ({seconds * 1000:.0f} ms): {shape}")
+
+
+def report_request(label: str, stats: QueryStats, threshold: int) -> None:
+    """Log likely N+1 patterns in a finished request."""
+    for shape, n in stats.repeated(threshold):
+        logger.warning(f"Possible N+1 in {label}: {n}x {shape}")
+
+
+@contextmanager
+def max_queries(limit: int) -> Iterator[QueryStats]:
+    """Fail with the statements run if the block runs more than ``limit`` of them."""
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        raise AssertionError(f"{stats.count} statements, expected at most {limit}:\n{stats.summary()}")
+
+
+def instrument_engine(engine: Any, metrics: Optional[Metrics] = None) -> None:
+    """Record every statement ``engine`` runs in the current ``track_queries()`` block.
+
+    The same listeners time statements for ``metrics`` when given, so each
+    statement is timed once however many consumers there are.
+    """
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_stats_started"].pop()
+        record_statement(statement, seconds)
+        if metrics is not None:
+            metrics.observe_statement(statement, seconds)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(exception_context):
+        conn = exception_context.connection
+        stack = conn.info.get("query_stats_started") if conn is not None else None
+        if stack:
+            seconds = time.perf_counter() - stack.pop()
+            if metrics is not None and exception_context.statement:
+                metrics.observe_statement(exception_context.statement, seconds, failed=True)
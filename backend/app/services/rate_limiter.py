@@ -0,0 +1,181 @@
+"""Sliding-window rate limiting shared across API processes.
+
+Each caller gets one counter per route template and window. A request is
+allowed while ``previous * (1 - elapsed / window) + current`` stays under the
+caller's limit, which smooths the burst a plain fixed window allows at its
+boundary.
+
+Against Redis the check-and-increment is a single Lua script: one round trip
+returns whether the request was allowed and the two counts the headers need.
+When Redis is unreachable, the limiter falls back to the same algorithm
+in-process for ``retry_after`` seconds, so limits still hold per process.
+
+Callers are identified by JWT subject when they send a valid bearer token,
+otherwise by client address. Their limit comes from the token's roles
+(``rate_limit_role_limits``), defaulting to ``rate_limit_default``.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from ..config import get_settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rate_limit"
+
+# KEYS[1]: current window counter, KEYS[2]: previous window counter
+# ARGV[1]: limit, ARGV[2]: window seconds, ARGV[3]: seconds elapsed in the current window
+# Returns {allowed, current, previous}; current includes this request when allowed.
+SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * (window - elapsed) / window + current + 1 > limit then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], window * 2)
+end
+return {1, current, previous}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # Seconds until the current window ends
+    retry_after: float  # Seconds until a denied request would be allowed; 0 when allowed
+
+
+def _result(allowed: bool, limit: int, window: int, elapsed: float, current: int, previous: int) -> RateLimitResult:
+    weight = (window - elapsed) / window
+    used = previous * weight + current
+    retry_after = 0.0
+    if not allowed:
+        excess = used + 1 - limit
+        # The previous window's share decays linearly; without one, wait for the next window
+        retry_after = min(excess * window / previous, window - elapsed) if previous else window - elapsed
+    return RateLimitResult(
+        allowed=allowed,
+        limit=limit,
+        remaining=max(0, math.floor(limit - used)),
+        reset_after=window - elapsed,
+        retry_after=retry_after,
+    )
+
+
+class RateLimiter:
+    """Sliding-window limiter backed by Redis, with an in-process fallback."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        window: int = 60,
+        default_limit: int = 100,
+        role_limits: Optional[dict[str, int]] = None,
+        max_local_keys: int = 10000,
+        retry_after: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.redis = redis_client
+        self.window = window
+        self.default_limit = default_limit
+        self.role_limits = role_limits or {}
+        self.max_local_keys = max_local_keys
+        self.retry_after = retry_after
+        self.clock = clock
+        self._script = redis_client.register_script(SLIDING_WINDOW_LUA) if redis_client is not None else None
+        # key -> [window index, current count, previous count]
+        self._local: OrderedDict[str, list[int]] = OrderedDict()
+        self._redis_down_until = 0.0
+
+    # Redis helpers: any failure switches to local-only mode for ``retry_after`` seconds
+
+    def _redis_available(self) -> bool:
+        return self._script is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        logger.warning(f"Rate limiter Redis unavailable, limiting per process: {e}")
+        self._redis_down_until = time.monotonic() + self.retry_after
+
+    def limit_for(self, roles: list[str]) -> int:
+        """The most generous limit among ``roles``, or the default."""
+        limits = [self.role_limits[role] for role in roles if role in self.role_limits]
+        return max(limits) if limits else self.default_limit
+
+    async def hit(self, identity: str, route: str, roles: list[str]) -> RateLimitResult:
+        """Count one request by ``identity`` to ``route`` unless it is over the limit."""
+        limit = self.limit_for(roles)
+        now = self.clock()
+        index = int(now // self.window)
+        elapsed = now - index * self.window
+        key = f"{KEY_PREFIX}:{{{identity}:{route}}}"
+        if self._redis_available():
+            try:
+                allowed, current, previous = await self._script(
+                    keys=[f"{key}:{index}", f"{key}:{index - 1}"], args=[limit, self.window, elapsed]
+                )
+                return _result(bool(allowed), limit, self.window, elapsed, int(current), int(previous))
+            except Exception as e:
+                self._redis_failed(e)
+        return self._hit_local(key, index, limit, elapsed)
+
+    def _hit_local(self, key: str, index: int, limit: int, elapsed: float) -> RateLimitResult:
+        entry = self._local.get(key)
+        if entry is None or entry[0] < index - 1:
+            entry = [index, 0, 0]
+        elif entry[0] == index - 1:
+            entry = [index, 0, entry[1]]
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_keys:
+            self._local.popitem(last=False)
+
+        _, current, previous = entry
+        allowed = previous * (self.window - elapsed) / self.window + current + 1 <= limit
+        if allowed:
+            entry[1] = current = current + 1
+        return _result(allowed, limit, self.window, elapsed, current, previous)
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide rate limiter configured from settings."""
+    global _limiter
+    if _limiter is None:
+        settings = get_settings()
+        client = None
+        if settings.rate_limit_redis and settings.redis_url and redis is not None:
+            client = redis.from_url(settings.redis_url, decode_responses=True)
+        _limiter = RateLimiter(
+            redis_client=client,
+            window=settings.rate_limit_window_seconds,
+            default_limit=settings.rate_limit_default,
+            role_limits=settings.rate_limit_role_limits,
+            max_local_keys=settings.rate_limit_local_max_keys,
+        )
+    return _limiter
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]) -> None:
+    """Swap the process-wide limiter (tests); None rebuilds it from settings on next use."""
+    global _limiter
+    _limiter = limiter
@@ -1,63 +1,157 @@
 """Report ID generation service.
 
 Generates unique report IDs in format: RPT-YYYY-XXXXXX
+
+Sequence numbers come from one PostgreSQL sequence per year
+(``report_id_seq_<year>``). ``nextval`` is O(1), never hands out the same value
+twice and does not take row locks, so concurrent creates cannot collide on the
+unique ``reports.report_id`` constraint. Values are leased in small blocks and
+handed out from an in-process buffer to save a round trip per report; a
+restart simply leaves a gap in the public numbering.
 """
+from __future__ import annotations
+
+import asyncio
 import datetime
-from sqlalchemy import select, func, extract
-from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+from typing import Optional
 
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
 from app.database import SessionLocal
 from app.models.core import Report
 
+logger = logging.getLogger(__name__)
 
-from typing import Optional
+SEQUENCE_PREFIX = "report_id_seq_"
+
+
+def sequence_name(year: int) -> str:
+    """Name of the database sequence backing report IDs for ``year``."""
+    return f"{SEQUENCE_PREFIX}{int(year)}"
+
+
+def format_report_id(year: int, sequence: int) -> str:
+    """Format a sequence number as a public report ID (RPT-2025-000123)."""
+    return f"RPT-{year}-{str(sequence).zfill(6)}"
+
+
+class ReportIdSequencer:
+    """Allocates per-year report sequence numbers from database sequences.
+
+    ``block_size`` values are leased per round trip and buffered in-process.
+    A lock per year keeps concurrent coroutines from leasing the same block
+    twice; the database sequence guarantees uniqueness across processes.
+    """
+
+    def __init__(self, block_size: int = 1) -> None:
+        self.block_size = max(1, block_size)
+        self._buffers: dict[int, list[int]] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._ensured_years: set[int] = set()
+
+    def _lock_for(self, year: int) -> asyncio.Lock:
+        lock = self._locks.get(year)
+        if lock is None:
+            lock = self._locks[year] = asyncio.Lock()
+        return lock
+
+    async def _ensure_sequence(self, session: AsyncSession, year: int) -> None:
+        """Create the year's sequence on first use (new years start at 1).
+
+        The DDL runs in its own transaction when the session is bound to an
+        engine, so rolling back the caller's report cannot drop the sequence.
+        """
+        if year in self._ensured_years:
+            return
+        ddl = text(f"CREATE SEQUENCE IF NOT EXISTS {sequence_name(year)}")
+        bind = getattr(session, "bind", None)
+        if isinstance(bind, AsyncEngine):
+            try:
+                async with bind.begin() as conn:
+                    await conn.execute(ddl)
+            except Exception as e:
+                # Another process created it concurrently; nextval will tell us otherwise
+                logger.warning(f"Could not create {sequence_name(year)}: {e}")
+        else:
+            await session.execute(ddl)
+        self._ensured_years.add(year)
+
+    async def _lease(self, session: AsyncSession, year: int, count: int) -> list[int]:
+        """Fetch ``count`` fresh values from the sequence in one round trip."""
+        await self._ensure_sequence(session, year)
+        result = await session.execute(
+            text(f"SELECT nextval('{sequence_name(year)}') FROM generate_series(1, :count)").bindparams(
+                count=count
+            )
+        )
+        return sorted(int(value) for value in result.scalars().all())
+
+    async def allocate(self, session: AsyncSession, count: int = 1, year: Optional[int] = None) -> list[int]:
+        """Allocate ``count`` unique sequence numbers for ``year``.
+
+        Buffered values are used first; anything beyond the buffer is leased
+        in a single statement, rounded up to the block size.
+        """
+        if count < 1:
+            return []
+        year = year or datetime.datetime.now().year
+        async with self._lock_for(year):
+            buffer = self._buffers.setdefault(year, [])
+            if len(buffer) < count:
+                needed = count - len(buffer)
+                lease_size = max(needed, self.block_size)
+                buffer.extend(await self._lease(session, year, lease_size))
+            allocated, self._buffers[year] = buffer[:count], buffer[count:]
+        return allocated
+
+    async def next_report_ids(
+        self,
+        session: AsyncSession,
+        count: int = 1,
+        year: Optional[int] = None,
+    ) -> list[str]:
+        """Allocate ``count`` formatted report IDs."""
+        year = year or datetime.datetime.now().year
+        return [format_report_id(year, value) for value in await self.allocate(session, count, year)]
+
+    def reset(self) -> None:
+        """Drop buffered values and cached sequence state."""
+        self._buffers.clear()
+        self._locks.clear()
+        self._ensured_years.clear()
+
+
+report_id_sequencer = ReportIdSequencer(block_size=get_settings().report_id_block_size)
 
 
 async def generate_report_id(session: Optional[AsyncSession] = None) -> str:
     """Generate unique report ID: RPT-YYYY-XXXXXX
-    
+
     Args:
         session: Optional database session. If not provided, creates a new one.
-    
+
     Returns:
         Unique report ID string (e.g., "RPT-2025-000123")
     """
-    year = datetime.datetime.now().year
-    
     if session:
-        # Use provided session
-        from sqlalchemy import extract
-        result = await session.execute(
-            select(func.count(Report.id)).where(
-                extract('year', Report.created_at) == year
-            )
-        )
-        count = result.scalar() or 0
+        report_ids = await report_id_sequencer.next_report_ids(session)
     else:
-        # Create new session
         async with SessionLocal() as new_session:
-            from sqlalchemy import extract
-            result = await new_session.execute(
-                select(func.count(Report.id)).where(
-                    extract('year', Report.created_at) == year
-                )
-            )
-            count = result.scalar() or 0
-    
-    # Format: RPT-2025-000123
-    sequence = count + 1
-    report_id = f"RPT-{year}-{str(sequence).zfill(6)}"
-    
-    return report_id
+            report_ids = await report_id_sequencer.next_report_ids(new_session)
+            await new_session.commit()
+    return report_ids[0]
 
 
 async def ensure_report_id_unique(report_id: str, session: AsyncSession) -> bool:
     """Check if report ID is unique.
-    
+
     Args:
         report_id: Report ID to check
         session: Database session
-    
+
     Returns:
         True if unique, False if exists
     """
@@ -66,4 +160,3 @@ async def ensure_report_id_unique(report_id: str, session: AsyncSession) -> bool
     )
     existing = result.scalar_one_or_none()
     return existing is None
-
@@ -0,0 +1,157 @@
+"""Batched report ingestion for offline clients and SMS gateways.
+
+Creating reports one by one costs a flush for the location, the report and
+every media item, a priority query and a commit per report. The bulk path
+does the same work for N reports in a handful of statements: one sequence
+lease for all report IDs, then one multi-row ``INSERT ... RETURNING`` each
+for locations, reports and media, plus one rollup upsert, all inside a
+single transaction.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.core import Location, Report, ReportMedia
+from ..schemas.report import ReportCreateRequest
+from . import geohash
+from .priority_scoring import score_report
+from .report_id import report_id_sequencer
+from .report_rollups import ReportFacts, record_report_changes
+from .search import get_report_search
+
+
+@dataclass
+class IngestedReport:
+    """Row returned for each report written by ``bulk_create_reports``."""
+    id: UUID
+    report_id: str
+    status: str
+    created_at: datetime
+    priority_score: float
+    location: Location
+
+
+async def bulk_create_reports(
+    session: AsyncSession,
+    reports: list[ReportCreateRequest],
+    user_id: Optional[UUID] = None,
+) -> list[IngestedReport]:
+    """Insert ``reports`` with their locations and media in one transaction.
+
+    Callers validate the payloads first; this function only writes. Results
+    are returned in request order. The caller owns the commit.
+    """
+    if not reports:
+        return []
+
+    report_ids = await report_id_sequencer.next_report_ids(session, count=len(reports))
+    now = datetime.utcnow()
+
+    location_rows: list[dict[str, Any]] = []
+    report_rows: list[dict[str, Any]] = []
+    media_rows: list[dict[str, Any]] = []
+    for body, public_id in zip(reports, report_ids):
+        location_id = uuid4()
+        report_uuid = uuid4()
+        location_rows.append(
+            {
+                "id": location_id,
+                "latitude": body.location.latitude,
+                "longitude": body.location.longitude,
+                "county": body.location.county,
+                "district": body.location.district,
+                "description": body.location.description,
+                "geohash": geohash.encode(body.location.latitude, body.location.longitude),
+            }
+        )
+        report = Report(
+            category=body.category,
+            severity=body.severity,
+            witness_count=body.witness_count or 0,
+        )
+        report_rows.append(
+            {
+                "id": report_uuid,
+                "report_id": public_id,
+                "user_id": user_id,
+                "location_id": location_id,
+                "category": body.category,
+                "severity": body.severity,
+                "summary": body.summary,
+                "details": body.details,
+                "status": "submitted",
+                "anonymous": body.anonymous or False,
+                "witness_count": body.witness_count or 0,
+                # New reports have no attestations yet, so priority is computed in memory
+                "priority_score": round(score_report(report), 2),
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        for media in body.media:
+            media_rows.append(
+                {
+                    "id": uuid4(),
+                    "report_id": report_uuid,
+                    "media_key": media.key,
+                    "media_type": media.type,
+                    "checksum": media.checksum,
+                    "blurred": media.blur_faces if media.blur_faces is not None else True,
+                    "voice_masked": media.voice_masked if media.voice_masked is not None else False,
+                }
+            )
+
+    await session.execute(insert(Location), location_rows)
+    result = await session.execute(
+        insert(Report).returning(
+            Report.id,
+            Report.report_id,
+            Report.status,
+            Report.created_at,
+            Report.priority_score,
+            sort_by_parameter_order=True,
+        ),
+        report_rows,
+    )
+    inserted = result.all()
+    if media_rows:
+        await session.execute(insert(ReportMedia), media_rows)
+    await record_report_changes(
+        session,
+        [
+            (
+                None,
+                ReportFacts(
+                    day=now.date(),
+                    category=row["category"],
+                    severity=row["severity"],
+                    status=row["status"],
+                    county=location["county"] or "",
+                ),
+            )
+            for row, location in zip(report_rows, location_rows)
+        ],
+    )
+
+    search = get_report_search()
+    for row in report_rows:
+        search.index_report(Report(id=row["id"], summary=row["summary"], details=row["details"]))
+
+    locations = [Location(**row) for row in location_rows]
+    return [
+        IngestedReport(
+            id=row.id,
+            report_id=row.report_id,
+            status=row.status,
+            created_at=row.created_at,
+            priority_score=float(row.priority_score or 0),
+            location=location,
+        )
+        for row, location in zip(inserted, locations)
+    ]
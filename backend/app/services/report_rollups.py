@@ -0,0 +1,187 @@
+"""Incrementally maintained report rollups (``report_daily_stats``).
+
+Every report write records what the report contributed to the rollups
+before and after the change (``ReportFacts``). The differences are merged
+per rollup row and applied with one multi-row ``INSERT ... ON CONFLICT DO
+UPDATE`` of signed deltas, in the same transaction as the write, so the
+rollups commit or roll back with the reports they describe.
+
+``rebuild_report_rollups`` recomputes rows from ``reports`` to backfill the
+table or repair drift (see scripts/rebuild_report_rollups.py).
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import Date, case, cast, delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.analytics import ReportDailyStat
+from ..models.core import Location, Report
+
+MEASURES = ("report_count", "ai_score_sum", "ai_score_count", "response_seconds_sum")
+
+
+@dataclass(frozen=True)
+class ReportFacts:
+    """What one report contributes to its rollup row."""
+    day: date
+    category: str
+    severity: str
+    status: str
+    county: Optional[str] = None  # Looked up from ``location_id`` when not known
+    location_id: Optional[UUID] = None
+    ai_score: Optional[float] = None
+    response_seconds: float = 0.0
+
+
+def report_facts(
+    report: Report,
+    county: Optional[str] = None,
+    verified_at: Optional[datetime] = None,
+) -> ReportFacts:
+    """Snapshot ``report``'s rollup contribution.
+
+    Take one before changing a report and one after. ``verified_at`` is the
+    moment of a transition to verified (defaults to ``updated_at``).
+    """
+    created_at = report.created_at or datetime.utcnow()
+    response_seconds = 0.0
+    if report.status == "verified":
+        response_seconds = max(((verified_at or report.updated_at or created_at) - created_at).total_seconds(), 0.0)
+    return ReportFacts(
+        day=created_at.date(),
+        category=report.category,
+        severity=report.severity,
+        status=report.status or "submitted",
+        county=county,
+        location_id=report.location_id,
+        ai_score=float(report.ai_severity_score) if report.ai_severity_score is not None else None,
+        response_seconds=response_seconds,
+    )
+
+
+async def _location_counties(session: AsyncSession, facts: Iterable[ReportFacts]) -> dict[UUID, str]:
+    """Counties of the locations of ``facts`` that don't carry one, in one SELECT."""
+    location_ids = {f.location_id for f in facts if f.county is None and f.location_id is not None}
+    if not location_ids:
+        return {}
+    result = await session.execute(select(Location.id, Location.county).where(Location.id.in_(location_ids)))
+    return {location_id: county or "" for location_id, county in result.all()}
+
+
+async def record_report_changes(
+    session: AsyncSession,
+    changes: Iterable[tuple[Optional[ReportFacts], Optional[ReportFacts]]],
+) -> None:
+    """Apply ``(before, after)`` report snapshots to the rollups in one statement.
+
+    ``before`` is None for new reports and ``after`` is None for deleted
+    ones. Counties not given in the snapshots are loaded first, in one
+    SELECT. The caller commits.
+    """
+    signed = [
+        (facts, sign)
+        for before, after in changes
+        for facts, sign in ((before, -1), (after, 1))
+        if facts is not None
+    ]
+    counties = await _location_counties(session, (facts for facts, _ in signed))
+
+    # One row per conflict key: Postgres rejects an upsert that touches a row twice
+    deltas: dict[tuple, list[float]] = defaultdict(lambda: [0, 0.0, 0, 0.0])
+    for facts, sign in signed:
+        county = facts.county if facts.county is not None else counties.get(facts.location_id, "")
+        key = (facts.day, county, facts.category, facts.severity, facts.status)
+        delta = deltas[key]
+        delta[0] += sign
+        if facts.ai_score is not None:
+            delta[1] += sign * facts.ai_score
+            delta[2] += sign
+        delta[3] += sign * facts.response_seconds
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            **dict(zip(("day", "county", "category", "severity", "status"), key)),
+            **dict(zip(MEASURES, delta)),
+            "updated_at": now,
+        }
+        for key, delta in deltas.items()
+        if any(delta)  # e.g. a status change that was undone in the same request
+    ]
+    if not rows:
+        return
+
+    stmt = pg_insert(ReportDailyStat).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            ReportDailyStat.day,
+            ReportDailyStat.county,
+            ReportDailyStat.category,
+            ReportDailyStat.severity,
+            ReportDailyStat.status,
+        ],
+        set_={
+            **{measure: getattr(ReportDailyStat, measure) + getattr(stmt.excluded, measure) for measure in MEASURES},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await session.execute(stmt)
+
+
+def _rollup_source(since: Optional[date] = None):
+    """SELECT computing rollup rows from ``reports``."""
+    day = cast(Report.created_at, Date)
+    county = func.coalesce(Location.county, "")
+    response_seconds = case(
+        (Report.status == "verified", func.extract("epoch", Report.updated_at - Report.created_at)),
+        else_=0,
+    )
+    stmt = (
+        select(
+            day,
+            county,
+            Report.category,
+            Report.severity,
+            Report.status,
+            func.count(Report.id),
+            func.coalesce(func.sum(Report.ai_severity_score), 0),
+            func.count(Report.ai_severity_score),
+            func.coalesce(func.sum(response_seconds), 0),
+            func.now(),
+        )
+        .select_from(Report)
+        .outerjoin(Location, Report.location_id == Location.id)
+        .group_by(day, county, Report.category, Report.severity, Report.status)
+    )
+    if since is not None:
+        stmt = stmt.where(Report.created_at >= since)
+    return stmt
+
+
+async def rebuild_report_rollups(session: AsyncSession, since: Optional[date] = None) -> int:
+    """
+    Recompute rollup rows from ``reports`` (all days, or from ``since``).
+
+    The table is locked against concurrent incremental updates until the
+    caller commits, so no report write is counted twice or lost. Returns
+    the number of rollup rows written.
+    """
+    await session.execute(text("LOCK TABLE report_daily_stats IN EXCLUSIVE MODE"))
+    clear = delete(ReportDailyStat)
+    if since is not None:
+        clear = clear.where(ReportDailyStat.day >= since)
+    await session.execute(clear)
+    result = await session.execute(
+        insert(ReportDailyStat).from_select(
+            ["day", "county", "category", "severity", "status", *MEASURES, "updated_at"],
+            _rollup_source(since),
+        )
+    )
+    return result.rowcount or 0
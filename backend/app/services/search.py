@@ -0,0 +1,205 @@
+"""Full-text search over report summaries and details.
+
+Two interchangeable backends produce the SQL used by ``/reports/search``:
+
+- ``PostgresReportSearch`` matches the ``reports.search_vector`` tsvector
+  (a generated column over summary + details, GIN-indexed) with
+  ``websearch_to_tsquery`` and ranks with ``ts_rank_cd``. Optional fuzzy
+  matching uses pg_trgm's ``%`` operator, which the trigram index on
+  ``summary`` serves, so typos still hit; ``prepare`` sets its threshold.
+- ``InMemoryReportSearch`` is a pure-Python inverted index used by tests
+  and local runs without PostgreSQL. The write paths feed it through
+  ``index_report``; it resolves a query to matching report IDs.
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import case, false, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from ..config import get_settings
+from ..models.core import Report
+
+TS_CONFIG = "english"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were with".split()
+)
+
+
+def tokenize(value: str | None) -> list[str]:
+    """Lowercase word tokens with stopwords removed and plurals folded."""
+    tokens = []
+    for token in _TOKEN_RE.findall((value or "").lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def trigrams(term: str) -> set[str]:
+    """Trigram set of ``term`` padded like pg_trgm."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of trigram sets (same measure as pg_trgm's similarity())."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+class PostgresReportSearch:
+    """Search backed by the tsvector column, GIN index and pg_trgm."""
+
+    def __init__(self, fuzzy_threshold: float = 0.3) -> None:
+        self.fuzzy_threshold = fuzzy_threshold
+
+    def _tsquery(self, query: str) -> ColumnElement:
+        return func.websearch_to_tsquery(TS_CONFIG, query)
+
+    async def prepare(self, session: AsyncSession, fuzzy: bool = False) -> None:
+        """Set this transaction's trigram threshold (``SET LOCAL``) before a fuzzy search."""
+        if fuzzy:
+            await session.execute(
+                select(func.set_config("pg_trgm.similarity_threshold", str(self.fuzzy_threshold), True))
+            )
+
+    def condition(self, query: str, fuzzy: bool = False) -> ColumnElement:
+        """WHERE clause matching ``query``; fuzzy adds trigram matches on summary."""
+        match = Report.search_vector.op("@@")(self._tsquery(query))
+        if fuzzy:
+            # ``%`` can use the trigram index; ``similarity() >= x`` would scan every row
+            return or_(match, Report.summary.op("%")(query))
+        return match
+
+    def rank(self, query: str, fuzzy: bool = False) -> ColumnElement:
+        """Relevance expression, higher is better."""
+        rank = func.ts_rank_cd(Report.search_vector, self._tsquery(query))
+        if fuzzy:
+            return rank + func.similarity(Report.summary, query)
+        return rank
+
+    def index_report(self, report: Report) -> None:
+        """No-op: the database keeps ``search_vector`` in sync."""
+
+    def remove_report(self, report_id: UUID) -> None:
+        """No-op: rows leave the GIN index when they are deleted."""
+
+
+class InMemoryReportSearch:
+    """Pure-Python inverted index with TF-IDF ranking and trigram fuzzy matching."""
+
+    def __init__(self, fuzzy_threshold: float = 0.3) -> None:
+        self.fuzzy_threshold = fuzzy_threshold
+        self._postings: dict[str, dict[UUID, int]] = defaultdict(dict)
+        self._documents: dict[UUID, Counter] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, doc_id: UUID, *fields: Optional[str]) -> None:
+        """Index (or re-index) a document made of ``fields``."""
+        self.remove(doc_id)
+        counts = Counter(token for value in fields for token in tokenize(value))
+        self._documents[doc_id] = counts
+        for token, count in counts.items():
+            self._postings[token][doc_id] = count
+
+    def remove(self, doc_id: UUID) -> None:
+        counts = self._documents.pop(doc_id, None)
+        if not counts:
+            return
+        for token in counts:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def _expand(self, token: str, fuzzy: bool) -> set[str]:
+        if token in self._postings or not fuzzy:
+            return {token}
+        return {
+            term for term in self._postings
+            if trigram_similarity(token, term) >= self.fuzzy_threshold
+        }
+
+    def search(self, query: str, fuzzy: bool = False, limit: Optional[int] = None) -> list[tuple[UUID, float]]:
+        """Documents containing every query term, best first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        total_docs = len(self._documents) or 1
+        scores: Optional[dict[UUID, float]] = None
+        for token in tokens:
+            term_scores: dict[UUID, float] = defaultdict(float)
+            for term in self._expand(token, fuzzy):
+                postings = self._postings.get(term, {})
+                idf = math.log(1 + total_docs / (1 + len(postings)))
+                weight = 1.0 if term == token else trigram_similarity(token, term)
+                for doc_id, tf in postings.items():
+                    term_scores[doc_id] += weight * tf * idf
+            if scores is None:
+                scores = dict(term_scores)
+            else:
+                scores = {doc_id: scores[doc_id] + s for doc_id, s in term_scores.items() if doc_id in scores}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))
+        return ranked[:limit] if limit else ranked
+
+    async def prepare(self, session: Any, fuzzy: bool = False) -> None:
+        """No-op: the threshold is applied in Python."""
+
+    def condition(self, query: str, fuzzy: bool = False) -> ColumnElement:
+        ids = [doc_id for doc_id, _ in self.search(query, fuzzy)]
+        return Report.id.in_(ids) if ids else false()
+
+    def rank(self, query: str, fuzzy: bool = False) -> ColumnElement:
+        scores = dict(self.search(query, fuzzy))
+        if not scores:
+            return literal(0.0)
+        return case(scores, value=Report.id, else_=0.0)
+
+    def index_report(self, report: Any) -> None:
+        self.add(report.id, report.summary, report.details)
+
+    def remove_report(self, report_id: UUID) -> None:
+        self.remove(report_id)
+
+    def index_many(self, reports: Iterable[Any]) -> None:
+        for report in reports:
+            self.index_report(report)
+
+
+_backend: PostgresReportSearch | InMemoryReportSearch | None = None
+
+
+def get_report_search() -> PostgresReportSearch | InMemoryReportSearch:
+    """Process-wide search backend selected by ``SEARCH_BACKEND``."""
+    global _backend
+    if _backend is None:
+        settings = get_settings()
+        if settings.search_backend == "memory":
+            _backend = InMemoryReportSearch(settings.search_fuzzy_threshold)
+        else:
+            _backend = PostgresReportSearch(settings.search_fuzzy_threshold)
+    return _backend
+
+
+def set_report_search(backend: PostgresReportSearch | InMemoryReportSearch | None) -> None:
+    """Swap the process-wide backend (tests); None re-reads settings on next use."""
+    global _backend
+    _backend = backend
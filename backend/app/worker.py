@@ -0,0 +1,108 @@
+"""Background job worker.
+
+Usage:
+    python -m app.worker --queues notifications,default --concurrency 8
+
+Run as many worker processes as needed; jobs are claimed with
+FOR UPDATE SKIP LOCKED, so workers never run the same job twice at once.
+
+With ``JOB_BACKEND=memory`` jobs never leave the API process, so the API
+runs a worker in its lifespan instead (see ``build_worker``); that backend
+loses queued jobs on restart and is meant for tests and local development.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from .config import get_settings
+from .services import job_tasks  # noqa: F401  # registers job handlers
+from .services import query_stats
+from .services.jobs import Worker, get_job_queue
+from .services.metrics import get_metrics
+from .services.push_dispatcher import get_push_dispatcher
+
+logger = logging.getLogger("app.worker")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument(
+        "--queues",
+        default=f"{job_tasks.NOTIFICATIONS_QUEUE},default",
+        help="Comma-separated queues to consume",
+    )
+    parser.add_argument("--concurrency", type=int, default=settings.job_worker_concurrency)
+    parser.add_argument("--poll-interval", type=float, default=settings.job_poll_interval_seconds)
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=settings.worker_metrics_port,
+        help="Serve Prometheus metrics on this port (0 disables)",
+    )
+    parser.add_argument(
+        "--metrics-addr",
+        default=settings.worker_metrics_addr,
+        help="Address for the metrics server (unauthenticated; keep it private)",
+    )
+    return parser.parse_args(argv)
+
+
+def build_worker(
+    queues: list[str] | None = None,
+    concurrency: int | None = None,
+    poll_interval: float | None = None,
+) -> Worker:
+    """A worker on the configured job backend, with settings for anything not given."""
+    settings = get_settings()
+    return Worker(
+        get_job_queue(),
+        queues=queues or [job_tasks.NOTIFICATIONS_QUEUE, "default"],
+        concurrency=concurrency or settings.job_worker_concurrency,
+        poll_interval=poll_interval or settings.job_poll_interval_seconds,
+        backoff_base=settings.job_backoff_base_seconds,
+        backoff_max=settings.job_backoff_max_seconds,
+        visibility_timeout=settings.job_visibility_timeout_seconds,
+    )
+
+
+async def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if get_settings().job_backend == "memory":
+        logger.warning("JOB_BACKEND=memory: this worker only sees jobs enqueued in its own process")
+    worker = build_worker(
+        queues=[queue.strip() for queue in args.queues.split(",") if queue.strip()],
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    metrics = get_metrics() if get_settings().metrics_enabled and args.metrics_port else None
+    if metrics is not None:
+        from .database import engine
+        query_stats.instrument_engine(engine, metrics=metrics)
+        metrics.track_engine(engine)
+        metrics.track_jobs(worker.metrics)
+        metrics.serve(args.metrics_port, addr=args.metrics_addr)
+        logger.info(f"Serving metrics on {args.metrics_addr}:{args.metrics_port}/metrics")
+
+    push_dispatcher = get_push_dispatcher()
+    push_dispatcher.start()
+    logger.info(f"Worker {worker.worker_id} consuming {worker.queues} (concurrency={worker.concurrency})")
+    try:
+        await worker.run(stop)
+    finally:
+        await push_dispatcher.stop(drain=True)
+        logger.info(f"Worker stopped: {worker.metrics.snapshot()}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
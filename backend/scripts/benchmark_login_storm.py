@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Measure how a login storm affects unrelated requests.
+
+Fires concurrent /auth/login requests at an in-process app (auth and health
+routers, no database or middleware) while probing /health, then reports the
+probe latency percentiles and login outcomes. Compare the default pooled
+hashing against --inline, which runs bcrypt on the event loop as before.
+Run from backend/: python scripts/benchmark_login_storm.py --logins 200
+
+--simulate-ms replaces bcrypt with a blocking sleep of that length, for
+machines where the bcrypt backend is unavailable.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, ".")
+
+import httpx
+from fastapi import FastAPI
+
+from app.api import auth, health
+from app.api.deps import get_db_session
+from app.config import get_settings
+from app.services.password_hashing import PasswordHasher, set_password_hasher
+
+PASSWORD = "BenchmarkPass123!"
+
+
+class _SleepContext:
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def hash(self, password: str) -> str:
+        time.sleep(self.seconds)
+        return f"sleep:{password}"
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        time.sleep(self.seconds)
+        return password_hash == f"sleep:{password}"
+
+
+class _InlineHasher(PasswordHasher):
+    """The old behaviour: bcrypt on the event loop."""
+
+    async def run(self, fn, *args):
+        return fn(*args)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def main(logins: int, concurrency: int, workers: int, max_pending: int, inline: bool, simulate_ms: float) -> None:
+    settings = get_settings()
+    if simulate_ms:
+        auth.password_context = _SleepContext(simulate_ms / 1000)
+    user = SimpleNamespace(id="benchmark-user", role="citizen", password_hash=auth.password_context.hash(PASSWORD))
+
+    async def _session():
+        yield SimpleNamespace(execute=_lookup)
+
+    async def _lookup(_stmt):
+        return SimpleNamespace(scalar_one_or_none=lambda: user)
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix=settings.api_v1_prefix)
+    app.include_router(health.router)
+    app.dependency_overrides[get_db_session] = _session
+    set_password_hasher(_InlineHasher() if inline else PasswordHasher(workers=workers, max_pending=max_pending))
+
+    statuses: dict[int, int] = {}
+    probe_latencies: list[float] = []
+    storm_done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def probe() -> None:
+            while not storm_done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                probe_latencies.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.005)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login() -> None:
+            async with semaphore:
+                response = await client.post(
+                    f"{settings.api_v1_prefix}/auth/login", json={"phone": "+231770000000", "password": PASSWORD}
+                )
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        storm_done.set()
+        await prober
+
+    mode = "inline (event loop)" if inline else f"pool ({workers} workers, {max_pending} max pending)"
+    print(f"Mode:            {mode}")
+    print(f"Logins:          {logins} in {elapsed:.2f}s, status counts {dict(sorted(statuses.items()))}")
+    print(f"/health probes:  {len(probe_latencies)}")
+    print(
+        f"/health latency: p50 {statistics.median(probe_latencies):.1f} ms, "
+        f"p99 {_percentile(probe_latencies, 99):.1f} ms, max {max(probe_latencies):.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login storm vs. unrelated endpoint latency")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="logins in flight at once")
+    parser.add_argument("--workers", type=int, default=get_settings().password_hash_workers)
+    parser.add_argument("--max-pending", type=int, default=get_settings().password_hash_max_pending)
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop (previous behaviour)")
+    parser.add_argument("--simulate-ms", type=float, default=0.0, help="sleep instead of bcrypt")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency, args.workers, args.max_pending, args.inline, args.simulate_ms))
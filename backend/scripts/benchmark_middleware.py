@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Compare middleware overhead: BaseHTTPMiddleware vs. pure ASGI.
+
+Builds two in-process apps with the health and reports routers behind the
+security-header and rate-limit middleware. One uses BaseHTTPMiddleware
+wrappers, as the middleware used to be written. The other uses the pure
+ASGI classes from app/middleware.py. Both get the same sequential request
+load on /health and /v1/reports/track/{id}. The track lookup is served from
+memory and the rate limiter runs in-process, so the numbers are the
+framework and middleware cost only.
+Run from backend/: python scripts/benchmark_middleware.py --requests 5000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, ".")
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api import health, reports
+from app.api.deps import get_db_session
+from app.config import get_settings
+from app.middleware import (
+    SECURITY_HEADERS,
+    RateLimitMiddleware,
+    SecurityHeadersMiddleware,
+    caller_identity,
+    route_template,
+    route_templates,
+)
+from app.services.rate_limiter import RateLimiter
+
+REPORT = SimpleNamespace(
+    report_id="TLK-2026-000001", status="submitted", category="health", severity="medium",
+    created_at=datetime(2026, 10, 1), updated_at=datetime(2026, 10, 2),
+)
+
+
+class _BaseHTTPSecurityHeaders(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers.update(SECURITY_HEADERS)
+        return response
+
+
+class _BaseHTTPRateLimit(BaseHTTPMiddleware):
+    def __init__(self, app, limiter: RateLimiter):
+        super().__init__(app)
+        self.limiter = limiter
+        self.routes = None
+
+    async def dispatch(self, request: Request, call_next):
+        if self.routes is None:
+            self.routes = route_templates(request.scope["app"])
+        identity, roles = caller_identity(request)
+        route = route_template(self.routes, request.method, request.url.path)
+        result = await self.limiter.hit(identity, route, roles)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+        return response
+
+
+def _build_app(pure: bool) -> FastAPI:
+    settings = get_settings()
+
+    async def _session():
+        yield SimpleNamespace(execute=_lookup)
+
+    async def _lookup(_stmt):
+        return SimpleNamespace(scalar_one_or_none=lambda: REPORT)
+
+    app = FastAPI()
+    app.include_router(health.router)
+    app.include_router(reports.router, prefix=settings.api_v1_prefix)
+    app.dependency_overrides[get_db_session] = _session
+    # High enough that nothing is rejected; the check itself still runs
+    limiter = RateLimiter(default_limit=10**9)
+    if pure:
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    else:
+        app.add_middleware(_BaseHTTPSecurityHeaders)
+        app.add_middleware(_BaseHTTPRateLimit, limiter=limiter)
+    return app
+
+
+async def _measure(app: FastAPI, path: str, requests: int) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(min(200, requests)):  # Warm up
+            await client.get(path)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get(path)
+            response.raise_for_status()
+        return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int) -> None:
+    prefix = get_settings().api_v1_prefix
+    paths = ["/health", f"{prefix}/reports/track/{REPORT.report_id}"]
+    print(f"{'endpoint':<40} {'BaseHTTPMiddleware':>20} {'pure ASGI':>12} {'speedup':>8}")
+    for path in paths:
+        before = await _measure(_build_app(pure=False), path, requests)
+        after = await _measure(_build_app(pure=True), path, requests)
+        print(f"{path:<40} {before:>16,.0f} r/s {after:>8,.0f} r/s {after / before:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Middleware overhead: BaseHTTPMiddleware vs. pure ASGI")
+    parser.add_argument("--requests", type=int, default=5000, help="requests per endpoint and variant")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark push delivery throughput offline.
+
+Drives PushGateway against the in-process fake FCM/APNs server from
+tests/fake_push_server.py, so no provider credentials or network are needed.
+Run from backend/: python scripts/benchmark_push_gateway.py --tokens 20000
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, ".")
+
+import httpx
+
+from app.services.push_gateway import PushGateway
+from tests.fake_push_server import FakePushServer
+
+
+class _StaticAuth:
+    async def token(self) -> str:
+        return "benchmark"
+
+
+class _StaticAPNsAuth:
+    def token(self) -> str:
+        return "benchmark"
+
+
+async def main(tokens: int, platform: str, concurrency: int, latency_ms: float) -> None:
+    server = FakePushServer(latency=latency_ms / 1000)
+    gateway = PushGateway(
+        fcm_project_id="benchmark",
+        fcm_auth=_StaticAuth(),
+        apns_auth=_StaticAPNsAuth(),
+        fcm_base_url="http://fcm.local",
+        apns_base_url="http://apns.local",
+        concurrency=concurrency,
+        transport=httpx.ASGITransport(app=server.app),
+    )
+    started = time.perf_counter()
+    result = await gateway.send([f"{platform}-{i}" for i in range(tokens)], "Benchmark", "Hello", {"n": 1}, platform)
+    elapsed = time.perf_counter() - started
+    await gateway.aclose()
+    print(
+        f"✅ {result.sent}/{tokens} {platform} pushes in {elapsed:.2f}s "
+        f"({tokens / elapsed:,.0f}/s, peak {server.peak_in_flight} in flight)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=10_000)
+    parser.add_argument("--platform", choices=["android", "ios"], default="android")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Simulated provider latency")
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.platform, args.concurrency, args.latency_ms))
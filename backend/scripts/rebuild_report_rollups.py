@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild the report_daily_stats rollups from the reports table.
+
+Rollups are maintained on every report write; run this to repair drift or
+after bulk changes made outside the API. ``--since YYYY-MM-DD`` limits the
+rebuild to recent days. Incremental updates wait on a table lock while it
+runs, so prefer ``--since`` on a busy system.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, ".")
+
+from app.database import SessionLocal
+from app.services.analytics_cache import invalidate_analytics
+from app.services.report_rollups import rebuild_report_rollups
+
+
+async def main(since: date | None) -> None:
+    async with SessionLocal() as session:
+        try:
+            rows = await rebuild_report_rollups(session, since=since)
+            await session.commit()
+            await invalidate_analytics()
+            scope = f"since {since.isoformat()}" if since else "all days"
+            print(f"✅ Rebuilt report rollups for {scope} ({rows} row(s))")
+        except Exception as e:
+            await session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", type=date.fromisoformat, help="first day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+    asyncio.run(main(args.since))
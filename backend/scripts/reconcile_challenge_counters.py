@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Repair drift in the denormalized challenge counters.
+
+Recomputes participation and support counts from their source tables and
+rewrites only the challenges whose stored counters disagree. Safe to run
+while the API is serving traffic; schedule it periodically (e.g. nightly).
+"""
+import asyncio
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, ".")
+
+from app.database import SessionLocal
+from app.services.challenge_stats import reconcile_challenge_counters
+
+
+async def main() -> None:
+    async with SessionLocal() as session:
+        try:
+            repaired = await reconcile_challenge_counters(session)
+            await session.commit()
+            print(f"✅ Reconciled challenge counters ({repaired} challenge(s) repaired)")
+        except Exception as e:
+            await session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
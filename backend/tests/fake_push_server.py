@@ -0,0 +1,69 @@
+"""Local stand-in for the FCM HTTP v1 and APNs provider APIs.
+
+Serve it in-process with ``httpx.ASGITransport(app=server.app)`` and hand
+that transport to ``PushGateway`` to exercise or benchmark delivery offline.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import Iterable
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class FakePushServer:
+    """Accepts every token except ``invalid_tokens``, which are reported unregistered."""
+
+    def __init__(self, invalid_tokens: Iterable[str] = (), latency: float = 0.0) -> None:
+        self.invalid_tokens = set(invalid_tokens)
+        self.latency = latency
+        self.requests: Counter[str] = Counter()
+        self.delivered: list[tuple[str, str, dict]] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.app = FastAPI()
+        self.app.post("/v1/projects/{project_id}/messages:send")(self._fcm_send)
+        self.app.post("/3/device/{token}")(self._apns_send)
+
+    async def _handle(self, provider: str) -> None:
+        self.requests[provider] += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+    async def _fcm_send(self, project_id: str, request: Request) -> JSONResponse:
+        await self._handle("fcm")
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse({"error": {"code": 401, "status": "UNAUTHENTICATED"}}, status_code=401)
+        message = (await request.json())["message"]
+        token = message["token"]
+        if token in self.invalid_tokens:
+            return JSONResponse(
+                {
+                    "error": {
+                        "code": 404,
+                        "status": "NOT_FOUND",
+                        "details": [
+                            {"@type": "type.googleapis.com/google.firebase.fcm.v1.FcmError", "errorCode": "UNREGISTERED"}
+                        ],
+                    }
+                },
+                status_code=404,
+            )
+        self.delivered.append(("fcm", token, message))
+        return JSONResponse({"name": f"projects/{project_id}/messages/{len(self.delivered)}"})
+
+    async def _apns_send(self, token: str, request: Request) -> JSONResponse:
+        await self._handle("apns")
+        if not request.headers.get("authorization", "").startswith("bearer "):
+            return JSONResponse({"reason": "MissingProviderToken"}, status_code=403)
+        if token in self.invalid_tokens:
+            return JSONResponse({"reason": "Unregistered", "timestamp": 0}, status_code=410)
+        self.delivered.append(("apns", token, await request.json()))
+        return JSONResponse({})
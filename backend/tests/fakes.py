@@ -1,11 +1,26 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Any
 from uuid import UUID, uuid4
 
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
 from app.models.core import Comment, Location, Report, ReportMedia, User, Verification
+from app.models.jobs import Job
+from app.services.query_stats import current_stats, record_statement
+
+# Database sequences are shared by every session, like in Postgres
+SEQUENCES: dict[str, int] = defaultdict(int)
+
+
+def _record(stmt: Any) -> None:
+    """Report a statement to query_stats as the engine's cursor events would."""
+    if current_stats() is not None:
+        record_statement(str(stmt.compile(dialect=postgresql.dialect())))
 
 
 class FakeSession:
@@ -16,6 +31,9 @@ class FakeSession:
         self.media: dict[UUID, list[ReportMedia]] = defaultdict(list)
         self.comments: dict[UUID, list[Comment]] = defaultdict(list)
         self.verifications: dict[UUID, list[Verification]] = defaultdict(list)
+        self.jobs: list[Job] = []
+        self.statements: list[Any] = []
+        self.locked: list[UUID] = []  # ids loaded with SELECT ... FOR UPDATE
 
     def add(self, obj: Any) -> None:
         if isinstance(obj, User):
@@ -37,6 +55,8 @@ class FakeSession:
             self.comments[obj.report_id].append(obj)
         elif isinstance(obj, Verification):
             self.verifications[obj.report_id].append(obj)
+        elif isinstance(obj, Job):
+            self.jobs.append(obj)
 
     async def flush(self) -> None:  # pragma: no cover - no-op
         return None
@@ -54,7 +74,12 @@ class FakeSession:
             if not attribute_names or "media" in attribute_names:
                 obj.media = self.media.get(obj.id, [])
 
-    async def get(self, model: Any, obj_id: UUID) -> Any:
+    async def get(self, model: Any, obj_id: UUID, with_for_update: Any = None) -> Any:
+        stmt = select(model).where(model.id == obj_id)
+        if with_for_update:
+            stmt = stmt.with_for_update()
+            self.locked.append(obj_id)
+        _record(stmt)
         if model is Report:
             report = self.reports.get(obj_id)
             if report and report.location_id:
@@ -69,10 +94,22 @@ class FakeSession:
             return None
         return None
 
-    async def execute(self, stmt: Any) -> Any:
+    async def execute(self, stmt: Any, params: Any = None) -> Any:
         """Mock execute for select statements."""
+        _record(stmt)
+        from sqlalchemy.sql.dml import Insert
+        from sqlalchemy.sql.elements import TextClause
         from sqlalchemy.sql.selectable import Select
         from sqlalchemy import func
+        if isinstance(stmt, TextClause) and "nextval(" in stmt.text:
+            return self._nextval(stmt)
+        if isinstance(stmt, Insert):
+            return self._insert(stmt, params)
+        if isinstance(stmt, Select) and [d["name"] for d in stmt.column_descriptions] == ["id", "county"]:
+            # The rollups' county lookup
+            from types import SimpleNamespace
+            rows = [(location.id, location.county) for location in self.locations.values()]
+            return SimpleNamespace(all=lambda: rows)
         if isinstance(stmt, Select):
             # Check if it's an aggregate query (func.count, etc)
             columns = stmt.column_descriptions if hasattr(stmt, 'column_descriptions') else []
@@ -115,6 +152,92 @@ class FakeSession:
         return None
 
 
+    def _insert(self, stmt: Any, params: Any) -> Any:
+        """Emulate ORM bulk ``insert(Model)`` with an optional RETURNING clause."""
+        from types import SimpleNamespace
+
+        self.statements.append(stmt)
+        model = stmt.entity_description["entity"]
+        rows = params if isinstance(params, list) else [params or {}]
+        returned = []
+        for row in rows:
+            obj = model(**row)
+            self.add(obj)
+            returning = getattr(stmt, "_returning", ()) or ()
+            returned.append(SimpleNamespace(**{col.key: getattr(obj, col.key) for col in returning}))
+
+        class FakeInsertResult:
+            def all(self):
+                return returned
+
+        return FakeInsertResult()
+
+    def _nextval(self, stmt: Any) -> Any:
+        """Emulate ``SELECT nextval('seq') FROM generate_series(1, :count)``."""
+        name = stmt.text.split("nextval('", 1)[1].split("'", 1)[0]
+        count = stmt.compile().params.get("count", 1)
+        values = []
+        for _ in range(count):
+            SEQUENCES[name] += 1
+            values.append(SEQUENCES[name])
+
+        class FakeSequenceResult:
+            def scalars(self):
+                class FakeScalars:
+                    def all(self):
+                        return values
+                return FakeScalars()
+
+        return FakeSequenceResult()
+
+
+def fake_session_factory(session: Any) -> Any:
+    """Stand-in for ``SessionLocal`` that hands out ``session`` every time."""
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    return factory
+
+
+class FakeChallengeSession:
+    """Serves challenge radius queries around ``center`` in Python and counts round trips.
+
+    Distances come from the Python haversine; the page query's LIMIT, OFFSET
+    and keyset id are read back from the statement.
+    """
+
+    def __init__(self, challenges: list[Any], center: tuple[float, float] = (6.3156, -10.8074), radius_km: float = 5.0) -> None:
+        self.challenges = {challenge.id: challenge for challenge in challenges}
+        self.center = center
+        self.radius_km = radius_km
+        self.statements: list[Any] = []
+
+    async def execute(self, stmt: Any, params: Any = None) -> Any:
+        from types import SimpleNamespace
+        from app.models.challenges import CommunityChallenge
+        from app.services.geo_clustering import haversine_distance
+
+        self.statements.append(stmt)
+        in_radius = sorted(
+            (haversine_distance(*self.center, float(c.latitude), float(c.longitude)), str(c.id), c)
+            for c in self.challenges.values()
+        )
+        in_radius = [item for item in in_radius if item[0] <= self.radius_km]
+        if stmt.column_descriptions[0].get("type") is not CommunityChallenge:
+            return SimpleNamespace(scalar=lambda: len(in_radius))
+
+        start = stmt._offset or 0
+        after = [value for value in stmt.compile().params.values() if isinstance(value, UUID)]
+        if after:
+            start = next(index for index, item in enumerate(in_radius) if item[2].id == after[0]) + 1
+        rows = [
+            SimpleNamespace(CommunityChallenge=challenge, distance_km=distance)
+            for distance, _, challenge in in_radius[start:start + stmt._limit]
+        ]
+        return SimpleNamespace(all=lambda: rows)
+
+
 class FakeUser:
     def __init__(self, role: str = "citizen") -> None:
         self.id = uuid4()
@@ -2,20 +2,22 @@
 import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
-from app.api.deps import get_current_user, get_db_session
-from tests.fakes import FakeUser, FakeSession
+from app.api.deps import get_current_principal, get_current_user, get_db_session, get_session_factory
+from tests.fakes import FakeUser, FakeSession, fake_session_factory
 
 
 @pytest.mark.asyncio
 async def test_analytics_endpoints():
     """Test analytics dashboard endpoints."""
     app.dependency_overrides[get_current_user] = lambda: FakeUser(role="admin")
+    app.dependency_overrides[get_current_principal] = lambda: FakeUser(role="admin")
     shared_session = FakeSession()
     
     async def _fake_db():
         yield shared_session
     
     app.dependency_overrides[get_db_session] = _fake_db
+    app.dependency_overrides[get_session_factory] = lambda: fake_session_factory(shared_session)
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -54,12 +56,14 @@ async def test_analytics_endpoints():
 async def test_analytics_permissions():
     """Test analytics endpoints require admin/NGO role."""
     app.dependency_overrides[get_current_user] = lambda: FakeUser(role="citizen")
+    app.dependency_overrides[get_current_principal] = lambda: FakeUser(role="citizen")
     shared_session = FakeSession()
     
     async def _fake_db():
         yield shared_session
     
     app.dependency_overrides[get_db_session] = _fake_db
+    app.dependency_overrides[get_session_factory] = lambda: fake_session_factory(shared_session)
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
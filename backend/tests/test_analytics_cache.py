@@ -0,0 +1,204 @@
+"""Tests for the two-tier analytics cache."""
+import asyncio
+
+import pytest
+
+from app.api.reports import create_report, update_report_status
+from app.api.sms import SMSWebhook, ingest_sms_report
+from app.config import get_settings
+from app.schemas.common import Location
+from app.schemas.report import ReportCreateRequest, ReportStatusUpdateRequest
+from app.services import analytics_cache
+from app.services.analytics_cache import AnalyticsCache, cache_key
+from tests.fakes import FakeSession, FakeUser
+
+
+class MemoryRedis:
+    """The handful of Redis commands the cache uses."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.calls = 0
+
+    async def mget(self, *keys):
+        self.calls += 1
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        self.calls += 1
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def incr(self, key):
+        self.calls += 1
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def delete(self, key):
+        self.calls += 1
+        self.data.pop(key, None)
+
+
+class BrokenRedis:
+    async def mget(self, *keys):
+        raise ConnectionError("redis down")
+
+    set = incr = delete = mget
+
+
+def _counter():
+    calls = {"n": 0}
+
+    async def compute():
+        calls["n"] += 1
+        await asyncio.sleep(0.01)
+        return {"total_reports": calls["n"]}
+
+    return calls, compute
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once():
+    cache = AnalyticsCache(redis_client=MemoryRedis())
+    calls, compute = _counter()
+
+    results = await asyncio.gather(*(cache.get_or_compute("kpis", compute) for _ in range(20)))
+
+    assert calls["n"] == 1
+    assert all(result == {"total_reports": 1} for result in results)
+
+
+@pytest.mark.asyncio
+async def test_local_tier_serves_repeat_reads_without_redis():
+    redis = MemoryRedis()
+    cache = AnalyticsCache(redis_client=redis)
+    _, compute = _counter()
+
+    await cache.get_or_compute("kpis", compute)
+    calls_after_fill = redis.calls
+    await cache.get_or_compute("kpis", compute)
+
+    assert redis.calls == calls_after_fill
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_is_shared_between_processes():
+    redis = MemoryRedis()
+    calls, compute = _counter()
+    first, second = AnalyticsCache(redis_client=redis), AnalyticsCache(redis_client=redis)
+
+    await first.get_or_compute("kpis", compute)
+    assert await second.get_or_compute("kpis", compute) == {"total_reports": 1}
+    assert calls["n"] == 1
+
+
+@pytest.mark.asyncio
+async def test_many_keys_compute_only_the_misses_in_one_call():
+    redis = MemoryRedis()
+    first, second = AnalyticsCache(redis_client=redis), AnalyticsCache(redis_client=redis)
+    computed = []
+
+    async def compute(missing):
+        computed.append(sorted(missing))
+        return {key: key.upper() for key in missing}
+
+    await first.get_or_compute_many(["a", "b"], compute)
+    redis_calls = redis.calls
+    values = await second.get_or_compute_many(["a", "b", "c"], compute)
+
+    assert values == {"a": "A", "b": "B", "c": "C"}
+    assert computed == [["a", "b"], ["c"]]
+    assert redis.calls == redis_calls + 2  # one MGET for the misses, one SET for "c"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_expires_entries_in_every_process():
+    redis = MemoryRedis()
+    calls, compute = _counter()
+    writer, reader = AnalyticsCache(redis_client=redis), AnalyticsCache(redis_client=redis, local_ttl=0)
+
+    await reader.get_or_compute("kpis", compute)
+    await writer.invalidate()
+
+    assert await reader.get_or_compute("kpis", compute) == {"total_reports": 2}
+    assert await writer.get_or_compute("kpis", compute) == {"total_reports": 2}
+    assert calls["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_falls_back_to_local_tier():
+    cache = AnalyticsCache(redis_client=BrokenRedis())
+    calls, compute = _counter()
+
+    assert await cache.get_or_compute("kpis", compute) == {"total_reports": 1}
+    assert await cache.get_or_compute("kpis", compute) == {"total_reports": 1}
+    await cache.invalidate()
+    assert await cache.get_or_compute("kpis", compute) == {"total_reports": 2}
+    assert calls["n"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_compute_propagates_to_every_waiter():
+    cache = AnalyticsCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("kpis", compute) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache._inflight == {}
+
+
+def test_cache_key_is_order_independent():
+    assert cache_key("time_series", days=30, group_by="day") == cache_key("time_series", group_by="day", days=30)
+
+
+@pytest.mark.asyncio
+async def test_report_writes_invalidate_dashboards():
+    analytics_cache.set_analytics_cache(AnalyticsCache())
+    try:
+        calls, compute = _counter()
+        await analytics_cache.cached_analytics("kpis", compute)
+
+        session = FakeSession()
+        admin = FakeUser(role="admin")
+        body = ReportCreateRequest(
+            category="security",
+            severity="medium",
+            summary="Status change request",
+            location=Location(latitude=6.2, longitude=-10.4, county="Bomi"),
+        )
+        created = await create_report(body=body, session=session, user=admin)
+        assert await analytics_cache.cached_analytics("kpis", compute) == {"total_reports": 2}
+
+        await update_report_status(
+            report_id=created.id, body=ReportStatusUpdateRequest(status="resolved"), session=session, user=admin
+        )
+        assert await analytics_cache.cached_analytics("kpis", compute) == {"total_reports": 3}
+    finally:
+        analytics_cache.set_analytics_cache(None)
+
+
+@pytest.mark.asyncio
+async def test_sms_reports_update_rollups_and_invalidate_dashboards():
+    analytics_cache.set_analytics_cache(AnalyticsCache())
+    try:
+        calls, compute = _counter()
+        await analytics_cache.cached_analytics("kpis", compute)
+
+        session = FakeSession()
+        settings = get_settings()
+        body = SMSWebhook(from_number="+231770000000", message="CAT=health;LOC=Nimba;MSG=Clinic closed")
+        await ingest_sms_report(body=body, session=session, settings=settings, x_sms_token=settings.sms_gateway_token)
+
+        [upsert] = session.statements
+        assert upsert.compile().params["county_m0"] == "Nimba"
+        assert await analytics_cache.cached_analytics("kpis", compute) == {"total_reports": 2}
+    finally:
+        analytics_cache.set_analytics_cache(None)
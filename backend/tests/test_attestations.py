@@ -2,7 +2,7 @@
 import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
-from app.api.deps import get_current_user, get_db_session
+from app.api.deps import get_current_principal, get_current_user, get_db_session
 from tests.fakes import FakeUser, FakeSession
 from app.models.core import Report, Location, User
 from app.models.notifications import Notification, Attestation
@@ -115,6 +115,7 @@ async def test_notifications_endpoints():
     """Test notification endpoints."""
     fake_user = FakeUser(role="admin")
     app.dependency_overrides[get_current_user] = lambda: fake_user
+    app.dependency_overrides[get_current_principal] = lambda: fake_user
     shared_session = FakeSession()
     
     async def _fake_db():
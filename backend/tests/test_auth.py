@@ -1,9 +1,15 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
 import pytest
+from fastapi import HTTPException
 
 from app.api import auth as auth_module
-from app.api.auth import register_user
+from app.api.auth import login_user, register_user
 from app.config import get_settings
-from app.schemas.auth import RegisterRequest
+from app.schemas.auth import LoginRequest, RegisterRequest
+from app.services.password_hashing import PasswordHasher, set_password_hasher
 from tests.fakes import FakeSession
 
 
@@ -24,3 +30,72 @@ async def test_register_user_returns_tokens(monkeypatch: pytest.MonkeyPatch):
     assert tokens.access_token
     assert tokens.refresh_token
     assert session.users  # user persisted in fake session
+
+
+class SlowPasswordContext:
+    """Blocks its thread like bcrypt does."""
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def hash(self, password: str) -> str:
+        time.sleep(self.seconds)
+        return f"hashed:{password}"
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        time.sleep(self.seconds)
+        return password_hash == f"hashed:{password}"
+
+
+class LoginSession:
+    def __init__(self, password_hash: str) -> None:
+        self.user = SimpleNamespace(id="user-1", role="citizen", password_hash=password_hash)
+
+    async def execute(self, stmt):
+        return SimpleNamespace(scalar_one_or_none=lambda: self.user)
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=2, max_pending=2)
+    set_password_hasher(hasher)
+    yield hasher
+    hasher.shutdown()
+    set_password_hasher(None)
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_does_not_block_the_event_loop(monkeypatch: pytest.MonkeyPatch, hasher):
+    monkeypatch.setattr(auth_module, "password_context", SlowPasswordContext(0.2))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    body = LoginRequest(phone="+231700000000", password="safePass1")
+    tokens = await login_user(body=body, session=LoginSession("hashed:safePass1"), settings=get_settings())
+    task.cancel()
+
+    assert tokens.access_token
+    assert ticks >= 10  # the loop kept serving while bcrypt ran
+
+
+@pytest.mark.asyncio
+async def test_saturated_hashing_pool_sheds_load_with_503(monkeypatch: pytest.MonkeyPatch, hasher):
+    monkeypatch.setattr(auth_module, "password_context", SlowPasswordContext(0.1))
+    body = LoginRequest(phone="+231700000000", password="safePass1")
+
+    results = await asyncio.gather(
+        *(login_user(body=body, session=LoginSession("hashed:safePass1"), settings=get_settings()) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+    assert rejected[0].headers == {"Retry-After": "1"}
+    assert hasher.rejected == 1 and hasher.pending == 0
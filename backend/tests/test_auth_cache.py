@@ -0,0 +1,150 @@
+"""Tests for the cached JWT and user lookups behind get_current_user."""
+import json
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app.api.deps import get_current_principal, get_current_user
+from app.models.core import User
+from app.services import auth_cache
+from app.services.auth_cache import AuthCache, Principal
+
+SECRET = "test-secret"
+
+
+class MemoryRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class UserSession:
+    """Serves one user row and counts SELECTs."""
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+        self.selects = 0
+        self.merged = []
+
+    async def execute(self, stmt):
+        self.selects += 1
+        return SimpleNamespace(scalar_one_or_none=lambda: self.user)
+
+    async def merge(self, obj, load=True):
+        self.merged.append((obj, load))
+        return obj
+
+
+def _user(role: str = "ngo") -> User:
+    return User(
+        id=uuid4(), full_name="Field Officer", phone="+231770000001", password_hash="bcrypt-hash",
+        role=role, verified=True, language="en-LR", created_at=datetime(2026, 1, 1),
+    )
+
+
+def _credentials(user_id, minutes: int = 30) -> HTTPAuthorizationCredentials:
+    token = jwt.encode(
+        {"sub": str(user_id), "exp": datetime.utcnow() + timedelta(minutes=minutes)}, SECRET, algorithm="HS256"
+    )
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.fixture
+def cache():
+    cache = AuthCache(secret_key=SECRET, redis_client=MemoryRedis())
+    auth_cache.set_auth_cache(cache)
+    yield cache
+    auth_cache.set_auth_cache(None)
+
+
+def test_decoded_tokens_are_reused_until_they_expire(cache, monkeypatch):
+    decodes = []
+    real_decode = jwt.decode
+    monkeypatch.setattr(auth_cache.jwt, "decode", lambda *a, **k: decodes.append(1) or real_decode(*a, **k))
+    token = _credentials(uuid4()).credentials
+
+    assert cache.decode_token(token) == cache.decode_token(token)
+    assert len(decodes) == 1
+
+    cache._tokens[auth_cache._token_key(token)]["exp"] = time.time() - 1
+    cache.decode_token(token)
+    assert len(decodes) == 2
+
+
+@pytest.mark.asyncio
+async def test_principal_skips_the_database_once_the_user_is_cached(cache):
+    user = _user()
+    session = UserSession(user)
+    credentials = _credentials(user.id)
+
+    first = await get_current_principal(credentials=credentials, db=session)
+    second = await get_current_principal(credentials=credentials, db=session)
+
+    assert first == second == Principal(id=user.id, role="ngo")
+    assert session.selects == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_user_is_attached_without_a_select(cache):
+    user = _user()
+    session = UserSession(user)
+    credentials = _credentials(user.id)
+
+    assert await get_current_user(credentials=credentials, db=session) is user
+    cached = await get_current_user(credentials=credentials, db=session)
+
+    assert session.selects == 1
+    assert (cached.id, cached.role, cached.phone) == (user.id, "ngo", user.phone)
+    assert session.merged[0][1] is False  # merge(load=False): no round trip
+    assert "password_hash" not in cached.__dict__
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_is_shared_and_never_holds_password_hashes(cache):
+    user = _user()
+    await cache.set_user(user)
+    stored = json.loads(cache.redis.data[f"auth:user:{user.id}"])
+    assert "password_hash" not in stored
+
+    other_process = AuthCache(secret_key=SECRET, redis_client=cache.redis)
+    snapshot = await other_process.get_user(user.id)
+    assert snapshot["id"] == user.id
+    assert snapshot["created_at"] == datetime(2026, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_role_change_invalidation_forces_a_reload(cache):
+    user = _user(role="citizen")
+    session = UserSession(user)
+    credentials = _credentials(user.id)
+    await get_current_principal(credentials=credentials, db=session)
+
+    user.role = "admin"
+    await auth_cache.invalidate_user(user.id)
+    principal = await get_current_principal(credentials=credentials, db=session)
+
+    assert principal.role == "admin"
+    assert session.selects == 2
+    assert cache.redis.data[f"auth:user:{user.id}"]  # refilled with the new role
+
+
+@pytest.mark.asyncio
+async def test_invalid_tokens_are_rejected(cache):
+    bad = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-jwt")
+    with pytest.raises(HTTPException) as exc:
+        await get_current_principal(credentials=bad, db=UserSession(_user()))
+    assert exc.value.status_code == 401
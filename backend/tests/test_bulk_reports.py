@@ -0,0 +1,91 @@
+"""Tests for bulk report ingestion."""
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.deps import get_current_user, get_db_session
+from app.main import app
+from app.services import community_notifications
+from tests.fakes import FakeSession, FakeUser
+
+
+class CountingFakeSession(FakeSession):
+    def __init__(self) -> None:
+        super().__init__()
+        self.round_trips = 0
+
+    async def execute(self, stmt, params=None):
+        self.round_trips += 1
+        return await super().execute(stmt, params)
+
+
+def _report(i: int, **overrides) -> dict:
+    payload = {
+        "category": "infrastructure",
+        "severity": "high" if i % 2 else "low",
+        "summary": f"Queued offline report {i}",
+        "location": {"latitude": 6.3, "longitude": -10.8, "county": "Montserrado"},
+        "media": [{"key": f"media/{i}.jpg", "type": "photo"}],
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_inserts_batch_in_constant_round_trips(monkeypatch: pytest.MonkeyPatch):
+    async def _no_notify(*_, **__):
+        return [], None
+
+    monkeypatch.setattr(community_notifications, "notify_community_for_attestation", _no_notify)
+    app.dependency_overrides[get_current_user] = lambda: FakeUser(role="citizen")
+    shared_session = CountingFakeSession()
+
+    async def _fake_db():
+        yield shared_session
+
+    app.dependency_overrides[get_db_session] = _fake_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/v1/reports/bulk", json={"reports": [_report(i) for i in range(500)]})
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["count"] == 500
+    assert len({item["report_id"] for item in data["created"]}) == 500
+    assert all(0.0 < item["priority_score"] <= 1.0 for item in data["created"])
+    assert len(shared_session.reports) == 500
+    assert sum(len(items) for items in shared_session.media.values()) == 500
+    # sequence lease + locations + reports + media + rollups
+    assert shared_session.round_trips <= 5
+    rollup = shared_session.statements[-1]
+    assert rollup.table.name == "report_daily_stats"
+    assert len(rollup._multi_values[0]) == 2  # one row per severity, not per report
+    # one attestation fan-out job for the whole batch
+    assert len(shared_session.jobs) == 1
+    assert len(shared_session.jobs[0].payload["report_ids"]) == 500
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_rejects_invalid_item_with_index():
+    app.dependency_overrides[get_current_user] = lambda: FakeUser(role="citizen")
+    shared_session = FakeSession()
+
+    async def _fake_db():
+        yield shared_session
+
+    app.dependency_overrides[get_db_session] = _fake_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/v1/reports/bulk",
+            json={"reports": [_report(0), _report(1, category="not-a-category")]},
+        )
+
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 400
+    assert "reports[1]" in response.json()["error"]["message"]
+    assert not shared_session.reports
@@ -0,0 +1,154 @@
+"""Tests for the set-based challenge notification fan-out."""
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.challenges import ChallengeCategory, CommunityChallenge
+from app.services.challenge_notifications import notify_challenge_created, notify_volunteer_request
+
+
+class FanOutSession:
+    """Pretends ``total`` users match, handing them out one keyset page at a time."""
+
+    def __init__(self, total: int) -> None:
+        self.remaining = sorted((uuid4() for _ in range(total)), key=lambda user_id: user_id.int)
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        limit = stmt.select._limit_clause.value
+        page, self.remaining = self.remaining[:limit], self.remaining[limit:]
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: page))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _challenge(county: str | None = "Montserrado") -> CommunityChallenge:
+    return CommunityChallenge(
+        id=uuid4(),
+        creator_id=uuid4(),
+        title="Clean the drains",
+        description="Clear blocked drains before the rains",
+        category=ChallengeCategory.ENVIRONMENTAL,
+        latitude=Decimal("6.3000000"),
+        longitude=Decimal("-10.8000000"),
+        county=county,
+    )
+
+
+@pytest.mark.asyncio
+async def test_challenge_fan_out_inserts_in_committed_batches():
+    session = FanOutSession(total=250)
+
+    created = await notify_challenge_created(session, _challenge(), radius_km=5.0, batch_size=100)
+
+    assert created == 250
+    assert len(session.statements) == 3  # 100 + 100 + 50
+    assert session.commits == 3
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO notifications (id, user_id, challenge_id")
+    assert "SELECT gen_random_uuid()" in sql
+    assert "FROM users" in sql
+    assert "NOT (EXISTS" in sql
+    assert "asin" in sql
+    assert "users.geohash LIKE" in sql
+    assert "users.county =" in sql
+    assert "RETURNING notifications.user_id" in sql
+    # Later batches resume after the last recipient of the previous one
+    assert "users.id > " in str(session.statements[1].compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_volunteer_fan_out_without_county_targets_radius_only():
+    session = FanOutSession(total=3)
+
+    created = await notify_volunteer_request(session, _challenge(county=None), radius_km=2.0, batch_size=100)
+
+    assert created == 3
+    assert session.commits == 1
+    compiled = session.statements[0].compile(dialect=postgresql.dialect())
+    assert "users.county" not in str(compiled)
+    assert "volunteer_request" in compiled.params.values()
+
+
+@pytest.mark.asyncio
+async def test_fan_out_with_no_recipients_is_one_statement():
+    session = FanOutSession(total=0)
+
+    assert await notify_challenge_created(session, _challenge(), batch_size=100) == 0
+    assert len(session.statements) == 1
+
+
+def test_users_with_only_past_reports_are_backfilled_and_targeted():
+    import importlib.util
+    import math
+    from datetime import datetime
+    from pathlib import Path
+
+    import sqlalchemy as sa
+
+    from app.models.core import User
+    from app.services.geo_clustering import nearby_users_condition
+
+    path = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "20261018_000007_user_location.py"
+    spec = importlib.util.spec_from_file_location("user_location", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    engine = sa.create_engine("sqlite://")
+
+    @sa.event.listens_for(engine, "connect")
+    def _math(dbapi_conn, _):
+        for name, arity, fn in (
+            ("radians", 1, math.radians), ("sin", 1, math.sin), ("cos", 1, math.cos), ("asin", 1, math.asin),
+            ("sqrt", 1, math.sqrt), ("power", 2, math.pow), ("least", 2, min),
+        ):
+            dbapi_conn.create_function(name, arity, fn)
+
+    metadata = sa.MetaData()
+    users = sa.Table(
+        "users", metadata, sa.Column("id", sa.Uuid, primary_key=True), sa.Column("county", sa.String),
+        sa.Column("latitude", sa.Float), sa.Column("longitude", sa.Float), sa.Column("geohash", sa.String),
+    )
+    locations = sa.Table(
+        "locations", metadata, sa.Column("id", sa.Uuid, primary_key=True), sa.Column("county", sa.String),
+        sa.Column("latitude", sa.Float), sa.Column("longitude", sa.Float),
+    )
+    reports = sa.Table(
+        "reports", metadata, sa.Column("id", sa.Uuid, primary_key=True), sa.Column("user_id", sa.Uuid),
+        sa.Column("location_id", sa.Uuid), sa.Column("anonymous", sa.Boolean), sa.Column("created_at", sa.DateTime),
+    )
+    metadata.create_all(engine)
+
+    reporter, anonymous_only, newcomer = uuid4(), uuid4(), uuid4()
+    near, far, hidden = uuid4(), uuid4(), uuid4()
+    with engine.begin() as conn:
+        conn.execute(users.insert(), [{"id": user_id} for user_id in (reporter, anonymous_only, newcomer)])
+        conn.execute(locations.insert(), [
+            {"id": far, "county": "Bong", "latitude": 7.0, "longitude": -9.5},
+            {"id": near, "county": "Montserrado", "latitude": 6.31, "longitude": -10.79},
+            {"id": hidden, "county": "Montserrado", "latitude": 6.3, "longitude": -10.8},
+        ])
+        conn.execute(reports.insert(), [
+            {"id": uuid4(), "user_id": reporter, "location_id": far, "anonymous": False,
+             "created_at": datetime(2026, 1, 1)},
+            {"id": uuid4(), "user_id": reporter, "location_id": near, "anonymous": False,
+             "created_at": datetime(2026, 6, 1)},
+            {"id": uuid4(), "user_id": anonymous_only, "location_id": hidden, "anonymous": True,
+             "created_at": datetime(2026, 6, 1)},
+        ])
+
+        migration.backfill_user_locations(conn)
+
+        reporter_row = conn.execute(sa.select(users).where(users.c.id == reporter)).one()
+        assert reporter_row.county == "Montserrado"  # Latest report wins
+        nearby = conn.execute(
+            sa.select(User.id).where(nearby_users_condition(6.3, -10.8, 5.0, county="Montserrado"))
+        ).scalars().all()
+
+    assert nearby == [reporter]
@@ -0,0 +1,127 @@
+"""Tests for community challenge endpoints."""
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.deps import get_current_user, get_db_session
+from app.main import app
+from sqlalchemy.dialects import postgresql
+
+from app.models.challenges import (
+    ChallengeCategory,
+    ChallengeStatus,
+    CommunityChallenge,
+    ParticipationRole,
+)
+from app.services import challenge_stats, geohash
+from tests.fakes import FakeChallengeSession, FakeUser
+
+MONROVIA = (6.3156, -10.8074)
+
+
+def _challenge(i: int, **counters) -> CommunityChallenge:
+    lat, lon = MONROVIA[0] + i * 0.0005, MONROVIA[1]
+    now = datetime.utcnow()
+    return CommunityChallenge(
+        id=uuid4(),
+        creator_id=uuid4(),
+        title=f"Clean-up drive {i}",
+        description="Clearing the drainage on our street before the rains",
+        category=ChallengeCategory.ENVIRONMENTAL,
+        latitude=lat,
+        longitude=lon,
+        geohash=geohash.encode(lat, lon),
+        needed_resources={},
+        urgency_level="medium",
+        status=ChallengeStatus.ACTIVE,
+        progress_percentage=0.0,
+        media_urls=[],
+        created_at=now,
+        updated_at=now,
+        **counters,
+    )
+
+
+async def _list(session: FakeChallengeSession, page_size: int) -> dict:
+    app.dependency_overrides[get_current_user] = lambda: FakeUser()
+
+    async def _fake_db():
+        yield session
+
+    app.dependency_overrides[get_db_session] = _fake_db
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(
+            "/v1/challenges/list",
+            params={"latitude": MONROVIA[0], "longitude": MONROVIA[1], "page_size": page_size},
+        )
+    app.dependency_overrides.clear()
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_list_challenges_query_count_is_constant_per_page():
+    challenges = [
+        _challenge(i, participants_count=3, volunteers_count=1, donors_count=1, supports_count=2)
+        for i in range(60)
+    ]
+
+    small = FakeChallengeSession(challenges)
+    small_page = await _list(small, page_size=5)
+    large = FakeChallengeSession(challenges)
+    large_page = await _list(large, page_size=50)
+
+    assert len(small_page["challenges"]) == 5
+    assert len(large_page["challenges"]) == 50
+    # page load + count, whatever the page size; counts come from counter columns
+    assert len(small.statements) == len(large.statements) == 2
+    assert all(
+        (c["participants_count"], c["volunteers_count"], c["donors_count"], c["supports_count"]) == (3, 1, 1, 2)
+        for c in large_page["challenges"]
+    )
+    page_load = large.statements[0]
+    assert any("creator" in str(option.path) for option in page_load._with_options)
+
+
+class RecordingSession:
+    def __init__(self, rowcount: int = 0) -> None:
+        self.statements = []
+        self.rowcount = rowcount
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        return SimpleNamespace(rowcount=self.rowcount)
+
+    def sql(self, index: int = 0) -> str:
+        return str(self.statements[index].compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_participation_counters_increment_atomically():
+    session = RecordingSession()
+    await challenge_stats.increment_participation_counters(session, uuid4(), ParticipationRole.VOLUNTEER)
+    await challenge_stats.increment_support_counters(session, uuid4(), is_high_priority=True)
+
+    join_sql = session.sql(0)
+    assert join_sql.startswith("UPDATE community_challenges SET")
+    assert "participants_count=(community_challenges.participants_count + " in join_sql
+    assert "volunteers_count=(community_challenges.volunteers_count + " in join_sql
+    compiled = session.statements[0].compile(dialect=postgresql.dialect())
+    assert sorted(v for k, v in compiled.params.items() if k.endswith("_count_1")) == [0, 1, 1]
+    assert "supports_count=(community_challenges.supports_count + " in session.sql(1)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_recomputes_drifted_counters_in_one_statement():
+    session = RecordingSession(rowcount=4)
+    repaired = await challenge_stats.reconcile_challenge_counters(session)
+
+    assert repaired == 4
+    assert len(session.statements) == 1
+    sql = session.sql()
+    assert "FROM challenge_participations" in sql and "FROM stakeholder_supports" in sql
+    assert "community_challenges.participants_count != (SELECT count(" in sql
@@ -0,0 +1,212 @@
+"""Tests for community attestation fan-out and the batched push dispatcher."""
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.config import get_settings
+from app.models.core import Location, Report
+from app.services import community_notifications, job_tasks, push_dispatcher
+from app.services.push_dispatcher import PushDispatcher
+from app.services.push_notifications import PushNotificationService
+
+
+class FanOutSession:
+    """Returns candidate user ids, then pretends some were already notified."""
+
+    def __init__(self, user_ids, already_notified=()) -> None:
+        self.user_ids = list(user_ids)
+        self.already_notified = set(already_notified)
+        self.statements = []
+        self.params = []
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        self.params.append(params)
+        if params is None:
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.user_ids))
+        rows = [SimpleNamespace(user_id=row["user_id"]) for row in params if row["user_id"] not in self.already_notified]
+        return SimpleNamespace(all=lambda: rows)
+
+    async def flush(self):
+        return None
+
+
+class RecordingDispatcher:
+    def __init__(self, events=None) -> None:
+        self.queued = []
+        self.events = events if events is not None else []
+
+    def enqueue(self, user_ids, title, body, data=None):
+        self.events.append("enqueue")
+        self.queued.append((list(user_ids), data))
+        return len(self.queued[-1][0])
+
+
+@pytest.mark.asyncio
+async def test_attestation_fan_out_is_one_insert_with_conflict_skip(monkeypatch: pytest.MonkeyPatch):
+    dispatcher = RecordingDispatcher()
+    monkeypatch.setattr(push_dispatcher, "get_push_dispatcher", lambda: dispatcher)
+    reporter = uuid4()
+    users = [uuid4() for _ in range(50)]
+    session = FanOutSession(users + [reporter], already_notified=users[:10])
+    report = Report(id=uuid4(), user_id=reporter, severity="high", category="infrastructure", summary="Bridge out")
+
+    notified, push = await community_notifications.notify_community_for_attestation(
+        session, report, Location(county="Montserrado", latitude=6.3, longitude=-10.8)
+    )
+
+    assert set(notified) == set(users[10:])
+    assert dispatcher.queued == []  # Left to the caller, after its commit
+    assert len(session.statements) == 2
+    assert len(session.params[1]) == 50  # reporter excluded
+    lookup_sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "users.geohash LIKE" in lookup_sql  # Nearby users, not any citizens
+    assert "users.county =" in lookup_sql
+    assert "ASC NULLS LAST, users.id" in lookup_sql  # Nearest first
+    insert_sql = str(session.statements[1].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert (
+        "ON CONFLICT (user_id, report_id) "
+        "WHERE report_id IS NOT NULL AND notification_type = 'attestation_request' DO NOTHING"
+    ) in insert_sql
+    assert "RETURNING notifications.user_id" in insert_sql
+    assert push.user_ids == notified
+    assert push.data["report_id"] == str(report.id)
+
+
+class JobSession:
+    """Serves the job's report lookup and records commits."""
+
+    def __init__(self, reports, events, fail_commit=False) -> None:
+        self.reports = reports
+        self.events = events
+        self.fail_commit = fail_commit
+
+    async def execute(self, stmt, params=None):
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.reports))
+
+    async def commit(self):
+        if self.fail_commit:
+            raise RuntimeError("connection lost")
+        self.events.append("commit")
+
+
+@pytest.mark.parametrize("fail_commit", [False, True])
+@pytest.mark.asyncio
+async def test_notify_job_pushes_only_after_commit(monkeypatch: pytest.MonkeyPatch, fail_commit):
+    events = []
+    dispatcher = RecordingDispatcher(events)
+    monkeypatch.setattr(push_dispatcher, "get_push_dispatcher", lambda: dispatcher)
+    user_id = uuid4()
+
+    async def _notify(session, report, location, radius_km=10.0):
+        push = community_notifications.AttestationPush([user_id], "title", "body", {"report_id": str(report.id)})
+        return [user_id], push
+
+    monkeypatch.setattr(community_notifications, "notify_community_for_attestation", _notify)
+    report = Report(id=uuid4(), location=Location(county="Bong"))
+    session = JobSession([report], events, fail_commit=fail_commit)
+
+    if fail_commit:
+        with pytest.raises(RuntimeError):
+            await job_tasks.notify_community(session, {"report_ids": [str(report.id)]})
+        assert dispatcher.queued == []
+    else:
+        await job_tasks.notify_community(session, {"report_ids": [str(report.id)]})
+        assert events == ["commit", "enqueue"]
+        assert dispatcher.queued == [([user_id], {"report_id": str(report.id)})]
+
+
+class TokenSession:
+    queries = 0
+    deactivated: list = []
+
+    def __init__(self, tokens) -> None:
+        self.tokens = tokens
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        TokenSession.queries += 1
+        values = next(v for v in stmt.compile().params.values() if isinstance(v, list))
+        if not stmt.is_select:
+            TokenSession.deactivated.append(sorted(values))
+            return SimpleNamespace(rowcount=len(values))
+        rows = [row for row in self.tokens if row.user_id in values]
+        return SimpleNamespace(all=lambda: rows)
+
+    async def commit(self):
+        return None
+
+
+class StubProviderService(PushNotificationService):
+    """The real service with both providers marked configured; subclasses stub ``send_to_tokens``."""
+
+    def __init__(self) -> None:
+        super().__init__(get_settings(), gateway=SimpleNamespace(fcm_enabled=True, apns_enabled=True))
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sends_in_batches_with_one_token_query_each():
+    users = [uuid4() for _ in range(1200)]
+    tokens = [
+        SimpleNamespace(user_id=user_id, token=f"tok-{i}", platform="ios" if i % 3 == 0 else "android")
+        for i, user_id in enumerate(users)
+    ]
+    calls = []
+
+    class FakeService(StubProviderService):
+        async def send_to_tokens(self, tokens, title, body, data=None, platform="all"):
+            calls.append((title, platform, len(tokens)))
+            return {"sent": len(tokens), "failed": 0, "invalid_tokens": []}
+
+    TokenSession.queries = 0
+    dispatcher = PushDispatcher(
+        service_factory=FakeService,
+        session_factory=lambda: TokenSession(tokens),
+        batch_size=500,
+        flush_interval=0.05,
+    )
+    dispatcher.enqueue(users[:600], "first", "body")
+    dispatcher.enqueue(users[600:], "second", "body", data={"k": 1})
+    await dispatcher.stop(drain=True)
+
+    assert dispatcher.stats.recipients == 1200
+    assert dispatcher.stats.sent == 1200
+    assert dispatcher.stats.batches == 3
+    assert TokenSession.queries == 3
+    # One provider call per (message, platform) in each batch
+    assert len(calls) <= 3 * 2 * 2
+    assert {(title, platform) for title, platform, _ in calls} == {
+        ("first", "ios"), ("first", "android"), ("second", "ios"), ("second", "android"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_deactivates_rejected_tokens_once_per_batch():
+    users = [uuid4() for _ in range(10)]
+    tokens = [SimpleNamespace(user_id=user_id, token=f"tok-{i}", platform="android") for i, user_id in enumerate(users)]
+
+    class RejectingService(StubProviderService):
+        async def send_to_tokens(self, tokens, title, body, data=None, platform="all"):
+            dead = [token for token in tokens if token in {"tok-1", "tok-2"}]
+            return {"sent": len(tokens) - len(dead), "failed": len(dead), "invalid_tokens": dead}
+
+    TokenSession.queries = 0
+    TokenSession.deactivated = []
+    dispatcher = PushDispatcher(
+        service_factory=RejectingService,
+        session_factory=lambda: TokenSession(tokens),
+        flush_interval=0.05,
+    )
+    dispatcher.enqueue(users, "title", "body")
+    await dispatcher.stop(drain=True)
+
+    assert dispatcher.stats.invalid_tokens == 2
+    assert TokenSession.deactivated == [["tok-1", "tok-2"]]
+    assert TokenSession.queries == 2  # token lookup + one bulk deactivation
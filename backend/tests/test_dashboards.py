@@ -1,8 +1,13 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
 import pytest
 
 from app.api.dashboards import get_analytics_dashboard
 from app.schemas.analytics import DashboardResponse
-from tests.fakes import FakeSession, FakeUser
+from app.services.analytics_cache import AnalyticsCache, set_analytics_cache
+from tests.fakes import FakeSession, FakeUser, fake_session_factory
 
 
 @pytest.mark.asyncio
@@ -11,7 +16,7 @@ async def test_analytics_dashboard_requires_role():
     user = FakeUser(role="citizen")
     # Should raise 403 for non-privileged roles
     try:
-        await get_analytics_dashboard(session=session, user=user)
+        await get_analytics_dashboard(sessions=fake_session_factory(session), user=user)
         assert False, "Should have raised 403"
     except Exception as e:
         assert "403" in str(e) or "Insufficient" in str(e)
@@ -21,7 +26,41 @@ async def test_analytics_dashboard_requires_role():
 async def test_analytics_dashboard_returns_data():
     session = FakeSession()
     user = FakeUser(role="ngo")
-    result = await get_analytics_dashboard(session=session, user=user)
+    result = await get_analytics_dashboard(sessions=fake_session_factory(session), user=user)
     assert isinstance(result, DashboardResponse)
     assert result.kpis.total_reports >= 0
     assert result.kpis.verification_rate >= 0
+
+
+class SlowSession(FakeSession):
+    """Each statement takes ``delay`` seconds, like a real round trip."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.delay = delay
+
+    async def execute(self, stmt, params=None):
+        await asyncio.sleep(self.delay)
+        return await super().execute(stmt, params)
+
+
+@pytest.mark.asyncio
+async def test_analytics_dashboard_runs_queries_concurrently_on_separate_sessions():
+    set_analytics_cache(AnalyticsCache())
+    opened = []
+
+    @asynccontextmanager
+    async def sessions():
+        session = SlowSession(delay=0.2)
+        opened.append(session)
+        yield session
+
+    started = time.perf_counter()
+    result = await get_analytics_dashboard(sessions=sessions, user=FakeUser(role="admin"))
+    elapsed = time.perf_counter() - started
+    set_analytics_cache(None)
+
+    assert isinstance(result, DashboardResponse)
+    assert len(opened) == 3
+    # max of the three queries, not their sum
+    assert elapsed < 0.4
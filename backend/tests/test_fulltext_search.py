@@ -0,0 +1,79 @@
+"""Tests for report full-text search."""
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.deps import get_current_user, get_db_session
+from app.main import app
+from app.models.core import Report
+from app.services.search import InMemoryReportSearch, PostgresReportSearch, tokenize
+from tests.fakes import FakeSession, FakeUser
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("The broken Bridges of Monrovia") == ["broken", "bridge", "monrovia"]
+
+
+def test_in_memory_index_matches_all_terms_and_ranks():
+    index = InMemoryReportSearch()
+    flood, road, both = uuid4(), uuid4(), uuid4()
+    index.add(flood, "Flooding near market", "Water everywhere, flooding again")
+    index.add(road, "Road collapsed", "Bridge on the main road is gone")
+    index.add(both, "Flooding damaged road", None)
+
+    assert [doc for doc, _ in index.search("flooding")] == [flood, both]
+    assert [doc for doc, _ in index.search("road flooding")] == [both]
+    assert index.search("electricity") == []
+
+    index.remove(both)
+    assert index.search("road flooding") == []
+    assert len(index) == 2
+
+
+def test_in_memory_index_fuzzy_matches_typos():
+    index = InMemoryReportSearch()
+    doc = uuid4()
+    index.add(doc, "Electricity outage in Sinkor")
+
+    assert index.search("electrcity") == []
+    assert [d for d, _ in index.search("electrcity", fuzzy=True)] == [doc]
+
+
+def test_postgres_search_uses_tsvector_and_trigram():
+    search = PostgresReportSearch(fuzzy_threshold=0.4)
+    stmt = select(Report.id).where(search.condition("broken bridge", fuzzy=True)).order_by(
+        search.rank("broken bridge", fuzzy=True).desc()
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "reports.search_vector @@ websearch_to_tsquery" in sql
+    where, order_by = sql.split("ORDER BY")
+    assert "OR (reports.summary %% " in where  # Index-backed; threshold set by prepare()
+    assert "similarity(" not in where
+    assert "similarity(reports.summary" in order_by
+    assert "ts_rank_cd(reports.search_vector" in sql
+    assert "ILIKE" not in sql.upper()
+
+
+@pytest.mark.asyncio
+async def test_relevance_sort_requires_text():
+    app.dependency_overrides[get_current_user] = lambda: FakeUser(role="admin")
+    shared_session = FakeSession()
+
+    async def _fake_db():
+        yield shared_session
+
+    app.dependency_overrides[get_db_session] = _fake_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        missing_text = await client.get("/v1/reports/search?sort_by=relevance")
+        ranked = await client.get("/v1/reports/search?text=bridge&fuzzy=true&sort_by=relevance")
+
+    app.dependency_overrides.clear()
+
+    assert missing_text.status_code == 400
+    assert ranked.status_code == 200
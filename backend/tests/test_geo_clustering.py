@@ -0,0 +1,100 @@
+"""Tests for challenge radius queries."""
+import math
+import random
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.models.challenges import CommunityChallenge
+from app.models.core import Location, User
+from app.services import geo_clustering, geohash
+from app.services.geo_clustering import haversine_distance, search_challenges_in_radius
+from tests.fakes import FakeChallengeSession
+
+MONROVIA = (6.3156, -10.8074)
+
+
+def _offset_point(lat: float, lon: float, km: float, bearing_deg: float) -> tuple[float, float]:
+    bearing = math.radians(bearing_deg)
+    dlat = km * math.cos(bearing) / 111.0
+    dlon = km * math.sin(bearing) / (111.0 * math.cos(math.radians(lat)))
+    return lat + dlat, lon + dlon
+
+
+def _challenges(count: int, max_km: float) -> list[CommunityChallenge]:
+    rng = random.Random(7)
+    challenges = []
+    for _ in range(count):
+        lat, lon = _offset_point(*MONROVIA, rng.uniform(0, max_km), rng.uniform(0, 360))
+        challenges.append(
+            CommunityChallenge(id=uuid4(), latitude=lat, longitude=lon, geohash=geohash.encode(lat, lon))
+        )
+    return challenges
+
+
+@pytest.mark.parametrize("model", [CommunityChallenge, User, Location])
+def test_geohash_indexes_support_prefix_like(model):
+    # Must match the migrations, which build them with varchar_pattern_ops
+    (index,) = [index for index in model.__table__.indexes if index.name.endswith("_geohash")]
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert ddl == f"CREATE INDEX {index.name} ON {model.__tablename__} (geohash varchar_pattern_ops)"
+
+
+def test_geohash_encode_and_bounds():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    min_lat, min_lon, max_lat, max_lon = geohash.decode_bounds("u4pruydqqvj")
+    assert min_lat <= 57.64911 <= max_lat and min_lon <= 10.40744 <= max_lon
+
+
+@pytest.mark.parametrize("radius_km", [0.2, 1.0, 5.0, 50.0])
+def test_cover_radius_contains_every_point_in_radius(radius_km: float):
+    cells = geohash.cover_radius(*MONROVIA, radius_km)
+    assert 1 <= len(cells) <= 16
+    rng = random.Random(radius_km)
+    for _ in range(500):
+        lat, lon = _offset_point(*MONROVIA, rng.uniform(0, radius_km), rng.uniform(0, 360))
+        if haversine_distance(*MONROVIA, lat, lon) <= radius_km:
+            assert any(geohash.encode(lat, lon).startswith(cell) for cell in cells)
+
+
+@pytest.mark.asyncio
+async def test_radius_search_orders_by_distance_with_cursor_pages():
+    challenges = _challenges(60, max_km=10.0)
+    session = FakeChallengeSession(challenges)
+    expected = sorted(
+        (c for c in challenges if haversine_distance(*MONROVIA, c.latitude, c.longitude) <= 5.0),
+        key=lambda c: haversine_distance(*MONROVIA, c.latitude, c.longitude),
+    )
+
+    seen = []
+    cursor = None
+    while True:
+        result = await search_challenges_in_radius(session, *MONROVIA, radius_km=5.0, limit=7, cursor=cursor)
+        assert result.total == len(expected)
+        assert result.distances_km == sorted(result.distances_km)
+        if result.next_cursor:
+            assert len(result.challenges) == 7
+        seen.extend(result.challenges)
+        cursor = result.next_cursor
+        if not cursor:
+            break
+
+    assert [c.id for c in seen] == [c.id for c in expected]
+    # Each page is one query plus one aggregate; the exact distance, order and seek run in SQL
+    page_sql = str(session.statements[2].compile(dialect=postgresql.dialect()))
+    assert "geohash LIKE" in page_sql
+    assert "asin(sqrt(least(" in page_sql
+    assert "community_challenges.id) > (" in page_sql
+    assert "community_challenges.id \n LIMIT" in page_sql and "OFFSET" not in page_sql
+    count_sql = str(session.statements[1].compile(dialect=postgresql.dialect()))
+    assert count_sql.startswith("SELECT count(community_challenges.id)")
+    assert "asin(sqrt(least(" in count_sql
+
+
+@pytest.mark.asyncio
+async def test_radius_search_rejects_bad_cursor():
+    session = FakeChallengeSession(_challenges(3, max_km=1.0))
+    with pytest.raises(ValueError):
+        await search_challenges_in_radius(session, *MONROVIA, cursor="not-a-cursor")
@@ -0,0 +1,124 @@
+"""Tests for the tiled, zoom-aware heatmap."""
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
+
+from app.api.deps import get_current_principal, get_current_user, get_db_session
+from app.main import app
+from app.services import geohash
+from app.services.analytics import heatmap_tiles
+from app.services.analytics_cache import AnalyticsCache, set_analytics_cache
+from tests.fakes import FakeUser
+
+MONROVIA = (6.25, -10.85, 6.35, -10.70)
+
+
+class TileSession:
+    """Returns two cells for every tile a query covers and records the statements."""
+
+    def __init__(self) -> None:
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        params = stmt.compile().params
+        tiles = sorted(value.rstrip("%") for name, value in params.items() if name.startswith("geohash_"))
+        rows = [
+            row
+            for tile in tiles
+            for row in (
+                SimpleNamespace(cell=tile + "00", latitude=6.3, longitude=-10.8, report_count=40, avg_severity=2.5),
+                SimpleNamespace(cell=tile + "01", latitude=6.31, longitude=-10.79, report_count=3, avg_severity=1.0),
+            )
+        ]
+        return SimpleNamespace(all=lambda: rows)
+
+
+@pytest.fixture
+def tile_client():
+    session = TileSession()
+
+    async def _fake_db():
+        yield session
+
+    set_analytics_cache(AnalyticsCache())
+    app.dependency_overrides[get_current_user] = lambda: FakeUser(role="government")
+    app.dependency_overrides[get_current_principal] = lambda: FakeUser(role="government")
+    app.dependency_overrides[get_db_session] = _fake_db
+    yield session
+    app.dependency_overrides.clear()
+    set_analytics_cache(None)
+
+
+def test_zoom_sets_cell_precision_and_tiles_cover_the_viewport():
+    assert [geohash.precision_for_zoom(zoom) for zoom in (0, 5, 10, 15, 22)] == [2, 4, 6, 8, 8]
+    precision, tiles = heatmap_tiles(MONROVIA, zoom=12)
+    assert all(len(tile) == precision - 2 for tile in tiles)
+    for lat in (MONROVIA[0], MONROVIA[2]):
+        for lon in (MONROVIA[1], MONROVIA[3]):
+            assert geohash.encode(lat, lon, precision - 2) in tiles
+
+
+@pytest.mark.asyncio
+async def test_tiles_return_compact_cell_arrays_and_are_cached(tile_client):
+    params = dict(zip(("min_lat", "min_lon", "max_lat", "max_lon"), MONROVIA), zoom=12, days=90)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/v1/dashboards/heatmap/tiles", params=params)
+        queries = len(tile_client.statements)
+        second = await client.get("/v1/dashboards/heatmap/tiles", params=params)
+
+    assert first.status_code == 200
+    data = first.json()
+    assert (data["zoom"], data["precision"], data["days"]) == (12, 6, 90)
+    _, tiles = heatmap_tiles(MONROVIA, zoom=12)
+    assert [tile["tile"] for tile in data["tiles"]] == tiles
+    tile = data["tiles"][0]
+    assert tile["cells"] == [tile["tile"] + "00", tile["tile"] + "01"]
+    assert tile["report_count"] == [40, 3]
+    assert tile["avg_severity"] == [2.5, 1.0]
+
+    # One query with a prefix range per tile, and none once the tiles are cached
+    assert queries == 1
+    assert second.json() == data
+    assert len(tile_client.statements) == queries
+    sql = str(tile_client.statements[0].compile(dialect=postgresql.dialect()))
+    assert "locations.geohash LIKE" in sql
+    assert "GROUP BY substr(locations.geohash," in sql
+
+
+@pytest.mark.asyncio
+async def test_oversized_viewport_is_rejected(tile_client):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(
+            "/v1/dashboards/heatmap/tiles",
+            params={"min_lat": -40, "min_lon": -80, "max_lat": 40, "max_lon": 60, "zoom": 14},
+        )
+
+    assert response.status_code == 400
+    assert tile_client.statements == []
+
+
+@pytest.mark.asyncio
+async def test_panning_computes_only_the_uncached_tiles_in_one_query(tile_client):
+    panned = (MONROVIA[0], MONROVIA[1] + 0.2, MONROVIA[2], MONROVIA[3] + 0.2)  # Two new tiles, two shared
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        for box in (MONROVIA, panned):
+            params = dict(zip(("min_lat", "min_lon", "max_lat", "max_lon"), box), zoom=12)
+            response = await client.get("/v1/dashboards/heatmap/tiles", params=params)
+            assert response.status_code == 200
+
+    _, before = heatmap_tiles(MONROVIA, zoom=12)
+    _, after = heatmap_tiles(panned, zoom=12)
+    assert len(tile_client.statements) == 2
+    queried = {
+        value.rstrip("%")
+        for name, value in tile_client.statements[1].compile().params.items()
+        if name.startswith("geohash_")
+    }
+    assert queried == set(after) - set(before)
+    assert [tile["tile"] for tile in response.json()["tiles"]] == after
@@ -0,0 +1,216 @@
+"""Tests for the background job queue and worker."""
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.reports import create_report
+from app.schemas.common import Location
+from app.schemas.report import ReportCreateRequest
+from app.services import jobs
+from app.services.job_tasks import NOTIFICATIONS_QUEUE, NOTIFY_COMMUNITY
+from app.services.jobs import InMemoryJobQueue, PostgresJobQueue, Worker, job_handler, retry_delay
+from tests.fakes import FakeSession, FakeUser
+
+
+class NullSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        return None
+
+    async def rollback(self):
+        return None
+
+
+def _worker(backend, **kwargs) -> Worker:
+    kwargs.setdefault("backoff_base", 0.0)
+    return Worker(backend, queues=["test"], session_factory=NullSession, worker_id="test-worker", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_then_succeeds():
+    calls = []
+
+    @job_handler("test.flaky")
+    async def _flaky(session, payload):
+        calls.append(payload["n"])
+        if len(calls) < 3:
+            raise RuntimeError("provider unavailable")
+
+    backend = InMemoryJobQueue()
+    job_id = await backend.enqueue(None, "test.flaky", {"n": 1}, queue="test", max_attempts=5)
+    worker = _worker(backend)
+
+    for _ in range(3):
+        await worker.run_once()
+        await worker.drain()
+
+    assert backend.jobs[job_id]["status"] == "done"
+    assert backend.jobs[job_id]["attempts"] == 3
+    metrics = worker.metrics["test"]
+    assert (metrics.started, metrics.retried, metrics.succeeded, metrics.failed) == (3, 2, 1, 0)
+    assert metrics.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_fails_job_after_max_attempts():
+    @job_handler("test.broken")
+    async def _broken(session, payload):
+        raise ValueError("bad payload")
+
+    backend = InMemoryJobQueue()
+    job_id = await backend.enqueue(None, "test.broken", {}, queue="test", max_attempts=2)
+    worker = _worker(backend)
+
+    for _ in range(3):
+        await worker.run_once()
+        await worker.drain()
+
+    job = backend.jobs[job_id]
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["last_error"] == "ValueError: bad payload"
+    assert worker.metrics.snapshot()["test"]["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_bounds_concurrency():
+    running = 0
+    peak = 0
+
+    @job_handler("test.slow")
+    async def _slow(session, payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    backend = InMemoryJobQueue()
+    for i in range(10):
+        await backend.enqueue(None, "test.slow", {"i": i}, queue="test")
+    worker = _worker(backend, concurrency=3)
+
+    assert await worker.run_once() == 3
+    assert await worker.run_once() == 0  # every slot is busy
+    while any(job["status"] != "done" for job in backend.jobs.values()):
+        await worker.run_once()
+        await asyncio.sleep(0)
+    await worker.drain()
+
+    assert peak == 3
+    assert worker.metrics["test"].succeeded == 10
+
+
+@pytest.mark.asyncio
+async def test_unknown_task_is_retried_not_lost():
+    backend = InMemoryJobQueue()
+    job_id = await backend.enqueue(None, "test.missing", {}, queue="test")
+    worker = _worker(backend, backoff_base=60.0)
+
+    await worker.run_once()
+    await worker.drain()
+
+    job = backend.jobs[job_id]
+    assert job["status"] == "queued"
+    assert "No handler registered" in job["last_error"]
+    assert await worker.run_once() == 0  # backoff keeps it out of the next claim
+
+
+def test_retry_delay_backs_off_exponentially_with_cap():
+    assert 2.5 <= retry_delay(1, 5.0, 600.0) <= 5.0
+    assert 10.0 <= retry_delay(3, 5.0, 600.0) <= 20.0
+    assert 300.0 <= retry_delay(20, 5.0, 600.0) <= 600.0
+
+
+@pytest.mark.asyncio
+async def test_postgres_claim_skips_locked_rows():
+    statements = []
+
+    class RecordingSession(NullSession):
+        async def execute(self, stmt, params=None):
+            statements.append(stmt)
+
+            class _Result:
+                def all(self):
+                    return []
+
+            return _Result()
+
+    backend = PostgresJobQueue(session_factory=RecordingSession)
+    assert await backend.claim(["notifications"], 10, "w1") == []
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE jobs SET status=")
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING jobs.id" in sql
+
+
+@pytest.mark.asyncio
+async def test_create_report_enqueues_attestation_job():
+    session = FakeSession()
+    body = ReportCreateRequest(
+        category="infrastructure",
+        severity="high",
+        summary="Bridge down",
+        details="SAMPLE",
+        location=Location(latitude=6.3, longitude=-10.8, county="Montserrado"),
+    )
+
+    response = await create_report(body=body, session=session, user=FakeUser())
+
+    assert len(session.jobs) == 1
+    job = session.jobs[0]
+    assert (job.task, job.queue, job.status) == (NOTIFY_COMMUNITY, NOTIFICATIONS_QUEUE, "queued")
+    assert job.payload["report_ids"] == [str(response.id)]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_job_uses_configured_backend():
+    backend = InMemoryJobQueue()
+    jobs.set_job_queue(backend)
+    try:
+        job_id = await jobs.enqueue_job(None, "test.anything", {"x": 1})
+    finally:
+        jobs.set_job_queue(None)
+
+    assert backend.jobs[job_id]["max_attempts"] == 5
+    assert await backend.depths() == {"default": {"queued": 1}}
+
+
+@pytest.mark.asyncio
+async def test_api_lifespan_runs_jobs_for_the_memory_backend(monkeypatch):
+    from app import database
+    from app.config import get_settings
+    from app.main import app, lifespan
+
+    ran = asyncio.Event()
+
+    @job_handler("test.in_process")
+    async def _in_process(session, payload):
+        ran.set()
+
+    monkeypatch.setattr(get_settings(), "job_backend", "memory")
+    monkeypatch.setattr(database, "SessionLocal", NullSession)
+    backend = InMemoryJobQueue()
+    jobs.set_job_queue(backend)
+    try:
+        job_id = await backend.enqueue(None, "test.in_process", {}, queue="default")
+        async with lifespan(app):
+            await asyncio.wait_for(ran.wait(), 1)
+    finally:
+        jobs.set_job_queue(None)
+
+    assert backend.jobs[job_id]["status"] == "done"
+
+
+def test_worker_metrics_server_binds_loopback_by_default():
+    from app.worker import parse_args
+
+    assert parse_args([]).metrics_addr == "127.0.0.1"
+    assert parse_args(["--metrics-addr", "0.0.0.0"]).metrics_addr == "0.0.0.0"
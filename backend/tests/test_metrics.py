@@ -0,0 +1,123 @@
+"""Tests for the Prometheus metrics subsystem."""
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+pytest.importorskip("prometheus_client")
+
+from app.middleware import MetricsMiddleware  # noqa: E402
+from app.services import query_stats  # noqa: E402
+from app.services.metrics import Metrics, normalize_statement, statement_fingerprint  # noqa: E402
+
+
+def _sample(metrics: Metrics, name: str, **labels) -> float:
+    return metrics.registry.get_sample_value(name, labels) or 0.0
+
+
+def test_statements_differing_only_in_values_share_a_fingerprint():
+    one = "SELECT reports.id FROM reports WHERE reports.id IN ($1, $2, $3) AND reports.status = 'verified'"
+    other = "SELECT reports.id FROM reports\n WHERE reports.id IN ($1) AND reports.status = 'resolved'"
+
+    assert normalize_statement(one) == "SELECT reports.id FROM reports WHERE reports.id IN (?, ...) AND reports.status = ?"
+    assert statement_fingerprint(one) == statement_fingerprint(other.replace("($1)", "($1, $2)"))
+    assert statement_fingerprint(one).startswith("SELECT reports ")
+    assert statement_fingerprint("INSERT INTO notifications (id) VALUES ($1)").startswith("INSERT notifications ")
+
+
+def test_fingerprints_beyond_the_cap_are_grouped():
+    metrics = Metrics(max_fingerprints=1)
+
+    assert metrics.fingerprint_label("SELECT 1 FROM users") != "other"
+    assert metrics.fingerprint_label("SELECT 1 FROM reports") == "other"
+
+
+@pytest.mark.asyncio
+async def test_requests_are_recorded_by_route_template_and_status():
+    metrics = Metrics()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    @app.get("/v1/reports/{report_id}")
+    async def get_report(report_id: str):
+        if report_id == "missing":
+            raise HTTPException(status_code=404)
+        return {"id": report_id}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for report_id in ("a", "b", "missing"):
+            await client.get(f"/v1/reports/{report_id}")
+
+    route = "/v1/reports/{report_id}"
+    assert _sample(metrics, "http_requests_total", method="GET", route=route, status="200") == 2
+    assert _sample(metrics, "http_requests_total", method="GET", route=route, status="404") == 1
+    assert _sample(metrics, "http_request_duration_seconds_count", method="GET", route=route, status="200") == 2
+    assert _sample(metrics, "http_requests_in_flight", method="GET", route=route) == 0
+
+
+def test_statement_timings_and_errors_are_recorded():
+    metrics = Metrics()
+    engine = create_engine("sqlite://")
+    query_stats.instrument_engine(engine, metrics=metrics)
+
+    with query_stats.track_queries() as stats, engine.connect() as conn:
+        for n in range(3):
+            conn.execute(text("SELECT :n"), {"n": n})
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+
+    select_label = statement_fingerprint("SELECT ?")
+    error_label = statement_fingerprint("SELECT * FROM missing_table")
+    assert _sample(metrics, "db_statement_duration_seconds_count", fingerprint=select_label) == 3
+    assert _sample(metrics, "db_statement_errors_total", fingerprint=error_label) == 1
+    # One listener pair feeds the per-request stats and the metrics
+    assert stats.count == 3
+    assert len(engine.dispatch.after_cursor_execute) == 1
+
+
+@pytest.mark.asyncio
+async def test_scrape_includes_pool_and_push_figures():
+    metrics = Metrics()
+    metrics.track_engine(create_engine("sqlite://"))
+
+    body, content_type = metrics.render()
+    text_body = body.decode()
+
+    assert content_type.startswith("text/plain")
+    for name in ("db_pool_checkout_wait_seconds_bucket", "asyncio_tasks", "push_deliveries_total", "push_queue_depth"):
+        assert name in text_body
+    assert _sample(metrics, "asyncio_tasks") >= 1
+
+
+def test_worker_job_counters_are_exposed():
+    from app.services.jobs import JobMetrics
+
+    metrics = Metrics()
+    job_metrics = JobMetrics()
+    job_metrics["notifications"].succeeded = 3
+    job_metrics["notifications"].retried = 1
+    job_metrics["notifications"].in_flight = 2
+    metrics.track_jobs(job_metrics)
+
+    assert _sample(metrics, "jobs_total", queue="notifications", outcome="succeeded") == 3
+    assert _sample(metrics, "jobs_total", queue="notifications", outcome="retried") == 1
+    assert _sample(metrics, "jobs_in_flight", queue="notifications") == 2
+
+
+@pytest.mark.asyncio
+async def test_scrape_requires_the_token_when_one_is_set():
+    from app.api import metrics as metrics_api
+    from app.config import get_settings
+
+    app = FastAPI()
+    app.include_router(metrics_api.router)
+    settings = get_settings().model_copy(update={"metrics_token": "s3cret"})
+    app.dependency_overrides[get_settings] = lambda: settings
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        anonymous = await client.get("/metrics")
+        wrong = await client.get("/metrics", headers={"Authorization": "Bearer guess"})
+        scraper = await client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+
+    assert (anonymous.status_code, wrong.status_code, scraper.status_code) == (401, 401, 200)
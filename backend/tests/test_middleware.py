@@ -0,0 +1,111 @@
+"""Tests for the pure ASGI middleware stack."""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app import middleware
+from app.middleware import (
+    SECURITY_HEADERS,
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+    RateLimitMiddleware,
+    SecurityHeadersMiddleware,
+)
+from app.services.rate_limiter import RateLimiter, set_rate_limiter
+
+
+def _app(events: list[str]) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(default_limit=10))
+
+    @app.get("/v1/export")
+    async def export():
+        events.append("called")
+
+        async def rows():
+            for n in range(3):
+                events.append(f"produced {n}")
+                yield f"row {n}\n"
+                await asyncio.sleep(0)
+
+        return StreamingResponse(rows(), media_type="text/plain")
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_streaming_responses_pass_through_with_headers():
+    events: list[str] = []
+    transport = httpx.ASGITransport(app=_app(events))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async with client.stream("GET", "/v1/export") as response:
+            chunks = [chunk async for chunk in response.aiter_text()]
+
+    assert "".join(chunks) == "row 0\nrow 1\nrow 2\n"
+    assert events == ["called", "produced 0", "produced 1", "produced 2"]
+    for name, value in SECURITY_HEADERS.items():
+        assert response.headers[name] == value
+    assert response.headers["X-RateLimit-Remaining"] == "9"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_rejections_skip_the_app():
+    events: list[str] = []
+    app = _app(events)
+    app.user_middleware.clear()
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(default_limit=0))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        missing = await client.get("/health")  # Exempt from limits, 404 from the app
+        limited = await client.get("/v1/export")
+
+    assert missing.status_code == 404
+    assert limited.status_code == 429
+    assert limited.json()["error"] == "Rate limit exceeded"
+    assert events == []
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_rejections_carry_cors_and_security_headers():
+    from app.main import app
+
+    set_rate_limiter(RateLimiter(default_limit=0))
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            origin = {"Origin": "https://app.talkamliberia.org"}
+            preflight = await client.options(
+                "/v1/reports/search", headers={**origin, "Access-Control-Request-Method": "GET"}
+            )
+            limited = await client.get("/v1/reports/search", headers=origin)
+    finally:
+        set_rate_limiter(None)
+
+    assert preflight.status_code == 200
+    assert limited.status_code == 429
+    assert limited.headers["Access-Control-Allow-Origin"] in ("*", origin["Origin"])
+    assert limited.headers["X-Content-Type-Options"] == "nosniff"
+
+
+@pytest.mark.asyncio
+async def test_route_template_is_resolved_once_per_request(monkeypatch):
+    resolved = []
+
+    def counting_route_template(index, method, path):
+        resolved.append(path)
+        return original(index, method, path)
+
+    original = middleware.route_template
+    monkeypatch.setattr(middleware, "route_template", counting_route_template)
+    app = _app([])
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/v1/export")
+
+    assert resolved == ["/v1/export"]
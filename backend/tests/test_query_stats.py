@@ -0,0 +1,133 @@
+"""Tests for per-request statement counting and N+1 detection."""
+import asyncio
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from app.api.notifications import get_notifications
+from app.api.reports import track_report_public
+from app.config import get_settings
+from app.middleware import QueryStatsMiddleware
+from app.models.core import Report
+from app.models.notifications import Notification
+from app.services import query_stats
+from app.services.query_stats import max_queries, record_statement, track_queries
+from tests.fakes import FakeSession
+
+
+class NotificationSession(FakeSession):
+    """Serves notifications from ``select(Notification)``; reports via ``get``."""
+
+    def __init__(self, notifications):
+        super().__init__()
+        self.notifications = notifications
+
+    async def execute(self, stmt, params=None):
+        await super().execute(stmt, params)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.notifications))
+
+
+def _notifications(user_id, n):
+    return [
+        Notification(
+            id=uuid4(), user_id=user_id, report_id=uuid4(), title="Nearby report", message="Can you confirm?",
+            read=False, action_taken=False, created_at=datetime(2026, 10, 1),
+        )
+        for _ in range(n)
+    ]
+
+
+def test_engine_statements_are_counted_by_shape():
+    engine = create_engine("sqlite://")
+    query_stats.instrument_engine(engine)
+
+    with track_queries() as stats, engine.connect() as conn:
+        for n in range(3):
+            conn.execute(text("SELECT :n"), {"n": n})
+        conn.execute(text("SELECT 'other'"))
+
+    assert stats.count == 4
+    assert stats.seconds > 0
+    assert stats.repeated(3) == [("SELECT ?", 4)]  # Literals normalize to the same shape
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tasks_count_towards_the_request():
+    async def query(n):
+        await asyncio.sleep(0)
+        record_statement(f"SELECT * FROM reports WHERE id = {n}")
+
+    with track_queries() as outer:
+        with track_queries() as inner:
+            await asyncio.gather(*(query(n) for n in range(4)))
+        record_statement("SELECT 1")
+
+    assert inner.count == 4
+    assert outer.count == 5
+
+
+def test_slow_statements_are_logged(monkeypatch, caplog):
+    monkeypatch.setattr(get_settings(), "db_slow_query_ms", 50.0)
+
+    with caplog.at_level(logging.WARNING, logger="app.services.query_stats"):
+        record_statement("SELECT * FROM reports WHERE id = $1", seconds=0.01)
+        record_statement("SELECT * FROM reports WHERE id = $1", seconds=0.2)
+
+    assert [r.getMessage() for r in caplog.records] == ["Slow statement (200 ms): SELECT * FROM reports WHERE id = ?"]
+
+
+@pytest.mark.asyncio
+async def test_max_queries_bounds_an_endpoint():
+    session = FakeSession()
+    session.add(Report(report_id="TLK-1", category="health", severity="low", summary="x",
+                       updated_at=datetime(2026, 10, 2)))
+
+    with max_queries(1):
+        await track_report_public("TLK-1", session=session)
+
+    with pytest.raises(AssertionError, match="1 statements, expected at most 0"):
+        with max_queries(0):
+            await track_report_public("TLK-1", session=session)
+
+
+@pytest.mark.asyncio
+async def test_notification_list_loads_reports_one_by_one():
+    user = SimpleNamespace(id=uuid4(), role="citizen")
+    session = NotificationSession(_notifications(user.id, 6))
+
+    with track_queries() as stats:
+        await get_notifications(session=session, user=user, unread_only=False, limit=50)
+
+    # Known N+1: one report lookup per notification
+    [(shape, n)] = stats.repeated(5)
+    assert n == 6
+    assert "FROM reports WHERE reports.id = ?" in shape
+
+
+@pytest.mark.asyncio
+async def test_middleware_warns_about_n_plus_one_and_sets_debug_headers(caplog):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, n_plus_one_threshold=3, debug_headers=True)
+
+    @app.get("/v1/challenges/{challenge_id}/supporters")
+    async def supporters(challenge_id: str):
+        record_statement("SELECT * FROM challenges WHERE id = $1")
+        for n in range(4):
+            record_statement(f"SELECT * FROM users WHERE id = '{n}'")
+        return []
+
+    with caplog.at_level(logging.WARNING, logger="app.services.query_stats"):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/v1/challenges/abc/supporters")
+
+    assert response.headers["X-DB-Query-Count"] == "5"
+    assert "X-DB-Query-Time-Ms" in response.headers
+    assert [r.getMessage() for r in caplog.records] == [
+        "Possible N+1 in GET /v1/challenges/{challenge_id}/supporters: 4x SELECT * FROM users WHERE id = ?"
+    ]
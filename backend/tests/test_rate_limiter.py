@@ -0,0 +1,179 @@
+"""Tests for the sliding-window rate limiter and its middleware."""
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from jose import jwt
+
+from app.middleware import RateLimitMiddleware
+from app.services import auth_cache
+from app.services.auth_cache import AuthCache
+from app.services.rate_limiter import RateLimiter
+
+SECRET = "test-secret"
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_040.0) -> None:  # 20s into a 60s window
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ScriptRedis:
+    """Runs the limiter script's logic in Python and counts round trips."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, int] = {}
+        self.calls = []
+
+    def register_script(self, source):
+        async def script(keys, args):
+            self.calls.append(keys)
+            limit, window, elapsed = args
+            current, previous = self.data.get(keys[0], 0), self.data.get(keys[1], 0)
+            if previous * (window - elapsed) / window + current + 1 > limit:
+                return [0, current, previous]
+            self.data[keys[0]] = current + 1
+            return [1, current + 1, previous]
+
+        return script
+
+
+class BrokenRedis:
+    def register_script(self, source):
+        async def script(keys, args):
+            raise ConnectionError("redis down")
+
+        return script
+
+
+@pytest.mark.asyncio
+async def test_denies_past_the_limit_and_reports_remaining():
+    limiter = RateLimiter(window=60, default_limit=3, clock=Clock())
+
+    results = [await limiter.hit("ip:1.2.3.4", "/v1/reports", []) for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results] == [2, 1, 0, 0]
+    assert results[-1].retry_after == pytest.approx(40)  # No previous window: wait for the next one
+
+
+@pytest.mark.asyncio
+async def test_previous_window_counts_in_proportion():
+    clock = Clock()
+    limiter = RateLimiter(window=60, default_limit=10, clock=clock)
+    for _ in range(10):
+        await limiter.hit("ip:1.2.3.4", "/v1/reports", [])
+
+    clock.now += 60  # 20s into the next window: two thirds of the old count still applies
+    allowed = 0
+    while (await limiter.hit("ip:1.2.3.4", "/v1/reports", [])).allowed:
+        allowed += 1
+    assert allowed == 3
+
+    clock.now += 40  # Start of the window after that: the first burst is forgotten
+    assert (await limiter.hit("ip:1.2.3.4", "/v1/reports", [])).remaining == 6
+
+
+@pytest.mark.asyncio
+async def test_redis_path_is_one_round_trip_per_request():
+    redis = ScriptRedis()
+    limiter = RateLimiter(redis_client=redis, default_limit=2, clock=Clock())
+
+    results = [await limiter.hit("user:abc", "/v1/reports/{report_id}", []) for _ in range(3)]
+
+    assert [r.allowed for r in results] == [True, True, False]
+    assert len(redis.calls) == 3
+    assert redis.calls[0] == [
+        "rate_limit:{user:abc:/v1/reports/{report_id}}:16667",
+        "rate_limit:{user:abc:/v1/reports/{report_id}}:16666",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_local_limits_when_redis_is_down():
+    limiter = RateLimiter(redis_client=BrokenRedis(), default_limit=1, clock=Clock())
+
+    assert (await limiter.hit("ip:1.2.3.4", "/v1/reports", [])).allowed
+    assert not (await limiter.hit("ip:1.2.3.4", "/v1/reports", [])).allowed
+
+
+def test_roles_get_their_most_generous_limit():
+    limiter = RateLimiter(default_limit=100, role_limits={"ngo": 300, "admin": 600})
+
+    assert limiter.limit_for([]) == 100
+    assert limiter.limit_for(["citizen"]) == 100
+    assert limiter.limit_for(["ngo", "admin"]) == 600
+
+
+@pytest.fixture
+def client():
+    auth_cache.set_auth_cache(AuthCache(secret_key=SECRET))
+    limiter = RateLimiter(default_limit=2, role_limits={"ngo": 4})
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/v1/reports/{report_id}")
+    async def get_report(report_id: str):
+        return {"id": report_id}
+
+    yield httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    auth_cache.set_auth_cache(None)
+
+
+def _token(sub: str, roles: list[str]) -> dict[str, str]:
+    token = jwt.encode(
+        {"sub": sub, "roles": roles, "exp": datetime.utcnow() + timedelta(minutes=5)}, SECRET, algorithm="HS256"
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio
+async def test_requests_share_a_bucket_per_route_template(client):
+    async with client:
+        first = await client.get("/v1/reports/a")
+        second = await client.get("/v1/reports/b")
+        third = await client.get("/v1/reports/c")
+
+    assert [r.status_code for r in (first, second, third)] == [200, 200, 429]
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert int(third.headers["Retry-After"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_authenticated_callers_are_limited_by_subject_and_role(client):
+    async with client:
+        ngo = [await client.get("/v1/reports/a", headers=_token("ngo-user", ["ngo"])) for _ in range(5)]
+        other = await client.get("/v1/reports/a", headers=_token("someone-else", []))
+        forged = await client.get("/v1/reports/a", headers={"Authorization": "Bearer forged"})
+
+    assert [r.status_code for r in ngo] == [200, 200, 200, 200, 429]
+    assert ngo[0].headers["X-RateLimit-Limit"] == "4"
+    assert other.status_code == 200
+    assert forged.headers["X-RateLimit-Limit"] == "2"  # Invalid tokens fall back to the client address
+
+
+@pytest.mark.asyncio
+async def test_forwarded_for_headers_do_not_reset_the_limit(client):
+    async with client:
+        responses = [
+            await client.get("/v1/reports/a", headers={"X-Forwarded-For": f"10.0.0.{n}"}) for n in range(3)
+        ]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+
+
+@pytest.mark.asyncio
+async def test_health_checks_are_exempt(client):
+    async with client:
+        responses = [await client.get("/health") for _ in range(5)]
+
+    assert all(r.status_code == 200 for r in responses)
+    assert "X-RateLimit-Limit" not in responses[0].headers
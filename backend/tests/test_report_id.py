@@ -0,0 +1,70 @@
+"""Tests for the report ID sequencer."""
+import asyncio
+import random
+import re
+
+import pytest
+
+from app.api.reports import create_report
+from app.schemas.common import Location
+from app.schemas.report import ReportCreateRequest
+from app.services import community_notifications
+from app.services.report_id import ReportIdSequencer, format_report_id
+from tests.fakes import FakeSession, FakeUser
+
+
+class InterleavingFakeSession(FakeSession):
+    """FakeSession that yields to the event loop on every round trip."""
+
+    async def execute(self, stmt):
+        await asyncio.sleep(random.random() / 1000)
+        return await super().execute(stmt)
+
+    async def flush(self) -> None:
+        await asyncio.sleep(0)
+
+
+def test_format_report_id():
+    assert format_report_id(2025, 123) == "RPT-2025-000123"
+    assert format_report_id(2025, 1234567) == "RPT-2025-1234567"
+
+
+@pytest.mark.asyncio
+async def test_sequencer_allocations_are_unique_under_concurrency():
+    session = InterleavingFakeSession()
+    sequencer = ReportIdSequencer(block_size=7)
+
+    batches = await asyncio.gather(
+        *(sequencer.allocate(session, count=random.randint(1, 3), year=2031) for _ in range(500))
+    )
+    values = [value for batch in batches for value in batch]
+
+    assert len(values) == len(set(values))
+    # Leased blocks are consumed in order, so at most one partial block is left over
+    assert max(values) - len(values) < sequencer.block_size
+
+
+@pytest.mark.asyncio
+async def test_parallel_report_creates_get_unique_ids(monkeypatch: pytest.MonkeyPatch):
+    async def _no_notify(*_, **__):
+        return [], None
+
+    monkeypatch.setattr(community_notifications, "notify_community_for_attestation", _no_notify)
+    session = InterleavingFakeSession()
+    user = FakeUser()
+
+    def _body(i: int) -> ReportCreateRequest:
+        return ReportCreateRequest(
+            category="infrastructure",
+            severity="medium",
+            summary=f"Concurrent report {i}",
+            location=Location(latitude=6.3, longitude=-10.8, county="Montserrado"),
+        )
+
+    responses = await asyncio.gather(
+        *(create_report(body=_body(i), session=session, user=user) for i in range(300))
+    )
+    report_ids = [response.report_id for response in responses]
+
+    assert len(set(report_ids)) == 300
+    assert all(re.fullmatch(r"RPT-\d{4}-\d{6,}", report_id) for report_id in report_ids)
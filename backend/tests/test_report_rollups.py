@@ -0,0 +1,134 @@
+"""Tests for the incrementally maintained report_daily_stats rollups."""
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.core import Report
+from app.services.report_rollups import (
+    ReportFacts,
+    rebuild_report_rollups,
+    record_report_changes,
+    report_facts,
+)
+
+
+class RecordingSession:
+    def __init__(self, counties=None) -> None:
+        self.counties = counties or {}
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        counties = self.counties
+
+        class Result:
+            rowcount = 3
+
+            def all(self):
+                return list(counties.items())
+
+        return Result()
+
+
+def _sql(stmt):
+    return stmt.compile(dialect=postgresql.dialect())
+
+
+def _rows(stmt):
+    """Multi-row VALUES of a compiled upsert, as one dict per row."""
+    params = _sql(stmt).params
+    rows = {}
+    for name, value in params.items():
+        column, _, index = name.rpartition("_m")
+        if index.isdigit():
+            rows.setdefault(int(index), {})[column] = value
+    return [rows[i] for i in sorted(rows)]
+
+
+@pytest.mark.asyncio
+async def test_new_reports_are_merged_into_one_upsert_per_request():
+    day = date(2026, 10, 1)
+    session = RecordingSession()
+    changes = [
+        (None, ReportFacts(day, "health", "high", "submitted", county="Montserrado", ai_score=0.5)),
+        (None, ReportFacts(day, "health", "high", "submitted", county="Montserrado", ai_score=0.7)),
+        (None, ReportFacts(day, "violence", "critical", "submitted", county="Bong")),
+    ]
+
+    await record_report_changes(session, changes)
+
+    assert len(session.statements) == 1
+    sql = str(_sql(session.statements[0]))
+    assert "ON CONFLICT (day, county, category, severity, status) DO UPDATE SET" in sql
+    assert "report_count = (report_daily_stats.report_count + excluded.report_count)" in sql
+    rows = _rows(session.statements[0])
+    assert [(row["category"], row["report_count"]) for row in rows] == [("health", 2), ("violence", 1)]
+    assert rows[0]["ai_score_sum"] == pytest.approx(1.2)
+    assert rows[0]["ai_score_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_status_transition_moves_the_report_between_rows():
+    created = datetime(2026, 10, 1, 8, 0)
+    report = Report(
+        id=uuid4(), category="security", severity="medium", status="submitted",
+        created_at=created, updated_at=created, location_id=uuid4(),
+    )
+    session = RecordingSession({report.location_id: "Nimba"})
+
+    before = report_facts(report)
+    report.status = "verified"
+    after = report_facts(report, verified_at=created + timedelta(hours=2))
+    await record_report_changes(session, [(before, after)])
+
+    lookup, upsert = session.statements
+    assert str(_sql(lookup)).startswith("SELECT locations.id, locations.county")
+    rows = _rows(upsert)
+    assert [(row["county"], row["status"], row["report_count"]) for row in rows] == [
+        ("Nimba", "submitted", -1), ("Nimba", "verified", 1),
+    ]
+    assert rows[1]["response_seconds_sum"] == 7200.0
+
+
+@pytest.mark.asyncio
+async def test_locations_in_one_county_share_one_row():
+    day = date(2026, 10, 1)
+    ganta, sanniquellie, unknown = uuid4(), uuid4(), uuid4()
+    session = RecordingSession({ganta: "Nimba", sanniquellie: "Nimba"})
+    changes = [
+        (None, ReportFacts(day, "health", "high", "submitted", location_id=location_id))
+        for location_id in (ganta, sanniquellie, unknown)
+    ]
+
+    await record_report_changes(session, changes)
+
+    lookup, upsert = session.statements
+    assert len(_sql(lookup).params) == 1  # One IN list for all locations
+    rows = _rows(upsert)
+    assert [(row["county"], row["report_count"]) for row in rows] == [("Nimba", 2), ("", 1)]
+
+
+@pytest.mark.asyncio
+async def test_changes_that_cancel_out_write_nothing():
+    facts = ReportFacts(date(2026, 10, 1), "health", "low", "submitted", county="")
+    session = RecordingSession()
+
+    await record_report_changes(session, [(facts, facts), (None, None)])
+
+    assert session.statements == []
+
+
+@pytest.mark.asyncio
+async def test_rebuild_locks_clears_and_reaggregates_from_since():
+    session = RecordingSession()
+
+    assert await rebuild_report_rollups(session, since=date(2026, 9, 1)) == 3
+
+    lock, clear, fill = (str(_sql(stmt)) for stmt in session.statements)
+    assert lock == "LOCK TABLE report_daily_stats IN EXCLUSIVE MODE"
+    assert clear.startswith("DELETE FROM report_daily_stats WHERE report_daily_stats.day >=")
+    assert fill.startswith("INSERT INTO report_daily_stats (day, county, category, severity, status,")
+    assert "FROM reports LEFT OUTER JOIN locations" in fill
+    assert "GROUP BY CAST(reports.created_at AS DATE)" in fill
@@ -38,6 +38,10 @@ async def test_create_report_persists_location_and_media():
     assert response.summary == "Bridge down"
     assert response.location.county == "Montserrado"
     assert response.media[0].key == "media/test.jpg"
+    # reporter's last known location is kept for nearby-notification targeting
+    assert user.county == "Montserrado"
+    assert (user.latitude, user.longitude) == (6.3, -10.8)
+    assert user.geohash.startswith("ec")
 
 
 @pytest.mark.asyncio
@@ -61,6 +65,7 @@ async def test_verify_report_updates_status(monkeypatch: pytest.MonkeyPatch):
     result = await verify_report(report_id=report_response.id, body=verification, session=session, user=user)
 
     assert result["status"] == "verified"
+    assert session.locked == [report_response.id]
 
 
 @pytest.mark.asyncio
@@ -82,6 +87,7 @@ async def test_assign_report_sets_agency_and_status():
 
     assert result["assigned_agency"] == "LNP"
     assert result["status"] == "assigned"
+    assert session.locked == [report_response.id]  # rollup snapshot taken under a row lock
 
 
 @pytest.mark.asyncio
@@ -102,6 +108,7 @@ async def test_update_report_status_validates_allowed_status():
         report_id=report_response.id, body=update_body, session=session, user=admin_user
     )
     assert result["status"] == "resolved"
+    assert session.locked == [report_response.id]
 
     # Invalid status should raise
     bad_body = ReportStatusUpdateRequest(status="not-a-status")
@@ -84,3 +84,82 @@ async def test_search_validation():
         assert response.status_code == 400
     
     app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_search_cursor_pagination():
+    """Test keyset pagination cursors and count modes."""
+    from app.models.core import Location, Report
+
+    app.dependency_overrides[get_current_user] = lambda: FakeUser(role="admin")
+    shared_session = FakeSession()
+    location = Location(latitude=6.3, longitude=-10.8, county="Montserrado")
+    shared_session.add(location)
+    for i in range(25):
+        shared_session.add(
+            Report(
+                category="infrastructure",
+                severity="high",
+                summary=f"Report {i}",
+                status="submitted",
+                location_id=location.id,
+            )
+        )
+
+    async def _fake_db():
+        yield shared_session
+
+    app.dependency_overrides[get_db_session] = _fake_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/v1/reports/search?page_size=10")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["results"]) == 10
+        assert data["next_cursor"]
+
+        # Following the cursor is accepted for the same sort
+        response = await client.get(f"/v1/reports/search?page_size=10&cursor={data['next_cursor']}")
+        assert response.status_code == 200
+
+        # ...but rejected when the sort changes or the cursor is garbage
+        response = await client.get(
+            f"/v1/reports/search?page_size=10&sort_order=asc&cursor={data['next_cursor']}"
+        )
+        assert response.status_code == 400
+        response = await client.get("/v1/reports/search?cursor=not-a-cursor")
+        assert response.status_code == 400
+
+        # Totals can be skipped entirely
+        response = await client.get("/v1/reports/search?total_mode=none")
+        assert response.status_code == 200
+        assert response.json()["total_is_estimate"] is False
+
+        response = await client.get("/v1/reports/search?total_mode=invalid")
+        assert response.status_code == 400
+
+    app.dependency_overrides.clear()
+
+
+def test_keyset_condition_seeks_past_last_row():
+    """Test the keyset predicate for non-null and NULL-tail cursors."""
+    from datetime import datetime
+    from uuid import uuid4
+
+    from sqlalchemy.dialects import postgresql
+
+    from app.models.core import Report
+    from app.services.pagination import decode_cursor, encode_cursor, keyset_condition
+
+    payload = {"s": "created_at", "o": "desc", "v": "2025-12-01T00:00:00", "id": str(uuid4())}
+    assert decode_cursor(encode_cursor(payload)) == payload
+
+    condition = keyset_condition(Report.created_at, Report.id, datetime(2025, 12, 1), uuid4(), True)
+    sql = str(condition.compile(dialect=postgresql.dialect()))
+    assert "(reports.created_at, reports.id) <" in sql
+    assert "reports.created_at IS NULL" in sql
+
+    condition = keyset_condition(Report.priority_score, Report.id, None, uuid4(), False)
+    sql = str(condition.compile(dialect=postgresql.dialect()))
+    assert "reports.priority_score IS NULL AND reports.id >" in sql